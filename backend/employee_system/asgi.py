@@ -13,4 +13,11 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'employee_system.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# /api/events/ (server-sent events) is served on the event loop by
+# employees.events; every other request goes to Django. The import needs
+# the app registry that get_asgi_application() sets up.
+from employees.events import EventStreamApp  # noqa: E402
+
+application = EventStreamApp(django_application)
@@ -1,18 +1,188 @@
-from decouple import config
+from decouple import Csv, config
 
 SECRET_KEY = config('SECRET_KEY')
 DEBUG = config('DEBUG', default=True, cast=bool)
 
+# DB_POOL=true takes connections from a process-wide pool (employees.pool),
+# safe under both wsgi.py and asgi.py. Without it, DB_CONN_MAX_AGE keeps
+# connections open per thread, which only helps WSGI workers.
+DB_POOL = config('DB_POOL', default=False, cast=bool)
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'employees.backends.mysql' if DB_POOL else 'django.db.backends.mysql',
         'NAME': config('DB_NAME'),
         'USER': config('DB_USER'),
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT'),
+        # With the pool, closing at the end of each request returns the
+        # connection to the pool instead of disconnecting
+        'CONN_MAX_AGE': 0 if DB_POOL else config('DB_CONN_MAX_AGE', default=0, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+        'POOL': {
+            'MAX_SIZE': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'IDLE_TIMEOUT': config('DB_POOL_IDLE_TIMEOUT', default=300, cast=int),
+            'MAX_LIFETIME': config('DB_POOL_MAX_LIFETIME', default=3600, cast=int),
+            'TIMEOUT': config('DB_POOL_TIMEOUT', default=10, cast=int),
+            'HEALTH_CHECK_AFTER': config('DB_POOL_HEALTH_CHECK_AFTER', default=1, cast=int),
+        },
         'OPTIONS': {
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
         },
     }
+} if config('DB_ENGINE', default='mysql') == 'mysql' else {
+    # DB_ENGINE=sqlite for local benchmarks and data generation
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': config('DB_NAME', default='db.sqlite3'),
+    }
+}
+
+# Read replicas: DB_REPLICA_HOSTS=host1,host2 adds replica_1, replica_2, ...
+# with the primary's settings (DB_REPLICA_NAMES=a.sqlite3,b.sqlite3 with
+# DB_ENGINE=sqlite). employees.replicas.ReplicaRoutingMiddleware (after
+# SessionMiddleware in MIDDLEWARE) serves GET requests from them, and a
+# session that wrote stays on the primary for REPLICA_PIN_SECONDS.
+_replica_sources = config('DB_REPLICA_HOSTS', default='', cast=Csv()) if 'HOST' in DATABASES['default'] \
+    else config('DB_REPLICA_NAMES', default='', cast=Csv())
+for _index, _source in enumerate(_replica_sources, start=1):
+    DATABASES[f'replica_{_index}'] = {
+        **DATABASES['default'],
+        'HOST' if 'HOST' in DATABASES['default'] else 'NAME': _source,
+        # Reads only; requests write through the primary's transaction
+        'ATOMIC_REQUESTS': False,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['employees.replicas.ReplicaRouter']
+
+EMPLOYEES_REPLICAS = {
+    'ALIASES': [alias for alias in DATABASES if alias.startswith('replica_')],
+    'PIN_SECONDS': config('REPLICA_PIN_SECONDS', default=5, cast=int),
+}
+
+# API JSON goes through orjson when it is installed (employees.renderers
+# falls back to DRF's encoder otherwise)
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'employees.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'employees.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# employees.compression.CompressionMiddleware (right after
+# RequestMetricsMiddleware in MIDDLEWARE) compresses JSON, NDJSON and CSV
+# responses of at least COMPRESSION_MIN_SIZE bytes with brotli (when the
+# brotli package is installed) or gzip
+EMPLOYEES_COMPRESSION = {
+    'MIN_SIZE': config('COMPRESSION_MIN_SIZE', default=1024, cast=int),
+    'GZIP_LEVEL': config('COMPRESSION_GZIP_LEVEL', default=5, cast=int),
+    'BROTLI_QUALITY': config('COMPRESSION_BROTLI_QUALITY', default=4, cast=int),
+}
+
+# Background jobs (employees.jobs) queued through /api/reports/ and run by
+# `manage.py run_workers`. The jobs table is the queue; file results (exports)
+# go to the JOB_RESULT_STORAGE alias of STORAGES.
+EMPLOYEES_JOBS = {
+    'MAX_ATTEMPTS': config('JOB_MAX_ATTEMPTS', default=3, cast=int),
+    'RETRY_DELAY': config('JOB_RETRY_DELAY', default=30, cast=int),
+    'POLL_INTERVAL': config('JOB_POLL_INTERVAL', default=1.0, cast=float),
+    'STALE_AFTER': config('JOB_STALE_AFTER', default=300, cast=int),
+    'RESULT_STORAGE': config('JOB_RESULT_STORAGE', default='default'),
+}
+
+# Change log behind /api/changes/ (employees.changes). `manage.py
+# compact_changes` (or a compact_changes job) drops entries older than
+# CHANGE_RETENTION_DAYS; clients with an older cursor get 410 and reload.
+EMPLOYEES_CHANGES = {
+    'RETENTION_DAYS': config('CHANGE_RETENTION_DAYS', default=30, cast=int),
+}
+
+# Server-sent events at /api/events/ (employees.events, served by asgi.py
+# only). Each process reads the change log every EVENTS_POLL_INTERVAL
+# seconds for all of its connected clients.
+EMPLOYEES_EVENTS = {
+    'POLL_INTERVAL': config('EVENTS_POLL_INTERVAL', default=1.0, cast=float),
+    'HEARTBEAT': config('EVENTS_HEARTBEAT', default=15, cast=int),
+    'MAX_CONNECTIONS': config('EVENTS_MAX_CONNECTIONS', default=10000, cast=int),
+}
+
+# Token bucket rate limits per endpoint and client, and concurrency limits
+# that turn away expensive requests with 503 instead of queuing them
+# (employees.throttling). Rates are 'N/period': bursts of N, refilled at N
+# per period. Keys are viewset actions ('performancereview.create') or URL
+# names ('login'); 'write' and 'read' cover the rest. THROTTLE_BACKEND=shared
+# keeps the buckets in the default cache for all workers.
+EMPLOYEES_THROTTLING = {
+    'BACKEND': config('THROTTLE_BACKEND', default='local'),
+    'RATES': {
+        'login': config('THROTTLE_LOGIN_RATE', default='10/min'),
+        'signup': config('THROTTLE_SIGNUP_RATE', default='5/hour'),
+        'employee.bulk': config('THROTTLE_BULK_RATE', default='10/min'),
+        'performancereview.bulk': config('THROTTLE_BULK_RATE', default='10/min'),
+        'report.create': config('THROTTLE_REPORT_RATE', default='10/min'),
+        'write': config('THROTTLE_WRITE_RATE', default='120/min'),
+    },
+    'CONCURRENCY': {
+        'employee.statistics': config('STATISTICS_CONCURRENCY', default=4, cast=int),
+        'performancereview.statistics': config('STATISTICS_CONCURRENCY', default=4, cast=int),
+        'performancereview.trends': config('STATISTICS_CONCURRENCY', default=4, cast=int),
+        'employee.leaderboard': config('STATISTICS_CONCURRENCY', default=4, cast=int),
+        'employee.export': config('EXPORT_CONCURRENCY', default=2, cast=int),
+        'performancereview.export': config('EXPORT_CONCURRENCY', default=2, cast=int),
+    },
+    'RETRY_AFTER': config('THROTTLE_RETRY_AFTER', default=5, cast=int),
+}
+
+# SESSION_BACKEND=signed_cookies keeps sessions in the signed cookie, and
+# cached_db reads them through the default cache. With either of them and
+# RESPONSE_CACHE_BACKEND=shared, /api/auth/user/ runs no query: it answers
+# from the user snapshot that login stores in the session
+# (employees.auth_views). The snapshot stays valid until a user is edited,
+# which every worker learns from the shared data versions. The per-process
+# 'lru' backend cannot tell the other workers, so it disables snapshots.
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + config('SESSION_BACKEND', default='db')
+
+# PASSWORD_ITERATIONS lowers the PBKDF2 cost for load tests only
+# (employees.hashers); 0 keeps Django's default
+PASSWORD_HASHERS = [
+    'employees.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+EMPLOYEES_AUTH = {
+    'PASSWORD_ITERATIONS': config('PASSWORD_ITERATIONS', default=0, cast=int),
+}
+
+# Versioned response cache for departments, periods and statistics.
+# 'lru' keeps entries in-process; 'shared' uses a CACHES alias so every
+# worker sees the same data versions.
+if config('RESPONSE_CACHE_BACKEND', default='lru') == 'shared':
+    EMPLOYEES_RESPONSE_CACHE = {
+        'BACKEND': 'shared',
+        'ALIAS': config('RESPONSE_CACHE_ALIAS', default='default'),
+    }
+else:
+    EMPLOYEES_RESPONSE_CACHE = {
+        'BACKEND': 'lru',
+        'MAX_ENTRIES': config('RESPONSE_CACHE_MAX_ENTRIES', default=1024, cast=int),
+    }
+
+# Per-request metrics recorded by employees.middleware.RequestMetricsMiddleware
+# (add it near the top of MIDDLEWARE) and served at /api/metrics/ to staff
+# users or to scrapers sending "Authorization: Bearer <METRICS_TOKEN>".
+# Requests slower than SLOW_REQUEST_MS are logged to employees.requests with
+# their slowest and most repeated SQL.
+EMPLOYEES_METRICS = {
+    'SLOW_REQUEST_MS': config('SLOW_REQUEST_MS', default=500, cast=int),
+    'TOKEN': config('METRICS_TOKEN', default=''),
 }
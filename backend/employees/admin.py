@@ -4,18 +4,84 @@ from django.contrib import admin
 # employees/admin.py
 
 from django.contrib import admin
-from .models import Employee, PerformanceReview
+from django.db.models import Q
+from . import jobs, search
+from .models import Employee, Job, PerformanceReview
+
+
+class IndexedSearchMixin:
+    """Answer the changelist search box from the search index instead of icontains scans"""
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(self.search_filter(search_term)), False
+
+    def search_filter(self, search_term):
+        raise NotImplementedError
+
+
+class AverageRatingFilter(admin.SimpleListFilter):
+    """Ranges of the stored Employee.average_rating (employee_rating_idx)"""
+    title = 'average rating'
+    parameter_name = 'average_rating'
+    RANGES = {
+        '4': ('4 and above', Q(average_rating__gte=4)),
+        '3': ('3 to 4', Q(average_rating__gte=3, average_rating__lt=4)),
+        '0': ('Below 3', Q(average_rating__lt=3)),
+        'none': ('No reviews', Q(average_rating__isnull=True)),
+    }
+
+    def lookups(self, request, model_admin):
+        return [(value, label) for value, (label, _) in self.RANGES.items()]
+
+    def queryset(self, request, queryset):
+        if self.value() in self.RANGES:
+            return queryset.filter(self.RANGES[self.value()][1])
+        return queryset
+
 
 @admin.register(Employee)
-class EmployeeAdmin(admin.ModelAdmin):
-    list_display = ['full_name', 'email', 'department', 'date_of_joining']
-    list_filter = ['department', 'date_of_joining']
+class EmployeeAdmin(IndexedSearchMixin, admin.ModelAdmin):
+    list_display = [
+        'full_name', 'email', 'department', 'date_of_joining',
+        'reviews_count', 'average_rating', 'latest_review_period',
+    ]
+    list_filter = ['department', 'date_of_joining', AverageRatingFilter]
     search_fields = ['first_name', 'last_name', 'email']
     ordering = ['last_name', 'first_name']
 
+    def search_filter(self, search_term):
+        return Q(pk__in=search.matching_ids(search_term, search.EMPLOYEE))
+
 @admin.register(PerformanceReview)
-class PerformanceReviewAdmin(admin.ModelAdmin):
+class PerformanceReviewAdmin(IndexedSearchMixin, admin.ModelAdmin):
     list_display = ['employee', 'review_period', 'rating', 'review_date']
     list_filter = ['rating', 'review_period', 'review_date']
     search_fields = ['employee__first_name', 'employee__last_name', 'review_period']
-    ordering = ['-review_date']
\ No newline at end of file
+    ordering = ['-review_date']
+
+    def search_filter(self, search_term):
+        # Reviews match on their own feedback and period, or on their employee
+        return (
+            Q(pk__in=search.matching_ids(search_term, search.REVIEW))
+            | Q(employee_id__in=search.matching_ids(search_term, search.EMPLOYEE))
+        )
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'progress', 'attempts', 'created_by', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    ordering = ['-id']
+    actions = ['cancel_jobs']
+    # Written by employees.jobs only
+    readonly_fields = [field.name for field in Job._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Cancel selected jobs')
+    def cancel_jobs(self, request, queryset):
+        cancelled = sum(jobs.cancel(job) for job in queryset)
+        self.message_user(request, f'Cancelled or stopping {cancelled} jobs')
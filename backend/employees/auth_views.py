@@ -1,14 +1,68 @@
 # employees/auth_views.py
 
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, authentication_classes, permission_classes, throttle_classes
+from rest_framework.exceptions import ParseError
 from rest_framework.permissions import AllowAny , IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
-from django.contrib.auth import authenticate, login, logout
+from django.contrib.auth import SESSION_KEY, authenticate, get_user, login, logout
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.middleware.csrf import get_token
-import json
+
+from . import cache
+from .throttling import TokenBucketThrottle
+
+# login and signup keep a snapshot of the user in the session, which lets
+# check_auth answer without loading the User row. The snapshot holds while
+# the User data version (employees.cache) is unchanged. Editing, deleting or
+# changing the password of any user bumps it, and the next check reloads the
+# user and verifies the session again. With SESSION_BACKEND=signed_cookies or
+# cached_db the session itself is not read from the database either.
+#
+# A bump must reach every worker, so snapshots are only used with the shared
+# response cache backend (RESPONSE_CACHE_BACKEND=shared). With the per-process
+# 'lru' backend check_auth always loads the user.
+SNAPSHOT_KEY = '_employees_user'
+
+
+def snapshots_enabled():
+    return cache.get_backend().shared
+
+
+def user_payload(user):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'is_staff': user.is_staff,
+        'is_superuser': user.is_superuser,
+    }
+
+
+def remember_user(request, user):
+    """Store the snapshot check_auth answers from"""
+    if not snapshots_enabled():
+        return
+    request.session[SNAPSHOT_KEY] = {'version': cache.get_version(User)['token'], 'user': user_payload(user)}
+
+
+def remembered_user(request):
+    """The session's snapshot if it is still current, else None"""
+    if not snapshots_enabled():
+        return None
+    snapshot = request.session.get(SNAPSHOT_KEY)
+    if (
+        snapshot is None
+        or str(snapshot['user']['id']) != str(request.session.get(SESSION_KEY))
+        or snapshot['version'] != cache.get_version(User)['token']
+    ):
+        return None
+    return snapshot['user']
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -20,10 +74,11 @@ def get_csrf_token(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([TokenBucketThrottle])
 def signup_view(request):
     """Register a new user"""
     try:
-        data = json.loads(request.body)
+        data = request.data
         username = data.get('username')
         email = data.get('email')
         password = data.get('password')
@@ -36,46 +91,47 @@ def signup_view(request):
                 'error': 'Username, email, and password are required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Check if username already exists
-        if User.objects.filter(username=username).exists():
+        # Username and email taken, checked in one query
+        taken = list(
+            User.objects.filter(Q(username=username) | Q(email=email)).values_list('username', flat=True)[:2]
+        )
+        if username in taken:
             return Response({
                 'error': 'Username already exists'
             }, status=status.HTTP_400_BAD_REQUEST)
-        
-        # Check if email already exists
-        if User.objects.filter(email=email).exists():
+        if taken:
             return Response({
                 'error': 'Email already exists'
             }, status=status.HTTP_400_BAD_REQUEST)
         
         # Create the user
-        user = User.objects.create_user(
-            username=username,
-            email=email,
-            password=password,
-            first_name=first_name,
-            last_name=last_name
-        )
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    username=username,
+                    email=email,
+                    password=password,
+                    first_name=first_name,
+                    last_name=last_name
+                )
+        except IntegrityError:
+            # Taken by a concurrent signup since the check
+            return Response({
+                'error': 'Username already exists'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
         # Log the user in automatically after signup
         login(request, user)
+        remember_user(request, user)
         
         return Response({
             'success': True,
             'message': 'User created successfully',
-            'user': {
-                'id': user.id,
-                'username': user.username,
-                'email': user.email,
-                'first_name': user.first_name,
-                'last_name': user.last_name,
-                'is_staff': user.is_staff,
-                'is_superuser': user.is_superuser,
-            },
+            'user': user_payload(user),
             'csrfToken': get_token(request)
         }, status=status.HTTP_201_CREATED)
         
-    except json.JSONDecodeError:
+    except ParseError:
         return Response({
             'error': 'Invalid JSON data'
         }, status=status.HTTP_400_BAD_REQUEST)
@@ -87,10 +143,11 @@ def signup_view(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([TokenBucketThrottle])
 def login_view(request):
     """User login"""
     try:
-        data = json.loads(request.body)
+        data = request.data
         username = data.get('username')
         password = data.get('password')
         
@@ -103,17 +160,10 @@ def login_view(request):
         
         if user is not None:
             login(request, user)
+            remember_user(request, user)
             return Response({
                 'success': True,
-                'user': {
-                    'id': user.id,
-                    'username': user.username,
-                    'email': user.email,
-                    'first_name': user.first_name,
-                    'last_name': user.last_name,
-                    'is_staff': user.is_staff,
-                    'is_superuser': user.is_superuser,
-                },
+                'user': user_payload(user),
                 'csrfToken': get_token(request)
             }, status=status.HTTP_200_OK)
         else:
@@ -121,7 +171,7 @@ def login_view(request):
                 'error': 'Invalid credentials'
             }, status=status.HTTP_401_UNAUTHORIZED)
             
-    except json.JSONDecodeError:
+    except ParseError:
         return Response({
             'error': 'Invalid JSON data'
         }, status=status.HTTP_400_BAD_REQUEST)
@@ -141,23 +191,22 @@ def logout_view(request):
     }, status=status.HTTP_200_OK)
 
 @api_view(['GET'])
+# No authentication classes: DRF would load the user before the view runs
+@authentication_classes([])
 @permission_classes([AllowAny])
 def check_auth(request):
     """Check if user is authenticated"""
-    if request.user.is_authenticated:
-        return Response({
-            'authenticated': True,
-            'user': {
-                'id': request.user.id,
-                'username': request.user.username,
-                'email': request.user.email,
-                'first_name': request.user.first_name,
-                'last_name': request.user.last_name,
-                'is_staff': request.user.is_staff,
-                'is_superuser': request.user.is_superuser,
-            }
-        }, status=status.HTTP_200_OK)
-    else:
-        return Response({
-            'authenticated': False
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+    payload = remembered_user(request)
+    if payload is None:
+        # Verifies the session against the user's password hash
+        user = get_user(request)
+        if not user.is_authenticated:
+            return Response({
+                'authenticated': False
+            }, status=status.HTTP_200_OK)
+        remember_user(request, user)
+        payload = user_payload(user)
+    return Response({
+        'authenticated': True,
+        'user': payload
+    }, status=status.HTTP_200_OK)
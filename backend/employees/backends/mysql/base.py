@@ -0,0 +1,17 @@
+# employees/backends/mysql/base.py
+
+"""django.db.backends.mysql with a process-wide connection pool.
+
+Select it with ENGINE 'employees.backends.mysql' and configure the pool with
+the POOL dict of the DATABASES entry (see employees.pool.DEFAULTS).
+"""
+
+from django.db.backends.mysql.base import DatabaseWrapper as MySQLDatabaseWrapper
+
+from employees.pool import PooledDatabaseWrapperMixin
+
+
+class DatabaseWrapper(PooledDatabaseWrapperMixin, MySQLDatabaseWrapper):
+    def check_pooled_connection(self, connection):
+        # A protocol-level ping, no statement to parse
+        connection.ping()
@@ -0,0 +1,110 @@
+# employees/benchmarks.py
+
+"""Helpers shared by the benchmark management commands."""
+
+import json
+import math
+import statistics
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of samples (fraction between 0 and 1)"""
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    """Latency summary in milliseconds for a list of durations in seconds"""
+    milliseconds = [sample * 1000 for sample in samples]
+    return {
+        'runs': len(milliseconds),
+        'mean_ms': round(statistics.fmean(milliseconds), 3),
+        'p50_ms': round(percentile(milliseconds, 0.50), 3),
+        'p95_ms': round(percentile(milliseconds, 0.95), 3),
+        'p99_ms': round(percentile(milliseconds, 0.99), 3),
+        'max_ms': round(max(milliseconds), 3),
+    }
+
+
+def measure(func, runs, warmup=1):
+    """Run func warmup + runs times; returns (summary with queries and peak KiB, last result)"""
+    result = None
+    for _ in range(warmup):
+        result = func()
+
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - started)
+
+    # Queries and memory are measured on one extra run so their overhead
+    # does not skew the timings
+    with CaptureQueriesContext(connection) as queries:
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    summary = summarize(samples)
+    summary['queries'] = len(queries.captured_queries)
+    summary['peak_kib'] = round(peak / 1024, 1)
+    return summary, result
+
+
+def allowed_host():
+    """A Host header that passes ALLOWED_HOSTS"""
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+def load_results(path):
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def save_results(path, results):
+    with open(path, 'w') as handle:
+        json.dump(results, handle, indent=2, sort_keys=True)
+
+
+def compare(results, baseline, tolerance):
+    """Regressions of results against baseline: slower p95 beyond tolerance or more queries"""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {current['p95_ms']}ms vs baseline {previous['p95_ms']}ms"
+            )
+        if current.get('queries', 0) > previous.get('queries', 0):
+            regressions.append(
+                f"{name}: {current['queries']} queries vs baseline {previous['queries']}"
+            )
+    return regressions
+
+
+def format_table(results, label='endpoint'):
+    header = f"{label:<48} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} {'peak KiB':>10}"
+    lines = [header, '-' * len(header)]
+    for name, row in results.items():
+        lines.append(
+            f"{name:<48} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f} "
+            f"{row.get('queries', 0):>8} {row.get('peak_kib', 0):>10.1f}"
+        )
+    return '\n'.join(lines)
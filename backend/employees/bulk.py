@@ -0,0 +1,415 @@
+# employees/bulk.py
+
+"""Set-based bulk create/update/delete for employees and reviews.
+
+Rows are validated one by one, but every lookup a row needs (related
+employees, existing rows, uniqueness) is loaded with one query per batch.
+Writes go through bulk_create/bulk_update/delete in chunks with the model
+signal handlers suspended; the rollup, search, change log and cache side
+effects are applied once per chunk instead.
+
+In ``atomic`` mode any invalid row rejects the whole request. In ``partial``
+mode valid rows are written and the invalid ones are reported by index.
+"""
+
+from django.db import DatabaseError, transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import cache, changes, search, signals
+from .models import Employee, EmployeeRollup, PerformanceReview
+from .periods import PERIOD_FIELDS
+from .rollups import RollupDelta
+from .serializers import BulkEmployeeSerializer, BulkPerformanceReviewSerializer
+
+ATOMIC = 'atomic'
+PARTIAL = 'partial'
+OPERATIONS = {'POST': 'create', 'PATCH': 'update', 'DELETE': 'delete'}
+OPERATION_COUNTS = {'create': 'created', 'update': 'updated', 'delete': 'deleted'}
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class BulkWriter:
+    model = None
+    serializer_class = None
+    natural_key = []
+    chunk_size = 500
+    max_rows = 50000
+
+    def __init__(self, rows, mode=ATOMIC, chunk_size=None):
+        self.rows = rows
+        self.mode = mode
+        self.chunk_size = chunk_size or self.chunk_size
+        self.errors = {}
+
+    @classmethod
+    def from_request(cls, request):
+        """Accept either a bare list of rows or {"mode": ..., "rows": [...]}"""
+        data = request.data
+        mode = request.query_params.get('mode', ATOMIC)
+        if isinstance(data, dict):
+            mode = data.get('mode', mode)
+            data = data.get('rows')
+        return cls(data, mode=mode)
+
+    def execute(self, operation):
+        """Run create/update/delete and return [(index, pk)] of the rows written"""
+        with transaction.atomic():
+            written = getattr(self, operation)()
+            if self.errors and self.mode == ATOMIC:
+                transaction.set_rollback(True)
+                written = []
+        return written
+
+    def run(self, operation):
+        """execute() for a viewset action, returning the per-row result as a Response"""
+        if not isinstance(self.rows, list):
+            return Response({'error': 'Expected a list of rows'}, status=status.HTTP_400_BAD_REQUEST)
+        if self.mode not in (ATOMIC, PARTIAL):
+            return Response({'error': f'mode must be {ATOMIC!r} or {PARTIAL!r}'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(self.rows) > self.max_rows:
+            return Response({'error': f'At most {self.max_rows} rows per request'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            written = self.execute(operation)
+        except DatabaseError as e:
+            return Response({
+                'mode': self.mode,
+                'errors': [{'index': None, 'errors': {'non_field_errors': [str(e)]}}],
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if self.errors and not written:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif self.errors:
+            response_status = status.HTTP_207_MULTI_STATUS
+        elif operation == 'create':
+            response_status = status.HTTP_201_CREATED
+        else:
+            response_status = status.HTTP_200_OK
+        return Response({
+            'mode': self.mode,
+            OPERATION_COUNTS[operation]: len(written),
+            'results': [{'index': index, 'id': pk} for index, pk in written],
+            'errors': [
+                {'index': index, 'errors': errors}
+                for index, errors in sorted(self.errors.items())
+            ],
+        }, status=response_status)
+
+    # ------------------------------
+    # Validation
+    # ------------------------------
+
+    def preload(self, instances):
+        """Objects for PreloadedPrimaryKeyRelatedField, keyed by field name then pk"""
+        return {}
+
+    def validate(self, instances=None):
+        """Return [(index, instance, validated_data)] for the rows that pass the serializer"""
+        context = {'preloaded': self.preload(instances)}
+        valid = []
+        for index, row in enumerate(self.rows):
+            if not isinstance(row, dict):
+                self.errors[index] = {'non_field_errors': ['Expected an object']}
+                continue
+            instance = None
+            if instances is not None:
+                instance = instances.get(self.row_pk(row))
+                if instance is None:
+                    self.errors[index] = {'id': ['Not found']}
+                    continue
+            serializer = self.serializer_class(
+                instance, data=row, partial=instance is not None, context=context
+            )
+            if serializer.is_valid():
+                valid.append((index, instance, serializer.validated_data))
+            else:
+                self.errors[index] = serializer.errors
+        return valid
+
+    def check_unique(self, valid):
+        """Drop rows that would violate a unique constraint, recording their errors"""
+        return valid
+
+    def row_pk(self, row):
+        value = row.get('id') if isinstance(row, dict) else row
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def load_instances(self):
+        ids = [self.row_pk(row) for row in self.rows]
+        return self.model.objects.in_bulk([pk for pk in ids if pk is not None])
+
+    def write_chunks(self, items, write):
+        """Run write(chunk) per chunk; in partial mode a failing chunk only fails its rows"""
+        written = []
+        for chunk in chunked(items, self.chunk_size):
+            try:
+                with transaction.atomic(), signals.suspended():
+                    changes.lock()
+                    write(chunk)
+            except DatabaseError as e:
+                if self.mode == ATOMIC:
+                    raise
+                for item in chunk:
+                    self.errors[item[0]] = {'non_field_errors': [str(e)]}
+                continue
+            written.extend(chunk)
+        return written
+
+    # ------------------------------
+    # Operations
+    # ------------------------------
+
+    def create(self):
+        valid = self.check_unique(self.validate())
+        if self.errors and self.mode == ATOMIC:
+            return []
+        items = [(index, self.model(**data)) for index, _, data in valid]
+        written = self.write_chunks(items, self.write_create)
+        cache.bump_version(*self.invalidates)
+        return [(index, obj.pk) for index, obj in written]
+
+    def update(self):
+        valid = self.check_unique(self.validate(self.load_instances()))
+        if self.errors and self.mode == ATOMIC:
+            return []
+        written = self.write_chunks(valid, self.write_update)
+        cache.bump_version(*self.invalidates)
+        return [(index, instance.pk) for index, instance, _ in written]
+
+    def delete(self):
+        ids = []
+        for index, row in enumerate(self.rows):
+            pk = self.row_pk(row)
+            if pk is None:
+                self.errors[index] = {'id': ['A valid integer is required.']}
+            else:
+                ids.append((index, pk))
+        existing = set(self.model.objects.filter(pk__in=[pk for _, pk in ids]).values_list('pk', flat=True))
+        found = []
+        for index, pk in ids:
+            if pk in existing:
+                found.append((index, pk))
+            else:
+                self.errors[index] = {'id': ['Not found']}
+        if self.errors and self.mode == ATOMIC:
+            return []
+        written = self.write_chunks(found, self.write_delete)
+        cache.bump_version(*self.invalidates)
+        return written
+
+    def set_pks(self, objects):
+        """bulk_create leaves pk unset without RETURNING support (MySQL); look them up by natural key"""
+        missing = [obj for obj in objects if obj.pk is None]
+        if not missing:
+            return
+        fields = self.natural_key
+        lookups = {f'{field}__in': {getattr(obj, field) for obj in missing} for field in fields}
+        pks = {
+            tuple(row[:-1]): row[-1]
+            for row in self.model.objects.filter(**lookups).values_list(*fields, 'pk')
+        }
+        for obj in missing:
+            obj.pk = pks[tuple(getattr(obj, field) for field in fields)]
+
+    def derived_fields(self, instance, data):
+        """Update fields computed from data on instance; returns their names"""
+        return []
+
+    def write_update(self, chunk):
+        fields = set()
+        for _, instance, data in chunk:
+            for field, value in data.items():
+                setattr(instance, field, value)
+            fields.update(data)
+            fields.update(self.derived_fields(instance, data))
+        if fields:
+            self.model.objects.bulk_update([instance for _, instance, _ in chunk], list(fields))
+
+
+class ReviewBulkWriter(BulkWriter):
+    model = PerformanceReview
+    serializer_class = BulkPerformanceReviewSerializer
+    invalidates = [PerformanceReview]
+    natural_key = ['employee_id', 'review_period']
+
+    def load_instances(self):
+        ids = [self.row_pk(row) for row in self.rows]
+        return PerformanceReview.objects.select_related('employee').in_bulk(
+            [pk for pk in ids if pk is not None]
+        )
+
+    def preload(self, instances):
+        # Converted before hashing: a list or object is left to the serializer to reject
+        ids = {self.row_pk(row.get('employee')) for row in self.rows if isinstance(row, dict)} - {None}
+        employees = Employee.objects.only('id', 'department', 'first_name', 'last_name').in_bulk(ids)
+        return {'employee': employees}
+
+    def check_unique(self, valid):
+        keys = {}
+        for index, instance, data in valid:
+            employee = data.get('employee', instance.employee if instance else None)
+            period = data.get('review_period', instance.review_period if instance else None)
+            keys[index] = (employee.pk, period)
+
+        updating = [instance.pk for _, instance, _ in valid if instance is not None]
+        taken = set(
+            PerformanceReview.objects.filter(
+                employee_id__in={key[0] for key in keys.values()},
+                review_period__in={key[1] for key in keys.values()},
+            ).exclude(pk__in=updating).values_list('employee_id', 'review_period')
+        )
+
+        unique = []
+        for item in valid:
+            index = item[0]
+            if keys[index] in taken:
+                self.errors[index] = {
+                    'non_field_errors': ['The fields employee, review_period must make a unique set.']
+                }
+                continue
+            taken.add(keys[index])
+            unique.append(item)
+        return unique
+
+    def write_create(self, chunk):
+        reviews = [review for _, review in chunk]
+        for review in reviews:
+            review.set_period_fields()
+        PerformanceReview.objects.bulk_create(reviews)
+        self.set_pks(reviews)
+        delta = RollupDelta()
+        for review in reviews:
+            delta.add_review(review.employee_id, review.employee.department, review.review_period, review.rating)
+        delta.apply()
+        search.index_reviews(reviews, new=True)
+        changes.record(
+            changes.upserts(changes.REVIEW, [review.pk for review in reviews])
+            + changes.upserts(changes.EMPLOYEE, [review.employee_id for review in reviews])
+        )
+
+    def derived_fields(self, instance, data):
+        if 'review_period' not in data:
+            return []
+        instance.set_period_fields()
+        return PERIOD_FIELDS
+
+    def write_update(self, chunk):
+        delta = RollupDelta()
+        employee_ids = []
+        for _, review, _ in chunk:
+            delta.add_review(review.employee_id, review.employee.department, review.review_period, review.rating, count=-1)
+            employee_ids.append(review.employee_id)
+        super().write_update(chunk)
+        for _, review, _ in chunk:
+            delta.add_review(review.employee_id, review.employee.department, review.review_period, review.rating)
+            employee_ids.append(review.employee_id)
+        delta.apply()
+        search.index_reviews([review for _, review, _ in chunk])
+        changes.record(
+            changes.upserts(changes.REVIEW, [review.pk for _, review, _ in chunk])
+            + changes.upserts(changes.EMPLOYEE, employee_ids)
+        )
+
+    def write_delete(self, chunk):
+        ids = [pk for _, pk in chunk]
+        reviews = PerformanceReview.objects.filter(pk__in=ids)
+        delta = RollupDelta()
+        employee_ids = []
+        for review in reviews.values_list('employee_id', 'employee__department', 'review_period', 'rating'):
+            delta.add_review(*review, count=-1)
+            employee_ids.append(review[0])
+        reviews.delete()
+        delta.apply()
+        search.remove(search.REVIEW, ids)
+        changes.record(changes.deletes(changes.REVIEW, ids) + changes.upserts(changes.EMPLOYEE, employee_ids))
+
+
+class EmployeeBulkWriter(BulkWriter):
+    model = Employee
+    serializer_class = BulkEmployeeSerializer
+    invalidates = [Employee, PerformanceReview]
+    natural_key = ['email']
+
+    def check_unique(self, valid):
+        emails = {}
+        for index, instance, data in valid:
+            emails[index] = data.get('email', instance.email if instance else None)
+
+        owners = dict(
+            Employee.objects.filter(email__in=set(emails.values())).values_list('email', 'pk')
+        )
+        unique = []
+        for index, instance, data in valid:
+            email = emails[index]
+            owner = owners.get(email)
+            if owner is not None and (instance is None or owner != instance.pk):
+                self.errors[index] = {'email': ['employee with this email already exists.']}
+                continue
+            owners[email] = instance.pk if instance else -index - 1
+            unique.append((index, instance, data))
+        return unique
+
+    def write_create(self, chunk):
+        employees = [employee for _, employee in chunk]
+        Employee.objects.bulk_create(employees)
+        self.set_pks(employees)
+        delta = RollupDelta()
+        for employee in employees:
+            delta.add_employee(employee.department)
+        delta.apply()
+        search.index_employees(employees, new=True)
+        changes.record(changes.upserts(changes.EMPLOYEE, [employee.pk for employee in employees]))
+
+    def write_update(self, chunk):
+        previous = {instance.pk: instance.department for _, instance, _ in chunk}
+        super().write_update(chunk)
+        search.index_employees([instance for _, instance, _ in chunk])
+        changes.record(changes.upserts(changes.EMPLOYEE, [instance.pk for _, instance, _ in chunk]))
+        moved = {
+            instance.pk: instance.department
+            for _, instance, _ in chunk
+            if instance.department != previous[instance.pk]
+        }
+        if not moved:
+            return
+        delta = RollupDelta()
+        for pk, department in moved.items():
+            delta.add_employee(previous[pk], count=-1)
+            delta.add_employee(department)
+        reviews = PerformanceReview.objects.filter(employee_id__in=moved).values_list(
+            'employee_id', 'review_period', 'rating'
+        )
+        for employee_id, review_period, rating in reviews:
+            delta.add_review(employee_id, previous[employee_id], review_period, rating, count=-1)
+            delta.add_review(employee_id, moved[employee_id], review_period, rating)
+        delta.apply()
+        for department in set(moved.values()):
+            EmployeeRollup.objects.filter(
+                employee_id__in=[pk for pk, new in moved.items() if new == department]
+            ).update(department=department)
+
+    def write_delete(self, chunk):
+        ids = [pk for _, pk in chunk]
+        delta = RollupDelta()
+        departments = dict(Employee.objects.filter(pk__in=ids).values_list('pk', 'department'))
+        for department in departments.values():
+            delta.add_employee(department, count=-1)
+        reviews = PerformanceReview.objects.filter(employee_id__in=ids).values_list(
+            'pk', 'employee_id', 'review_period', 'rating'
+        )
+        review_ids = []
+        for review_id, employee_id, review_period, rating in reviews:
+            delta.add_review(employee_id, departments[employee_id], review_period, rating, count=-1)
+            review_ids.append(review_id)
+        # Apply first: the employees' own rollup rows go away with the cascade
+        delta.apply()
+        Employee.objects.filter(pk__in=ids).delete()
+        changes.record(changes.deletes(changes.REVIEW, review_ids) + changes.deletes(changes.EMPLOYEE, ids))
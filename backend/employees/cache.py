@@ -0,0 +1,260 @@
+# employees/cache.py
+
+"""Versioned response cache for read-mostly endpoints.
+
+Each cached action declares the models it depends on. Every write to one of
+those models replaces the model's data version once the transaction commits,
+so cache keys built from the current versions never hit stale entries and
+no TTL is needed. The version also drives the ETag and Last-Modified headers,
+which lets clients revalidate with a 304 before anything is computed.
+Responses read from a replica that may still lag behind the latest version
+are served but not stored (see employees.replicas).
+
+Two backends are available through settings.EMPLOYEES_RESPONSE_CACHE:
+
+* ``lru`` (default): an in-process LRU. Versions live in the process too, so
+  use it with a single process or when per-process staleness is acceptable.
+* ``shared``: a Django cache alias (Redis, Memcached, ...) shared by every
+  worker, which also shares the versions.
+"""
+
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import replicas
+
+KEY_PREFIX = 'employees'
+
+
+class LocalLRUBackend:
+    """Thread-safe in-process LRU of at most max_entries responses"""
+
+    # Versions bumped in one worker are not seen by the others
+    shared = False
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_version(self, label):
+        with self._lock:
+            return self._versions.get(label)
+
+    def set_version(self, label, version):
+        with self._lock:
+            self._versions[label] = version
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+class SharedCacheBackend:
+    """Stores responses and versions in a Django cache shared by all workers"""
+
+    shared = True
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, value):
+        self.cache.set(key, value, timeout=None)
+
+    def get_version(self, label):
+        return self.cache.get(f'{KEY_PREFIX}:version:{label}')
+
+    def set_version(self, label, version):
+        self.cache.set(f'{KEY_PREFIX}:version:{label}', version, timeout=None)
+
+    def clear(self):
+        self.cache.clear()
+
+
+BACKENDS = {
+    'lru': LocalLRUBackend,
+    'shared': SharedCacheBackend,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                options = dict(getattr(settings, 'EMPLOYEES_RESPONSE_CACHE', {}))
+                backend_class = BACKENDS[options.pop('BACKEND', 'lru')]
+                _backend = backend_class(**{key.lower(): value for key, value in options.items()})
+    return _backend
+
+
+def reset_backend():
+    """Drop the configured backend (and its contents); used by tests and settings changes"""
+    global _backend
+    with _backend_lock:
+        if _backend is not None:
+            _backend.clear()
+        _backend = None
+
+
+# ==============================
+# Data versions
+# ==============================
+
+def _label(model):
+    return model._meta.label_lower
+
+
+def _new_version(previous=None):
+    # Last-Modified has one second resolution; keep it strictly increasing so
+    # If-Modified-Since never matches a version it has not seen
+    modified = int(time.time())
+    if previous is not None:
+        modified = max(modified, previous['modified'] + 1)
+    return {'token': uuid.uuid4().hex, 'modified': modified}
+
+
+def get_version(model):
+    backend = get_backend()
+    version = backend.get_version(_label(model))
+    if version is None:
+        version = _new_version()
+        backend.set_version(_label(model), version)
+    return version
+
+
+def bump_version(*models):
+    """Invalidate every cached response depending on models once the transaction commits"""
+    def bump():
+        backend = get_backend()
+        for model in models:
+            label = _label(model)
+            backend.set_version(label, _new_version(backend.get_version(label)))
+    transaction.on_commit(bump)
+
+
+# ==============================
+# View decorator
+# ==============================
+
+def not_modified(request, etag, last_modified):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        # Weak comparison: CompressionMiddleware sends W/"..." for compressed bodies
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return etag in tags or if_none_match.strip() == '*'
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return if_modified_since is not None and last_modified <= if_modified_since
+
+
+def validators(request, models):
+    """(cache digest, ETag, Last-Modified timestamp) of request under the current versions of models"""
+    versions = [get_version(model) for model in models]
+    key = '|'.join(
+        [KEY_PREFIX, request.path, request.META.get('QUERY_STRING', '')]
+        + [version['token'] for version in versions]
+    )
+    digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+    return digest, f'"{digest}"', max(version['modified'] for version in versions)
+
+
+def validator_headers(etag, last_modified):
+    return {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+        'Cache-Control': 'private, no-cache',
+    }
+
+
+def get_cached(digest):
+    return get_backend().get(f'{KEY_PREFIX}:response:{digest}')
+
+
+def set_cached(digest, data):
+    get_backend().set(f'{KEY_PREFIX}:response:{digest}', data)
+
+
+def cached_response(*models):
+    """Cache a read-only action's response data keyed on the data versions of models"""
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            digest, etag, last_modified = validators(request, models)
+            headers = validator_headers(etag, last_modified)
+
+            if not_modified(request, etag, last_modified):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+            data = get_cached(digest)
+            if data is not None:
+                return Response(data, headers=headers)
+
+            response = view_method(self, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK and not replicas.may_be_stale(last_modified):
+                set_cached(digest, response.data)
+                for header, value in headers.items():
+                    response[header] = value
+            return response
+        return wrapper
+    return decorator
+
+
+def cached_page(*models):
+    """Cache a GET view's rendered HTML per query string, keyed on the data versions of models"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view(request, *args, **kwargs)
+            digest, etag, last_modified = validators(request, models)
+            headers = validator_headers(etag, last_modified)
+
+            if not_modified(request, etag, last_modified):
+                return HttpResponseNotModified(headers=headers)
+
+            content = get_cached(digest)
+            if content is not None:
+                return HttpResponse(content, headers=headers)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not replicas.may_be_stale(last_modified):
+                set_cached(digest, response.content)
+                for header, value in headers.items():
+                    response[header] = value
+            return response
+        return wrapper
+    return decorator
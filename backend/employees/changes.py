@@ -0,0 +1,191 @@
+# employees/changes.py
+
+"""Change log of employees and reviews, and the delta feed behind /api/changes/.
+
+Every write of an Employee or PerformanceReview appends a Change row in the
+same transaction. This covers saves, deletes, employee cascades and the
+bulk writers. The signal handlers in employees.signals cover single-row
+writes, and the bulk writers record their own changes. A review write also
+logs its employee, whose stored review stats it changes.
+
+A client syncs by cursor. It reads the current cursor, loads the lists in
+full, then asks for everything after the cursor. The feed returns each
+changed object once: its current state ('upsert') or a tombstone
+('delete').
+
+Change ids are the cursor, so they must become visible in order. An
+auto-increment id alone does not ensure that. A transaction that took
+id 10 can commit after one that took id 11, and a reader at cursor 11
+would then never see 10. So every writing transaction first locks the
+ChangeLogState row (in pre_save/pre_delete, before any other row it writes)
+and holds the lock until it commits. Ids are therefore handed out in commit
+order. On SQLite the database write lock already has this effect.
+
+compact() deletes entries superseded by a newer entry for the same object.
+No reader can need those. It also deletes entries older than the retention
+window, and records the last id it removed as compacted_through. A cursor
+before that point may have missed a tombstone, so the feed answers it with
+410 and the client reloads.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from .models import Change, ChangeLogState, Employee, PerformanceReview
+from .serializers import EmployeeListSerializer, PerformanceReviewSerializer
+
+EMPLOYEE = 'employee'
+REVIEW = 'review'
+KINDS = {
+    # kind -> (queryset of current rows, serializer)
+    EMPLOYEE: (lambda: Employee.objects.all(), EmployeeListSerializer),
+    REVIEW: (lambda: PerformanceReview.objects.select_related('employee'), PerformanceReviewSerializer),
+}
+UPSERT = 'upsert'
+DELETE = 'delete'
+STATE_PK = 1
+
+DEFAULT_SETTINGS = {
+    'RETENTION_DAYS': 30,
+    'PAGE_SIZE': 500,
+    'MAX_PAGE_SIZE': 5000,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'EMPLOYEES_CHANGES', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+class CursorExpired(Exception):
+    """The cursor is older than the compacted part of the log"""
+
+
+# ==============================
+# Writing
+# ==============================
+
+def lock():
+    """Hold the change log lock until the current transaction commits (no-op outside one)"""
+    # SQLite serializes write transactions on its own
+    if not connection.in_atomic_block or not connection.features.has_select_for_update:
+        return
+    if not ChangeLogState.objects.select_for_update().filter(pk=STATE_PK).exists():
+        ChangeLogState.objects.get_or_create(pk=STATE_PK)
+
+
+def record(entries):
+    """Append (kind, object_id, op) entries to the log in the current transaction"""
+    entries = list(dict.fromkeys(entries))
+    if not entries:
+        return
+    with transaction.atomic(savepoint=False):
+        lock()
+        Change.objects.bulk_create([
+            Change(kind=kind, object_id=object_id, op=op) for kind, object_id, op in entries
+        ])
+
+
+def upserts(kind, ids):
+    return [(kind, pk, UPSERT) for pk in ids]
+
+
+def deletes(kind, ids):
+    return [(kind, pk, DELETE) for pk in ids]
+
+
+# ==============================
+# Reading
+# ==============================
+
+def current_horizon():
+    """Cursors before this id may have missed compacted entries"""
+    return ChangeLogState.objects.filter(pk=STATE_PK).values_list('compacted_through', flat=True).first() or 0
+
+
+def current_cursor():
+    latest = Change.objects.aggregate(latest=Max('pk'))['latest']
+    return latest if latest is not None else current_horizon()
+
+
+def read(since, limit=None, kinds=None):
+    """(changes, cursor, has_more): the objects changed after cursor since, at most limit log entries"""
+    limit = limit or get_setting('PAGE_SIZE')
+    kinds = list(kinds or KINDS)
+    if since < current_horizon():
+        raise CursorExpired()
+
+    entries = list(
+        Change.objects.filter(pk__gt=since, kind__in=kinds)
+        .order_by('pk').values_list('pk', 'kind', 'object_id', 'op')[:limit + 1]
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    cursor = entries[-1][0] if entries else since
+
+    # The latest entry of each object decides what the client gets
+    latest = {}
+    for pk, kind, object_id, op in entries:
+        latest.pop((kind, object_id), None)
+        latest[(kind, object_id)] = op
+    data = {}
+    for kind in kinds:
+        ids = [object_id for (entry_kind, object_id), op in latest.items() if entry_kind == kind and op == UPSERT]
+        queryset, serializer_class = KINDS[kind]
+        instances = list(queryset().filter(pk__in=ids)) if ids else []
+        for instance, representation in zip(instances, serializer_class(instances, many=True).data):
+            data[(kind, instance.pk)] = representation
+
+    changes = []
+    for key, op in latest.items():
+        kind, object_id = key
+        if op == DELETE:
+            changes.append({'type': kind, 'id': object_id, 'op': DELETE})
+        elif key in data:
+            changes.append({'type': kind, 'id': object_id, 'op': UPSERT, 'data': data[key]})
+        # else: deleted since; its tombstone is further along the log
+    return changes, cursor, has_more
+
+
+# ==============================
+# Compaction
+# ==============================
+
+def compact(retention_days=None, batch_size=5000):
+    """Delete superseded entries and entries past the retention window; returns the number deleted"""
+    retention_days = get_setting('RETENTION_DAYS') if retention_days is None else retention_days
+    deleted = 0
+
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    horizon = Change.objects.filter(created_at__lt=cutoff).aggregate(horizon=Max('pk'))['horizon']
+    if horizon is not None:
+        with transaction.atomic():
+            state, _ = ChangeLogState.objects.select_for_update().get_or_create(pk=STATE_PK)
+            if horizon > state.compacted_through:
+                state.compacted_through = horizon
+                state.save(update_fields=['compacted_through'])
+        while True:
+            ids = list(Change.objects.filter(pk__lte=horizon).values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted += Change.objects.filter(pk__in=ids).delete()[0]
+
+    # Only the newest entry of an object is ever returned; older ones can go.
+    # Entries written after this point are left alone.
+    ceiling = Change.objects.aggregate(ceiling=Max('pk'))['ceiling'] or 0
+    groups = list(
+        Change.objects.filter(pk__lte=ceiling).values_list('kind', 'object_id')
+        .annotate(latest=Max('pk'), entries=Count('pk')).filter(entries__gt=1).order_by()
+    )
+    for start in range(0, len(groups), batch_size):
+        for kind in KINDS:
+            chunk = [group for group in groups[start:start + batch_size] if group[0] == kind]
+            if not chunk:
+                continue
+            deleted += Change.objects.filter(
+                kind=kind, object_id__in=[object_id for _, object_id, _, _ in chunk], pk__lte=ceiling
+            ).exclude(pk__in=[latest for _, _, latest, _ in chunk]).delete()[0]
+    return deleted
@@ -0,0 +1,192 @@
+# employees/compression.py
+
+"""Negotiated brotli/gzip compression for API responses and exports.
+
+Large JSON pages and CSV/NDJSON exports compress about ten to one. On
+anything but a local network the transfer then takes longer than producing
+the body. CompressionMiddleware picks the best encoding the client accepts.
+It prefers brotli, which needs the optional ``brotli`` package, and falls
+back to gzip. It compresses:
+
+* whole responses of at least MIN_SIZE bytes;
+* streaming responses (exports), chunk by chunk, flushing after every
+  chunk so rows keep arriving as they are produced.
+
+Only CONTENT_TYPES are compressed. HTML pages are left out because they
+carry the CSRF token, and compressing a secret next to reflected input
+leaks it (BREACH). Use Django's GZipMiddleware for those; it pads against
+BREACH. Strong ETags become weak, as the compressed bytes differ;
+employees.cache compares If-None-Match weakly.
+
+Compression levels favour speed, as every response is compressed on the
+fly. Settings are read from settings.EMPLOYEES_COMPRESSION (see
+DEFAULT_SETTINGS).
+"""
+
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_SETTINGS = {
+    # Smaller bodies gain little and cost a compressor each
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 5,
+    'BROTLI_QUALITY': 4,
+    # Content-Type prefixes to compress
+    'CONTENT_TYPES': ['application/json', 'application/x-ndjson', 'text/csv'],
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'EMPLOYEES_COMPRESSION', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+class GzipCompressor:
+    name = 'gzip'
+
+    def __init__(self):
+        # wbits 16 + MAX_WBITS writes the gzip header and trailer
+        self._compressor = zlib.compressobj(get_setting('GZIP_LEVEL'), zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def process(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliCompressor:
+    name = 'br'
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=get_setting('BROTLI_QUALITY'))
+
+    def process(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def available_compressors():
+    """Supported encodings, most preferred first"""
+    compressors = [GzipCompressor]
+    if brotli is not None:
+        compressors.insert(0, BrotliCompressor)
+    return compressors
+
+
+def negotiate(accept_encoding):
+    """The compressor class for the best encoding an Accept-Encoding header allows, or None"""
+    qualities = {}
+    for item in (accept_encoding or '').split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+
+    best, best_quality = None, 0.0
+    for compressor in available_compressors():
+        quality = qualities.get(compressor.name, qualities.get('*', 0.0))
+        # Ties go to the earlier, preferred encoding
+        if quality > best_quality:
+            best, best_quality = compressor, quality
+    return best
+
+
+def compressible(response):
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return (
+        200 <= response.status_code < 300 and response.status_code != 204
+        and not response.has_header('Content-Encoding')
+        and not response.has_header('Content-Range')
+        and any(content_type.startswith(prefix) for prefix in get_setting('CONTENT_TYPES'))
+    )
+
+
+def compress_chunks(compressor, chunks):
+    for chunk in chunks:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def acompress_chunks(compressor, chunks):
+    async for chunk in chunks:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """Compress eligible responses with the client's preferred encoding; place after RequestMetricsMiddleware"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return self.compress(request, response)
+
+    def compress(self, request, response):
+        if not compressible(response):
+            return response
+        if not response.streaming and len(response.content) < get_setting('MIN_SIZE'):
+            return response
+        patch_vary_headers(response, ['Accept-Encoding'])
+        compressor_class = negotiate(request.META.get('HTTP_ACCEPT_ENCODING'))
+        if compressor_class is None:
+            return response
+
+        compressor = compressor_class()
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = acompress_chunks(compressor, response.streaming_content)
+            else:
+                response.streaming_content = compress_chunks(compressor, response.streaming_content)
+            del response['Content-Length']
+        else:
+            compressed = compressor.process(response.content) + compressor.finish()
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+        response['Content-Encoding'] = compressor_class.name
+        return response
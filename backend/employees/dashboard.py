@@ -0,0 +1,110 @@
+# employees/dashboard.py
+
+"""Read-only aggregates behind the statistics actions and /api/dashboard/.
+
+Each section is a plain sync function so the DRF actions can call it
+directly. collect() runs the sections concurrently for the async dashboard
+view: every section executes in its own worker thread with its own database
+connection, so the slowest query rather than the sum of all of them sets
+the response time, and the event loop stays free for other requests.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from .models import DepartmentRollup, Employee, PerformanceReview
+from .periods import sort_key
+from .rollups import TOTAL_PERIOD
+from .serializers import EmployeeListSerializer, PerformanceReviewSerializer
+
+RECENT_LIMIT = 5
+
+
+def department_names():
+    # One rollup total row per department instead of DISTINCT over employees
+    departments = DepartmentRollup.objects.filter(
+        review_period=TOTAL_PERIOD, employee_count__gt=0
+    ).exclude(department='').order_by('department').values_list('department', flat=True)
+    return list(departments)
+
+
+def employee_statistics():
+    # Department totals are maintained incrementally in DepartmentRollup
+    department_totals = DepartmentRollup.objects.filter(review_period=TOTAL_PERIOD)
+    total_employees = sum(rollup.employee_count for rollup in department_totals)
+    departments = sorted(
+        (
+            {'department': rollup.department, 'count': rollup.employee_count}
+            for rollup in department_totals
+            if rollup.department and rollup.employee_count > 0
+        ),
+        key=lambda row: -row['count']
+    )
+    return {
+        'total_employees': total_employees,
+        'departments': list(departments),
+    }
+
+
+def review_periods():
+    # Rollup rows exist per department and period; far fewer than reviews
+    periods = DepartmentRollup.objects.filter(
+        review_count__gt=0
+    ).exclude(review_period=TOTAL_PERIOD).order_by('review_period').values_list('review_period', flat=True).distinct()
+    # Chronological, not lexical: "Q4 2023" before "Q1 2024"
+    return sorted(periods, key=sort_key)
+
+
+def review_statistics():
+    # Sum the per-department totals instead of scanning every review
+    totals = DepartmentRollup(review_period=TOTAL_PERIOD)
+    for rollup in DepartmentRollup.objects.filter(review_period=TOTAL_PERIOD):
+        for field in ['review_count', 'rating_sum'] + DepartmentRollup.RATING_FIELDS:
+            setattr(totals, field, getattr(totals, field) + getattr(rollup, field))
+    return {
+        'total_reviews': totals.review_count,
+        'average_rating': totals.average_rating or 0,
+        'rating_distribution': list(totals.rating_distribution()),
+    }
+
+
+def recent_employees(limit=RECENT_LIMIT):
+    """Latest joiners, newest first (employee_joined_idx)"""
+    employees = Employee.objects.all().order_by('-date_of_joining', '-id')[:limit]
+    return EmployeeListSerializer(employees, many=True).data
+
+
+def recent_reviews(limit=RECENT_LIMIT):
+    reviews = PerformanceReview.objects.select_related('employee').order_by('-review_date', '-id')[:limit]
+    return PerformanceReviewSerializer(reviews, many=True).data
+
+
+SECTIONS = {
+    'employee_statistics': employee_statistics,
+    'review_statistics': review_statistics,
+    'departments': department_names,
+    'periods': review_periods,
+    'recent_employees': recent_employees,
+    'recent_reviews': recent_reviews,
+}
+
+
+def _run_section(section):
+    # Worker threads keep their own connections; expire them the way
+    # Django does around a request so CONN_MAX_AGE is honoured
+    close_old_connections()
+    try:
+        return section()
+    finally:
+        close_old_connections()
+
+
+async def collect(sections=SECTIONS):
+    """Run every section concurrently and return {name: result}"""
+    results = await asyncio.gather(*(
+        sync_to_async(_run_section, thread_sensitive=False)(section)
+        for section in sections.values()
+    ))
+    return dict(zip(sections, results))
@@ -0,0 +1,332 @@
+# employees/events.py
+
+"""Server-sent events at /api/events/: live notice of employee and review changes.
+
+The stream is served by EventStreamApp, which asgi.py wraps around Django.
+It runs on the event loop and bypasses Django's request handling. An idle
+connection is an asyncio task waiting on an Event, so one process can hold
+thousands of them without a thread per client. Under wsgi.py the endpoint
+does not exist and clients keep refetching after their own edits.
+
+One Broadcaster per process reads the change log (employees.changes) every
+POLL_INTERVAL seconds and hands new entries to the subscriptions. That is
+one query per interval however many clients are connected. A subscription
+merges what it has not sent yet, so a client gets at most one event per
+wakeup, with each changed object listed once under its latest op:
+
+    id: 1234
+    event: changes
+    data: {"cursor": 1234, "employee": {"upsert": [7]}, "review": {"delete": [90]}}
+
+The events carry ids only. Clients refetch what they show, or pull the
+objects from /api/changes/?since=<their cursor>.
+
+?department=A,B and ?employee=1,2 narrow the stream. A change is sent when
+either filter matches. A tombstone no longer has a department, and a
+deleted review no longer has an employee. Such a change goes to every
+subscription the missing value could have matched, and clients ignore ids
+they do not hold.
+
+On reconnect the browser sends Last-Event-ID. The changes since that id
+are replayed, unless they reach behind the compacted part of the log or
+exceed MAX_REPLAY. In that case the client gets a 'reset' event and
+reloads.
+"""
+
+import asyncio
+import json
+import logging
+import re
+from importlib import import_module
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import aget_user
+from django.http.cookie import parse_cookie
+
+from . import changes
+from .models import Change, Employee, PerformanceReview
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'PATH': '/api/events/',
+    'POLL_INTERVAL': 1.0,
+    'HEARTBEAT': 15,
+    # Milliseconds the browser waits before reconnecting
+    'RETRY': 3000,
+    'MAX_CONNECTIONS': 10000,
+    'MAX_REPLAY': 5000,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'EMPLOYEES_EVENTS', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def format_event(event, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event}', f'data: {json.dumps(data, separators=(",", ":"))}']
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+# ==============================
+# Reading the change log
+# ==============================
+
+def fetch(since, until=None, limit=None):
+    """(cursor, entries, has_more): log entries after since as (kind, id, op, department, employee_id)"""
+    queryset = Change.objects.filter(pk__gt=since)
+    if until is not None:
+        queryset = queryset.filter(pk__lte=until)
+    limit = limit or changes.get_setting('MAX_PAGE_SIZE')
+    rows = list(queryset.order_by('pk').values_list('pk', 'kind', 'object_id', 'op')[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if not rows:
+        return since, [], False
+
+    # Scope of the objects that still exist
+    employee_ids = {object_id for _, kind, object_id, op in rows if kind == changes.EMPLOYEE and op == changes.UPSERT}
+    review_ids = {object_id for _, kind, object_id, op in rows if kind == changes.REVIEW and op == changes.UPSERT}
+    scopes = {}
+    if employee_ids:
+        for pk, department in Employee.objects.filter(pk__in=employee_ids).values_list('pk', 'department'):
+            scopes[(changes.EMPLOYEE, pk)] = (department, pk)
+    if review_ids:
+        reviews = PerformanceReview.objects.filter(pk__in=review_ids)
+        for pk, employee_id, department in reviews.values_list('pk', 'employee_id', 'employee__department'):
+            scopes[(changes.REVIEW, pk)] = (department, employee_id)
+
+    entries = []
+    for _, kind, object_id, op in rows:
+        # An employee's own id is known even after it is gone
+        default = (None, object_id) if kind == changes.EMPLOYEE else (None, None)
+        entries.append((kind, object_id, op) + scopes.get((kind, object_id), default))
+    return rows[-1][0], entries, has_more
+
+
+# ==============================
+# Subscriptions
+# ==============================
+
+class Subscription:
+    """One connected client: its filters and the changes it has not been sent yet"""
+
+    def __init__(self, cursor, departments=(), employee_ids=()):
+        self.cursor = cursor
+        self.departments = set(departments)
+        self.employee_ids = set(employee_ids)
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+    def matches(self, department, employee_id):
+        if not self.departments and not self.employee_ids:
+            return True
+        if employee_id is not None and employee_id in self.employee_ids:
+            return True
+        if department is not None and department in self.departments:
+            return True
+        # A missing scope cannot rule a filter out
+        return (department is None and bool(self.departments)) or (employee_id is None and bool(self.employee_ids))
+
+    def push(self, cursor, entries):
+        for kind, object_id, op, department, employee_id in entries:
+            if self.matches(department, employee_id):
+                # The latest op of an object wins
+                self.pending.pop((kind, object_id), None)
+                self.pending[(kind, object_id)] = op
+        self.cursor = cursor
+        if self.pending:
+            self.ready.set()
+
+    def drain(self):
+        """The 'changes' event for everything pending"""
+        data = {'cursor': self.cursor}
+        for (kind, object_id), op in self.pending.items():
+            data.setdefault(kind, {}).setdefault(op, []).append(object_id)
+        self.pending = {}
+        self.ready.clear()
+        return format_event('changes', data, self.cursor)
+
+
+class Broadcaster:
+    """Polls the change log for the subscriptions of this process"""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.cursor = None
+        self._task = None
+
+    async def start(self):
+        if self.cursor is None:
+            self.cursor = await sync_to_async(changes.current_cursor)()
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def poll(self):
+        """Read the log once and notify the subscriptions; True if more is waiting"""
+        cursor, entries, has_more = await sync_to_async(fetch)(self.cursor)
+        self.cursor = cursor
+        for subscription in list(self.subscribers):
+            subscription.push(cursor, entries)
+        return has_more
+
+    async def _run(self):
+        while self.subscribers:
+            try:
+                if await self.poll():
+                    continue
+            except Exception:
+                logger.exception('Reading the change log for event subscribers failed')
+            await asyncio.sleep(get_setting('POLL_INTERVAL'))
+        self._task = None
+
+
+broadcaster = Broadcaster()
+
+
+# ==============================
+# ASGI endpoint
+# ==============================
+
+def _cors_headers(origin):
+    """django-cors-headers' settings applied to the stream, which bypasses its middleware"""
+    if not origin:
+        return []
+    try:
+        from corsheaders.conf import conf
+    except ImportError:
+        return []
+    allowed = conf.CORS_ALLOW_ALL_ORIGINS or origin in conf.CORS_ALLOWED_ORIGINS or any(
+        re.match(pattern, origin) for pattern in conf.CORS_ALLOWED_ORIGIN_REGEXES
+    )
+    if not allowed:
+        return []
+    headers = [(b'access-control-allow-origin', origin.encode()), (b'vary', b'Origin')]
+    if conf.CORS_ALLOW_CREDENTIALS:
+        headers.append((b'access-control-allow-credentials', b'true'))
+    return headers
+
+
+async def _authenticate(headers):
+    session_key = parse_cookie(headers.get(b'cookie', b'').decode('latin-1')).get(settings.SESSION_COOKIE_NAME)
+    if not session_key:
+        return None
+    session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+    user = await aget_user(SimpleNamespace(session=session))
+    return user if user.is_authenticated else None
+
+
+def _parse_filters(query_string):
+    query = parse_qs(query_string.decode('latin-1'))
+    departments = [value for item in query.get('department', []) for value in item.split(',') if value]
+    employee_ids = [int(value) for item in query.get('employee', []) for value in item.split(',') if value]
+    return departments, employee_ids
+
+
+async def _respond(send, status, data, headers=()):
+    body = json.dumps(data).encode()
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode()), *headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def _replay(subscription, last_event_id, until):
+    """Queue the changes a reconnecting client missed up to until; False if it has to reload instead"""
+    if last_event_id >= until:
+        return True
+    if last_event_id < await sync_to_async(changes.current_horizon)():
+        return False
+    _, entries, has_more = await sync_to_async(fetch)(last_event_id, until, get_setting('MAX_REPLAY'))
+    if has_more:
+        return False
+    # Polls may have queued newer changes meanwhile; they win
+    newer, subscription.pending = subscription.pending, {}
+    subscription.push(subscription.cursor, entries)
+    for key, op in newer.items():
+        subscription.pending.pop(key, None)
+        subscription.pending[key] = op
+    return True
+
+
+async def stream_events(scope, receive, send):
+    headers = dict(scope['headers'])
+    cors = _cors_headers(headers.get(b'origin', b'').decode('latin-1'))
+    if scope['method'] != 'GET':
+        return await _respond(send, 405, {'detail': f"Method \"{scope['method']}\" not allowed."}, cors)
+    if await _authenticate(headers) is None:
+        return await _respond(send, 403, {'detail': 'Authentication credentials were not provided.'}, cors)
+    try:
+        departments, employee_ids = _parse_filters(scope['query_string'])
+        last_event_id = headers.get(b'last-event-id')
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return await _respond(send, 400, {'error': 'employee and Last-Event-ID must be integers'}, cors)
+    if len(broadcaster.subscribers) >= get_setting('MAX_CONNECTIONS'):
+        return await _respond(send, 503, {'error': 'Too many event streams'}, [(b'retry-after', b'30'), *cors])
+
+    await broadcaster.start()
+    start = broadcaster.cursor
+    subscription = Subscription(start, departments, employee_ids)
+    broadcaster.subscribers.add(subscription)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                # Tell nginx not to buffer the stream
+                (b'x-accel-buffering', b'no'),
+                *cors,
+            ],
+        })
+        if last_event_id is None or await _replay(subscription, last_event_id, start):
+            first = format_event('ready', {'cursor': start}, start)
+        else:
+            first = format_event('reset', {'cursor': start}, start)
+        await send({
+            'type': 'http.response.body',
+            'body': f"retry: {get_setting('RETRY')}\n\n".encode() + first,
+            'more_body': True,
+        })
+
+        heartbeat = get_setting('HEARTBEAT')
+        while True:
+            ready = asyncio.ensure_future(subscription.ready.wait())
+            await asyncio.wait({ready, disconnected}, timeout=heartbeat, return_when=asyncio.FIRST_COMPLETED)
+            ready.cancel()
+            if disconnected.done():
+                break
+            body = subscription.drain() if subscription.ready.is_set() else b': keep-alive\n\n'
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+    except OSError:
+        # The server could not write to a client that has gone away
+        pass
+    finally:
+        broadcaster.subscribers.discard(subscription)
+        disconnected.cancel()
+
+
+class EventStreamApp:
+    """ASGI application serving the event stream and passing everything else to Django"""
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == get_setting('PATH'):
+            return await stream_events(scope, receive, send)
+        return await self.application(scope, receive, send)
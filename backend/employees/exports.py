@@ -0,0 +1,163 @@
+# employees/exports.py
+
+"""Streaming exports of employees and reviews as CSV, NDJSON or Parquet.
+
+Rows are read with .values() (no model instances) in primary key order, one
+keyset batch at a time, and every batch is encoded and handed to the caller
+before the next one is fetched. Unlike .iterator(), keyset batches also keep
+memory flat on MySQL, whose driver buffers a whole result set client-side.
+
+Parquet needs the optional ``pyarrow`` package; it is written one row group
+per batch so it streams like the text formats.
+"""
+
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.http import StreamingHttpResponse
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# Column name -> (values() expression or None for a plain field, parquet type)
+EXPORT_COLUMNS = {
+    'employees': {
+        'id': (None, 'int'),
+        'first_name': (None, 'str'),
+        'last_name': (None, 'str'),
+        'email': (None, 'str'),
+        'department': (None, 'str'),
+        'date_of_joining': (None, 'date'),
+        'reviews_count': (None, 'int'),
+        'average_rating': (None, 'float'),
+        'latest_review_period': (None, 'str'),
+    },
+    'reviews': {
+        'id': (None, 'int'),
+        'employee_id': (None, 'int'),
+        'employee_email': (F('employee__email'), 'str'),
+        'review_period': (None, 'str'),
+        'rating': (None, 'int'),
+        'feedback': (None, 'str'),
+        'review_date': (None, 'date'),
+    },
+}
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+class ExportError(Exception):
+    pass
+
+
+def iter_batches(queryset, kind, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield lists of row dicts, fetching chunk_size rows per query by primary key"""
+    columns = EXPORT_COLUMNS[kind]
+    fields = [name for name, (expression, _) in columns.items() if expression is None]
+    expressions = {name: expression for name, (expression, _) in columns.items() if expression is not None}
+    float_columns = [name for name, (_, column_type) in columns.items() if column_type == 'float']
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        batch_queryset = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        batch = list(batch_queryset.values(*fields, **expressions)[:chunk_size])
+        if not batch:
+            return
+        last_pk = batch[-1]['id']
+        for row in batch:
+            for name in float_columns:
+                if row[name] is not None:
+                    row[name] = float(row[name])
+        yield batch
+        if len(batch) < chunk_size:
+            return
+
+
+def csv_stream(batches, kind):
+    columns = list(EXPORT_COLUMNS[kind])
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def ndjson_stream(batches, kind):
+    for batch in batches:
+        yield ''.join(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in batch).encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to the generator"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def parquet_stream(batches, kind):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError('Parquet export requires the pyarrow package')
+
+    types = {'int': pa.int64(), 'str': pa.string(), 'date': pa.date32(), 'float': pa.float64()}
+    schema = pa.schema([(name, types[column_type]) for name, (_, column_type) in EXPORT_COLUMNS[kind].items()])
+
+    def generate():
+        sink = _ChunkSink()
+        with pq.ParquetWriter(sink, schema) as writer:
+            for batch in batches:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                yield sink.drain()
+        yield sink.drain()
+
+    return generate()
+
+
+STREAMS = {'csv': csv_stream, 'ndjson': ndjson_stream, 'parquet': parquet_stream}
+
+
+def export_stream(queryset, kind, file_format, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Iterator of encoded byte chunks for queryset in file_format"""
+    if file_format not in STREAMS:
+        raise ExportError(f"Unknown export format {file_format!r}; use one of {', '.join(STREAMS)}")
+    return STREAMS[file_format](iter_batches(queryset, kind, chunk_size), kind)
+
+
+def streaming_response(queryset, kind, file_format, chunk_size=DEFAULT_CHUNK_SIZE):
+    response = StreamingHttpResponse(
+        export_stream(queryset, kind, file_format, chunk_size),
+        content_type=CONTENT_TYPES[file_format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{file_format}"'
+    return response
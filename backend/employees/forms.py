@@ -10,3 +10,33 @@ class PerformanceReviewForm(forms.ModelForm):
     class Meta:
         model = PerformanceReview
         fields = ['employee', 'review_period', 'rating', 'feedback', 'review_date']
+
+
+# ==============================
+# List filters
+# ==============================
+
+class ListFilterForm(forms.Form):
+    """GET filters of an HTML list; invalid values are reported and ignored"""
+
+    def filters(self):
+        self.is_valid()
+        return {name: self.cleaned_data.get(name) for name in self.fields}
+
+
+class EmployeeFilterForm(ListFilterForm):
+    department = forms.ChoiceField(required=False)
+
+    def __init__(self, data=None, departments=(), **kwargs):
+        super().__init__(data, **kwargs)
+        self.fields['department'].choices = [('', 'All departments')] + [(name, name) for name in departments]
+
+
+class ReviewFilterForm(EmployeeFilterForm):
+    period = forms.ChoiceField(required=False)
+    rating_min = forms.IntegerField(required=False, min_value=1, max_value=5, label='Rating from')
+    rating_max = forms.IntegerField(required=False, min_value=1, max_value=5, label='to')
+
+    def __init__(self, data=None, departments=(), periods=(), **kwargs):
+        super().__init__(data, departments, **kwargs)
+        self.fields['period'].choices = [('', 'All periods')] + [(period, period) for period in periods]
@@ -0,0 +1,25 @@
+# employees/hashers.py
+
+"""PBKDF2 password hasher with a configurable cost.
+
+Hashing a password takes Django's full PBKDF2 iteration count, about a
+million rounds. That cost is what login and signup spend most of their time
+on, and under a load test it hides everything else. This hasher is Django's
+PBKDF2PasswordHasher, with the iteration count taken from
+EMPLOYEES_AUTH['PASSWORD_ITERATIONS'] when that is set. Hashes keep the
+pbkdf2_sha256 format. Existing hashes still verify, and Django re-hashes them
+at the next login when the count changed.
+
+Lower the count only for load tests. Passwords hashed meanwhile are cheaper
+to crack until their owners log in again under the full count.
+"""
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        iterations = getattr(settings, 'EMPLOYEES_AUTH', {}).get('PASSWORD_ITERATIONS')
+        return iterations or hashers.PBKDF2PasswordHasher.iterations
@@ -0,0 +1,385 @@
+# employees/jobs.py
+
+"""Background jobs with the database as the queue.
+
+Some reports take seconds: an export of every employee, company-wide
+statistics, a rollup rebuild. Running them inside a request ties up a WSGI
+worker for that long. Instead the API enqueues a Job row and answers 202.
+The client then polls the job for its progress and result.
+``manage.py run_workers`` runs a pool of worker processes that take jobs
+off the ``jobs`` table. There is no broker. Everything runs against the
+database the app already uses.
+
+Queue semantics:
+
+* Claiming is a conditional UPDATE (``status = 'queued'`` in the WHERE
+  clause). Of two workers racing for a job, exactly one updates a row, on
+  every database backend.
+* Running jobs write their progress at most every PROGRESS_INTERVAL
+  seconds. The write doubles as a heartbeat. A job whose heartbeat is older
+  than STALE_AFTER belongs to a worker that died, and it is queued again.
+* A failed attempt is retried after RETRY_DELAY seconds, doubled for every
+  further attempt, until the job's max_attempts is used up.
+* Cancelling a queued job is immediate. A running job stops at its next
+  progress report.
+
+Job types register a function with @job_type. It takes a JobContext and
+returns a JSON-serializable result. A context can also save a file result,
+such as an export, to RESULT_STORAGE. Settings are read from
+settings.EMPLOYEES_JOBS (see DEFAULT_SETTINGS).
+"""
+
+import logging
+import os
+import socket
+import tempfile
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import storages
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+
+from . import cache, changes, dashboard, exports, rollups
+from .models import Employee, Job, PerformanceReview
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'MAX_ATTEMPTS': 3,
+    # Seconds before the first retry; doubled for every further attempt
+    'RETRY_DELAY': 30,
+    # Seconds an idle worker waits before polling the queue again
+    'POLL_INTERVAL': 1.0,
+    # Minimum seconds between progress writes (heartbeats) of a running job
+    'PROGRESS_INTERVAL': 1.0,
+    # Seconds without a heartbeat after which a running job is requeued
+    'STALE_AFTER': 300,
+    # STORAGES alias for file results
+    'RESULT_STORAGE': 'default',
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'EMPLOYEES_JOBS', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+class JobError(Exception):
+    """Unknown job type or invalid parameters"""
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# ==============================
+# Job types
+# ==============================
+
+class JobType:
+    def __init__(self, name, run, validate=None, staff_only=False):
+        self.name = name
+        self.run = run
+        self.validate = validate or (lambda params: params)
+        self.staff_only = staff_only
+
+
+REGISTRY = {}
+
+
+def job_type(name, validate=None, staff_only=False):
+    """Register the decorated function(context) -> result as job type name"""
+    def register(run):
+        REGISTRY[name] = JobType(name, run, validate, staff_only)
+        return run
+    return register
+
+
+def _no_params(params):
+    if params:
+        raise JobError('This job type takes no parameters')
+    return {}
+
+
+@job_type('statistics', validate=_no_params)
+def statistics(context):
+    """Company-wide employee and review statistics"""
+    context.progress(0, 2, 'Employees')
+    employees = dashboard.employee_statistics()
+    context.progress(1, 2, 'Reviews')
+    reviews = dashboard.review_statistics()
+    return {'employees': employees, 'reviews': reviews}
+
+
+# Filters an export job accepts, per kind: name -> (lookup, type)
+EXPORT_FILTERS = {
+    'employees': {
+        'department': ('department', str),
+        'min_rating': ('average_rating__gte', float),
+        'max_rating': ('average_rating__lte', float),
+    },
+    'reviews': {
+        'employee': ('employee_id', int),
+        'department': ('employee__department', str),
+    },
+}
+
+
+def _validate_export(params):
+    kind = params.get('kind')
+    if kind not in exports.EXPORT_COLUMNS:
+        raise JobError(f"kind must be one of {', '.join(exports.EXPORT_COLUMNS)}")
+    file_format = params.get('file_format', 'csv')
+    if file_format not in exports.STREAMS:
+        raise JobError(f"file_format must be one of {', '.join(exports.STREAMS)}")
+    filters = params.get('filters') or {}
+    if not isinstance(filters, dict):
+        raise JobError('filters must be an object')
+    cleaned = {}
+    for name, value in filters.items():
+        if name not in EXPORT_FILTERS[kind]:
+            raise JobError(f"Unknown {kind} filter {name!r}; use {', '.join(EXPORT_FILTERS[kind])}")
+        try:
+            cleaned[name] = EXPORT_FILTERS[kind][name][1](value)
+        except (TypeError, ValueError):
+            raise JobError(f'Invalid value for filter {name!r}')
+    return {'kind': kind, 'file_format': file_format, 'filters': cleaned}
+
+
+@job_type('export', validate=_validate_export)
+def export(context):
+    """Employees or reviews as a CSV, NDJSON or Parquet file (see employees.exports)"""
+    kind, file_format = context.params['kind'], context.params['file_format']
+    queryset = (Employee if kind == 'employees' else PerformanceReview).objects.filter(**{
+        EXPORT_FILTERS[kind][name][0]: value for name, value in context.params['filters'].items()
+    })
+    total = queryset.count()
+
+    def counted(batches):
+        done = 0
+        for batch in batches:
+            done += len(batch)
+            context.progress(done, total, f'{done} of {total} rows')
+            yield batch
+
+    chunks = exports.STREAMS[file_format](counted(exports.iter_batches(queryset, kind)), kind)
+    try:
+        context.save_file(f'{kind}.{file_format}', chunks)
+    except exports.ExportError as e:
+        raise JobError(str(e))
+    return {'rows': total, 'file_format': file_format, 'content_type': exports.CONTENT_TYPES[file_format]}
+
+
+@job_type('rebuild_rollups', validate=_no_params, staff_only=True)
+def rebuild_rollups(context):
+    """Recompute every rollup row and the review stats stored on employees"""
+    context.progress(0, 1, 'Rebuilding')
+    expected = rollups.rebuild()
+    # Only reaches other processes with the shared response cache backend
+    cache.bump_version(Employee, PerformanceReview)
+    return {'departments': len(expected.departments), 'employees': len(expected.employees)}
+
+
+def _validate_compaction(params):
+    retention_days = params.get('retention_days')
+    if retention_days is None:
+        return {}
+    if isinstance(retention_days, bool) or not isinstance(retention_days, int) or retention_days < 0:
+        raise JobError('retention_days must be a non-negative integer')
+    return {'retention_days': retention_days}
+
+
+@job_type('compact_changes', validate=_validate_compaction, staff_only=True)
+def compact_changes(context):
+    """Drop superseded change log entries and those past the retention window"""
+    context.progress(0, 1, 'Compacting')
+    return {'deleted': changes.compact(context.params.get('retention_days'))}
+
+
+# ==============================
+# Queue
+# ==============================
+
+def enqueue(kind, params=None, user=None, max_attempts=None, run_after=None):
+    """Validate params for job type kind and queue a job; raises JobError"""
+    if kind not in REGISTRY:
+        raise JobError(f"Unknown job type {kind!r}; use one of {', '.join(sorted(REGISTRY))}")
+    registered = REGISTRY[kind]
+    if registered.staff_only and not (user is not None and user.is_staff):
+        raise JobError(f'Only staff users can run {kind} jobs')
+    if params is not None and not isinstance(params, dict):
+        raise JobError('params must be an object')
+    return Job.objects.create(
+        kind=kind,
+        params=registered.validate(params or {}),
+        created_by=user if user is not None and user.is_authenticated else None,
+        max_attempts=max_attempts or get_setting('MAX_ATTEMPTS'),
+        run_after=run_after or timezone.now(),
+    )
+
+
+def cancel(job):
+    """Cancel a queued job now or ask a running one to stop; False when it already finished"""
+    now = timezone.now()
+    if Job.objects.filter(pk=job.pk, status=Job.QUEUED).update(status=Job.CANCELLED, finished_at=now):
+        return True
+    return bool(Job.objects.filter(pk=job.pk, status=Job.RUNNING).update(cancel_requested=True))
+
+
+def claim(worker, batch=10):
+    """Mark the oldest due queued job as running for worker and return it, or None"""
+    now = timezone.now()
+    candidates = list(
+        Job.objects.filter(status=Job.QUEUED, run_after__lte=now)
+        .order_by('run_after', 'id').values_list('pk', flat=True)[:batch]
+    )
+    for pk in candidates:
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, worker=worker, started_at=now, heartbeat_at=now,
+            attempts=F('attempts') + 1, progress=0, progress_message='', error='',
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def requeue_stale():
+    """Queue again (or fail, when out of attempts) running jobs whose worker stopped heartbeating"""
+    now = timezone.now()
+    stale = Job.objects.filter(
+        status=Job.RUNNING, heartbeat_at__lt=now - timedelta(seconds=get_setting('STALE_AFTER'))
+    )
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, finished_at=now, error='The worker running the job stopped responding'
+    )
+    requeued = stale.filter(cancel_requested=False).update(status=Job.QUEUED, worker='', run_after=now)
+    cancelled = stale.update(status=Job.CANCELLED, finished_at=now)
+    return failed + requeued + cancelled
+
+
+class JobContext:
+    """What a running job sees: its params, progress reporting and the result storage"""
+
+    def __init__(self, job):
+        self.job = job
+        self.params = job.params
+        self.last_progress = time.monotonic()
+
+    def progress(self, done, total=None, message=''):
+        """Record progress (throttled); raises JobCancelled once the job was cancelled"""
+        now = time.monotonic()
+        complete = total is not None and done >= total
+        if not complete and now - self.last_progress < get_setting('PROGRESS_INTERVAL'):
+            return
+        self.last_progress = now
+        updates = {'heartbeat_at': timezone.now(), 'progress_message': message[:200]}
+        if total:
+            updates['progress'] = round(min(done / total, 1.0) * 100, 1)
+        # Matches nothing once a cancel was requested or the job was taken away
+        if not self._current().filter(cancel_requested=False).update(**updates):
+            raise JobCancelled()
+
+    def save_file(self, filename, chunks):
+        """Store the byte chunks as this job's file result; returns its storage name"""
+        storage = storages[get_setting('RESULT_STORAGE')]
+        with tempfile.TemporaryFile() as spool:
+            for chunk in chunks:
+                spool.write(chunk)
+            spool.seek(0)
+            name = storage.save(f'jobs/{self.job.pk}/{filename}', File(spool, name=filename))
+        self.job.result_file = name
+        return name
+
+    def _current(self):
+        return Job.objects.filter(pk=self.job.pk, status=Job.RUNNING, worker=self.job.worker)
+
+
+def open_result_file(job):
+    return storages[get_setting('RESULT_STORAGE')].open(job.result_file, 'rb')
+
+
+def delete_result_file(job):
+    if job.result_file:
+        storages[get_setting('RESULT_STORAGE')].delete(job.result_file)
+
+
+def run_job(job):
+    """Run a claimed job and record its outcome: success, retry, failure or cancellation"""
+    context = JobContext(job)
+    current = context._current()
+    try:
+        if job.kind not in REGISTRY:
+            raise JobError(f'Unknown job type {job.kind!r}')
+        result = REGISTRY[job.kind].run(context)
+    except JobCancelled:
+        delete_result_file(job)
+        current.update(status=Job.CANCELLED, finished_at=timezone.now())
+        logger.info('Job %s cancelled', job.pk)
+        return
+    except Exception as e:
+        delete_result_file(job)
+        # Invalid parameters fail the same way on every attempt
+        error = str(e) if isinstance(e, JobError) else traceback.format_exc()
+        if job.attempts < job.max_attempts and not isinstance(e, JobError):
+            delay = get_setting('RETRY_DELAY') * 2 ** (job.attempts - 1)
+            retried = current.filter(cancel_requested=False).update(
+                status=Job.QUEUED, worker='', error=error,
+                run_after=timezone.now() + timedelta(seconds=delay)
+            )
+            if retried:
+                logger.warning(
+                    'Job %s failed (attempt %s of %s), retrying in %ss',
+                    job.pk, job.attempts, job.max_attempts, delay
+                )
+                return
+        current.update(status=Job.FAILED, error=error, finished_at=timezone.now())
+        logger.error('Job %s failed: %s', job.pk, error)
+        return
+    finished = current.update(
+        status=Job.SUCCEEDED, result=result, result_file=job.result_file,
+        progress=100, finished_at=timezone.now(),
+    )
+    if not finished:
+        # Requeued as stale while it ran; another worker owns it now
+        delete_result_file(job)
+
+
+def run_next(worker):
+    """Claim and run one due job; returns it, or None when the queue is empty"""
+    job = claim(worker)
+    if job is not None:
+        run_job(job)
+    return job
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def work(worker=None, stop=None, once=False, poll_interval=None):
+    """Run jobs until stop (a threading/multiprocessing Event) is set, or the queue is empty with once"""
+    worker = worker or worker_name()
+    poll_interval = get_setting('POLL_INTERVAL') if poll_interval is None else poll_interval
+    stale_check = 0
+    processed = 0
+    while stop is None or not stop.is_set():
+        close_old_connections()
+        if time.monotonic() - stale_check > get_setting('STALE_AFTER') / 10:
+            requeue_stale()
+            stale_check = time.monotonic()
+        job = run_next(worker)
+        if job is not None:
+            processed += 1
+            continue
+        if once:
+            break
+        if stop is not None:
+            stop.wait(poll_interval)
+        else:
+            time.sleep(poll_interval)
+    close_old_connections()
+    return processed
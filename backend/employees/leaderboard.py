@@ -0,0 +1,75 @@
+# employees/leaderboard.py
+
+"""Employee rankings read off the EmployeeRollup leaderboard indexes.
+
+EmployeeRollup keeps every employee's review counters and their mean
+(rating_mean), maintained incrementally by employees.rollups, and
+rollup_leaderboard_idx / rollup_ranking_idx store the rows in leaderboard
+order per department and company-wide. Top-K is an index range scan that
+stops after K rows, and an employee's rank is a COUNT over the index
+entries ahead of them, with no per-employee averaging in Python. Employees
+without reviews are not ranked.
+"""
+
+from .models import EmployeeRollup
+from .pagination import LeaderboardPagination
+
+
+def ranked(department=None):
+    """Rollups of the employees that take part in the ranking"""
+    rows = EmployeeRollup.objects.filter(review_count__gt=0)
+    if department:
+        rows = rows.filter(department=department)
+    return rows
+
+
+def ahead_of(rollup):
+    """Q for the rows ranked above rollup; the pagination seek in reverse"""
+    pagination = LeaderboardPagination()
+    position = [getattr(rollup, field.lstrip('-')) for field in pagination.ordering]
+    return pagination.seek_filter(position, reverse=True)
+
+
+def rank_of(rollup, department=None):
+    return ranked(department).filter(ahead_of(rollup)).count() + 1
+
+
+def percentile(rank, total):
+    """Share of the ranked employees at or below rank, from 0 to 100"""
+    if not total:
+        return None
+    return round(100 * (total - rank + 1) / total, 1)
+
+
+def standing(rollup, department=None):
+    """{'rank', 'total', 'percentile'} within department, or company-wide"""
+    total = ranked(department).count()
+    rank = rank_of(rollup, department)
+    return {'rank': rank, 'total': total, 'percentile': percentile(rank, total)}
+
+
+def with_ranks(page, department=None):
+    """Set rank and percentile on the rollups of one leaderboard page"""
+    if not page:
+        return page
+    # Pages are contiguous, so only the first row needs counting
+    first = rank_of(page[0], department)
+    total = ranked(department).count()
+    for offset, rollup in enumerate(page):
+        rollup.rank = first + offset
+        rollup.percentile = percentile(rollup.rank, total)
+    return page
+
+
+def ranking(employee):
+    """An employee's standing in their department and company-wide"""
+    rollup = ranked().filter(employee_id=employee.pk).first()
+    if rollup is None:
+        return {'employee': employee.pk, 'review_count': 0, 'average_rating': None, 'department': None, 'company': None}
+    return {
+        'employee': employee.pk,
+        'review_count': rollup.review_count,
+        'average_rating': rollup.average_rating,
+        'department': {'name': rollup.department, **standing(rollup, rollup.department)},
+        'company': standing(rollup),
+    }
@@ -0,0 +1,163 @@
+# employees/listing.py
+
+"""Filtering, sorting and pagination behind the HTML list views.
+
+Every sort option maps to an index, so a page is an index range scan with
+an OFFSET, never a sort of the whole table. Counting is bounded: up to
+COUNT_THRESHOLD matching rows are counted exactly with a LIMITed COUNT,
+and larger results are estimated from DepartmentRollup, which already
+keeps employees per department and reviews per department, period and
+rating. Pages are fetched with a deferred join, so a deep OFFSET walks
+index entries rather than table rows.
+"""
+
+from functools import cached_property
+
+from django.core.paginator import Paginator
+from django.db.models import F, Sum
+
+from . import dashboard
+from .forms import EmployeeFilterForm, ReviewFilterForm
+from .models import DepartmentRollup, Employee, PerformanceReview
+from .periods import parse_period
+from .rollups import TOTAL_PERIOD
+
+PAGE_SIZE = 50
+COUNT_THRESHOLD = 1000
+
+# (label, ordering); a leading '-' in the sort parameter reverses every field
+EMPLOYEE_SORTS = {
+    'name': ('Full Name', ('last_name', 'first_name', 'id')),  # employee_name_idx
+    'department': ('Department', ('department', 'last_name', 'first_name', 'id')),  # employee_department_idx
+    'joined': ('Date of Joining', ('date_of_joining', 'id')),  # employee_joined_idx
+    'rating': ('Average Rating', ('average_rating', 'id')),  # employee_rating_idx
+}
+REVIEW_SORTS = {
+    'period': ('Period', ('period_year', 'period_quarter', 'id')),  # review_period_order_idx
+    'rating': ('Rating', ('rating', 'review_date', 'id')),  # review_rating_idx
+    'date': ('Date', ('review_date', 'id')),  # review_date_idx
+}
+
+
+class EstimatedCountPaginator(Paginator):
+    """Exact counts up to threshold, estimate() above it; page rows are read from rows by pk"""
+
+    def __init__(self, object_list, per_page, estimate, rows=None, threshold=COUNT_THRESHOLD):
+        super().__init__(object_list, per_page)
+        self.estimate = estimate
+        self.rows = rows if rows is not None else object_list.model._default_manager.all()
+        self.threshold = threshold
+        self.exact = True
+
+    @cached_property
+    def count(self):
+        # SELECT COUNT(*) FROM (... LIMIT threshold + 1) stops early
+        counted = self.object_list.order_by()[:self.threshold + 1].count()
+        if counted <= self.threshold:
+            return counted
+        self.exact = False
+        return max(self.estimate(), counted)
+
+    def page(self, number):
+        # Deferred join: OFFSET over the ids alone can stay inside a covering
+        # index; only the rows of this page are then read and joined
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        ids = list(self.object_list.values_list('pk', flat=True)[bottom:bottom + self.per_page])
+        # By pk alone: repeating the filters lets the planner pick their
+        # index over the primary key
+        rows = self.rows.order_by().in_bulk(ids)
+        return self._get_page([rows[pk] for pk in ids if pk in rows], number, self)
+
+
+def resolve_sort(value, sorts, default):
+    """(sort parameter, ordering) for a ?sort= value, falling back to default"""
+    if (value or '').lstrip('-') not in sorts:
+        value = default
+    ordering = sorts[value.lstrip('-')][1]
+    if value.startswith('-'):
+        return value, tuple('-' + field for field in ordering)
+    return value, ordering
+
+
+def sort_columns(sorts, current):
+    """Header links: each column sorts ascending, or descending when it is the current ascending sort"""
+    columns = {}
+    for name, (label, _) in sorts.items():
+        active = current.lstrip('-') == name
+        descending = active and current.startswith('-')
+        columns[name] = {
+            'label': label,
+            'sort': name if descending or not active else f'-{name}',
+            'indicator': ('▼' if descending else '▲') if active else '',
+        }
+    return columns
+
+
+def _context(params, form, rows, queryset, sorts, default_sort, estimate):
+    sort, ordering = resolve_sort(params.get('sort'), sorts, default_sort)
+    paginator = EstimatedCountPaginator(queryset.order_by(*ordering), PAGE_SIZE, estimate, rows)
+    page = paginator.get_page(params.get('page'))
+    query = params.copy()
+    query.pop('page', None)
+    return {
+        'page': page,
+        'paginator': paginator,
+        'form': form,
+        'columns': sort_columns(sorts, sort),
+        'sort': sort,
+        'query': query,
+    }
+
+
+def employee_context(params):
+    form = EmployeeFilterForm(params, departments=dashboard.department_names())
+    filters = form.filters()
+    rows = queryset = Employee.objects.all()
+    if filters['department']:
+        queryset = queryset.filter(department=filters['department'])
+    return _context(params, form, rows, queryset, EMPLOYEE_SORTS, 'name', lambda: estimate_employees(**filters))
+
+
+def review_context(params):
+    form = ReviewFilterForm(
+        params, departments=dashboard.department_names(), periods=dashboard.review_periods()
+    )
+    filters = form.filters()
+    rows = queryset = PerformanceReview.objects.select_related('employee')
+    if filters['department']:
+        queryset = queryset.filter(employee__department=filters['department'])
+    if filters['period']:
+        year, quarter = parse_period(filters['period'])
+        if year is None:
+            queryset = queryset.filter(review_period=filters['period'])
+        else:
+            # review_period_order_idx then also supplies the period sort
+            queryset = queryset.filter(period_year=year, period_quarter=quarter)
+    if filters['rating_min'] is not None:
+        queryset = queryset.filter(rating__gte=filters['rating_min'])
+    if filters['rating_max'] is not None:
+        queryset = queryset.filter(rating__lte=filters['rating_max'])
+    return _context(params, form, rows, queryset, REVIEW_SORTS, '-date', lambda: estimate_reviews(**filters))
+
+
+# ==============================
+# Estimates from the rollups
+# ==============================
+
+def estimate_employees(department=None):
+    rows = DepartmentRollup.objects.filter(review_period=TOTAL_PERIOD)
+    if department:
+        rows = rows.filter(department=department)
+    return rows.aggregate(total=Sum('employee_count'))['total'] or 0
+
+
+def estimate_reviews(department=None, period=None, rating_min=None, rating_max=None):
+    rows = DepartmentRollup.objects.filter(review_period=period or TOTAL_PERIOD)
+    if department:
+        rows = rows.filter(department=department)
+    ratings = range(rating_min or 1, (rating_max or 5) + 1)
+    if not ratings:
+        return 0
+    counted = sum((F(f'rating_{rating}') for rating in ratings[1:]), F(f'rating_{ratings[0]}'))
+    return rows.aggregate(total=Sum(counted))['total'] or 0
@@ -0,0 +1,103 @@
+# employees/management/commands/benchmark_api.py
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from employees import benchmarks, cache
+from employees.models import PerformanceReview
+from employees.urls import router
+
+HTML_VIEWS = [
+    ('employee_list', False),
+    ('employee_create', False),
+    ('employee_update', True),
+    ('review_list', False),
+    ('review_create', False),
+    ('review_update', True),
+]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark every GET endpoint under /api/ and the HTML views: latency percentiles, queries, peak memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=20, help='Timed requests per endpoint')
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--only', help='Only endpoints whose name contains this text')
+        parser.add_argument(
+            '--exclude', action='append', default=[],
+            help='Skip endpoints whose name contains this text (repeatable)'
+        )
+        parser.add_argument('--cold', action='store_true', help='Clear the response cache before every request')
+        parser.add_argument('--save', help='Write the results to this JSON file (e.g. a new baseline)')
+        parser.add_argument('--baseline', help='Compare against results saved earlier with --save')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Allowed p95 slowdown against the baseline (0.25 = 25%%)'
+        )
+
+    def handle(self, *args, **options):
+        sample = PerformanceReview.objects.order_by('pk').values_list('pk', 'employee_id').first()
+        if sample is None:
+            raise CommandError('No data to benchmark; run generate_data first')
+        ids = {'performancereview': sample[0], 'employee': sample[1]}
+
+        user, _ = User.objects.get_or_create(username='benchmark', defaults={'is_staff': True})
+        client = Client(HTTP_HOST=benchmarks.allowed_host())
+        client.force_login(user)
+
+        results = {}
+        for name, url in self.endpoints(ids):
+            if options['only'] and options['only'] not in name:
+                continue
+            if any(text in name for text in options['exclude']):
+                continue
+
+            def request(url=url):
+                if options['cold']:
+                    cache.reset_backend()
+                response = client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                return response
+
+            summary, response = benchmarks.measure(request, options['runs'], options['warmup'])
+            if response.status_code != 200:
+                self.stderr.write(f'{name}: HTTP {response.status_code}')
+            results[name] = summary
+
+        self.stdout.write(benchmarks.format_table(results))
+
+        if options['save']:
+            benchmarks.save_results(options['save'], results)
+            self.stdout.write(f"Saved results to {options['save']}")
+        if options['baseline']:
+            regressions = benchmarks.compare(results, benchmarks.load_results(options['baseline']), options['tolerance'])
+            for regression in regressions:
+                self.stdout.write(self.style.ERROR(regression))
+            if regressions:
+                raise CommandError(f'{len(regressions)} regressions against {options["baseline"]}')
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
+
+    def endpoints(self, ids):
+        """(name, url) for the GET routes of every registered viewset and the HTML views"""
+        for prefix, viewset, basename in router.registry:
+            if basename not in ids:
+                # Background reports: no generated rows to read
+                continue
+            pk = ids[basename]
+            yield f'GET /api/{prefix}/', reverse(f'{basename}-list')
+            yield f'GET /api/{prefix}/<id>/', reverse(f'{basename}-detail', args=[pk])
+            for extra_action in viewset.get_extra_actions():
+                if 'get' not in extra_action.mapping:
+                    continue
+                args = [pk] if extra_action.detail else []
+                url = reverse(f'{basename}-{extra_action.url_name}', args=args)
+                name = f'GET /api/{prefix}/<id>/{extra_action.url_path}/' if extra_action.detail else f'GET {url}'
+                yield name, url
+        for url_name, detail in HTML_VIEWS:
+            pk = ids['performancereview' if url_name.startswith('review') else 'employee']
+            url = reverse(url_name, args=[pk] if detail else [])
+            yield f'HTML {url_name}', url
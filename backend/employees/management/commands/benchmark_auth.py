@@ -0,0 +1,146 @@
+# employees/management/commands/benchmark_auth.py
+
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from employees import benchmarks
+
+SESSION_BACKENDS = ['db', 'cached_db', 'signed_cookies']
+PREFIX = 'auth-benchmark-'
+PASSWORD = 'benchmark-password'
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark check_auth, login and signup from concurrent clients '
+        'for each session backend: latency percentiles, queries, throughput'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=200, help='Timed requests per endpoint and backend')
+        parser.add_argument('--concurrency', type=int, default=8, help='Client threads')
+        parser.add_argument(
+            '--session-backend', action='append', choices=SESSION_BACKENDS,
+            help='Only these session backends (repeatable); all by default'
+        )
+        parser.add_argument(
+            '--iterations', type=int,
+            help='PBKDF2 iterations for this run (EMPLOYEES_AUTH PASSWORD_ITERATIONS); Django default otherwise'
+        )
+
+    def handle(self, *args, **options):
+        hashing = {}
+        if options['iterations']:
+            hashing = {
+                'EMPLOYEES_AUTH': {'PASSWORD_ITERATIONS': options['iterations']},
+                'PASSWORD_HASHERS': ['employees.hashers.PBKDF2PasswordHasher', *settings.PASSWORD_HASHERS],
+            }
+        results = {}
+        throughput = {}
+        try:
+            with override_settings(**hashing):
+                users = self.create_users(options['concurrency'])
+                for backend in options['session_backend'] or SESSION_BACKENDS:
+                    with override_settings(SESSION_ENGINE=f'django.contrib.sessions.backends.{backend}'):
+                        for endpoint in ('check_auth', 'login', 'signup'):
+                            name = f'{endpoint} ({backend})'
+                            results[name], throughput[name] = self.run(endpoint, users, options)
+        finally:
+            User.objects.filter(username__startswith=PREFIX).delete()
+
+        self.stdout.write(benchmarks.format_table(results, label='endpoint (session backend)'))
+        for name, rate in throughput.items():
+            self.stdout.write(f'{name}: {rate:.0f} requests/s with {options["concurrency"]} clients')
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def create_users(self, count):
+        return [
+            User.objects.create_user(username=f'{PREFIX}{index}', password=PASSWORD)
+            for index in range(count)
+        ]
+
+    def request(self, endpoint, client, user):
+        if endpoint == 'check_auth':
+            response = client.get('/api/auth/user/')
+        elif endpoint == 'login':
+            response = client.post(
+                '/api/auth/login/', {'username': user.username, 'password': PASSWORD},
+                content_type='application/json'
+            )
+        else:
+            username = f'{PREFIX}{uuid.uuid4().hex[:12]}'
+            response = client.post(
+                '/api/auth/signup/',
+                {'username': username, 'email': f'{username}@example.com', 'password': PASSWORD},
+                content_type='application/json'
+            )
+        if response.status_code >= 400:
+            raise RuntimeError(f'{endpoint}: HTTP {response.status_code} {response.content[:200]!r}')
+        return response
+
+    def client_for(self, endpoint, user):
+        client = Client(HTTP_HOST=benchmarks.allowed_host())
+        if endpoint == 'check_auth':
+            client.post(
+                '/api/auth/login/', {'username': user.username, 'password': PASSWORD},
+                content_type='application/json'
+            )
+            # With the shared response cache the first check stores the snapshot later ones are answered from
+            client.get('/api/auth/user/')
+        return client
+
+    def run(self, endpoint, users, options):
+        concurrency = options['concurrency']
+        per_thread = max(1, options['runs'] // concurrency)
+        samples = []
+        errors = []
+        lock = threading.Lock()
+        start = threading.Barrier(concurrency + 1)
+
+        def worker(user):
+            try:
+                client = self.client_for(endpoint, user)
+                start.wait()
+                elapsed = []
+                for _ in range(per_thread):
+                    started = time.perf_counter()
+                    self.request(endpoint, client, user)
+                    elapsed.append(time.perf_counter() - started)
+                with lock:
+                    samples.extend(elapsed)
+            except Exception as exc:
+                errors.append(exc)
+                start.abort()
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        try:
+            start.wait()
+        except threading.BrokenBarrierError:
+            pass
+        started = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+        if errors:
+            raise errors[0]
+
+        # Queries of one request, counted outside the concurrent run
+        client = self.client_for(endpoint, users[0])
+        with CaptureQueriesContext(connection) as queries:
+            self.request(endpoint, client, users[0])
+
+        summary = benchmarks.summarize(samples)
+        summary['queries'] = len(queries.captured_queries)
+        return summary, len(samples) / wall
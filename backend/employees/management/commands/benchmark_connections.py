@@ -0,0 +1,112 @@
+# employees/management/commands/benchmark_connections.py
+
+import copy
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from employees import benchmarks
+from employees.pool import get_pool, pooled_wrapper_class, unpooled_wrapper_class
+
+MODES = {
+    # CONN_MAX_AGE per mode; the pool always closes (returns) per request
+    'direct': 0,
+    'persistent': None,
+    'pool': 0,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Per-request database connection overhead: a new connection per request, '
+        'persistent connections (CONN_MAX_AGE) and the connection pool'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=500, help='Simulated requests per mode')
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            '--mode', action='append', choices=list(MODES),
+            help='Only these modes (repeatable); all by default'
+        )
+        parser.add_argument(
+            '--thread-per-request', action='store_true',
+            help='Serve every request from a new thread, as ASGI and sync_to_async may'
+        )
+        parser.add_argument('--query', default='SELECT 1', help='Statement each request runs')
+
+    def handle(self, *args, **options):
+        if options['database'] not in connections:
+            raise CommandError(f"Unknown database {options['database']!r}")
+        base = connections[options['database']]
+        results = {}
+        for mode in options['mode'] or list(MODES):
+            samples = self.run(base, mode, options)
+            summary = benchmarks.summarize(samples)
+            summary['queries'] = 1
+            results[mode] = summary
+
+        self.stdout.write(benchmarks.format_table(results, label='connection mode'))
+        if 'direct' in results:
+            for mode, summary in results.items():
+                if mode != 'direct' and summary['mean_ms']:
+                    speedup = results['direct']['mean_ms'] / summary['mean_ms']
+                    self.stdout.write(f'{mode}: {speedup:.1f}x faster per request than direct on average')
+        self.stdout.write(self.style.SUCCESS('Done'))
+
+    def wrapper_factory(self, base, mode):
+        settings_dict = copy.deepcopy(base.settings_dict)
+        settings_dict['CONN_MAX_AGE'] = MODES[mode]
+        wrapper_class = unpooled_wrapper_class(type(base))
+        if mode == 'pool':
+            wrapper_class = pooled_wrapper_class(wrapper_class)
+        # Its own alias, so the pool is not shared with the one serving requests
+        alias = f'benchmark_{mode}'
+        return lambda: wrapper_class(copy.deepcopy(settings_dict), alias=alias)
+
+    def run(self, base, mode, options):
+        make_wrapper = self.wrapper_factory(base, mode)
+        wrappers = []
+        samples = []
+
+        def request():
+            # Without --thread-per-request one thread, and so one wrapper,
+            # serves every request, as in a sync WSGI worker
+            if options['thread_per_request'] or not wrappers:
+                wrappers.append(make_wrapper())
+            wrapper = wrappers[-1]
+            started = time.perf_counter()
+            # What Django does on request_started and request_finished
+            wrapper.close_if_unusable_or_obsolete()
+            with wrapper.cursor() as cursor:
+                cursor.execute(options['query'])
+                cursor.fetchall()
+            wrapper.close_if_unusable_or_obsolete()
+            return time.perf_counter() - started
+
+        for index in range(options['warmup'] + options['runs']):
+            if options['thread_per_request']:
+                elapsed = []
+                thread = threading.Thread(target=lambda: elapsed.append(request()))
+                thread.start()
+                thread.join()
+                elapsed = elapsed[0]
+            else:
+                elapsed = request()
+            if index >= options['warmup']:
+                samples.append(elapsed)
+
+        # Persistent connections of finished threads are never closed by
+        # Django; count them before cleaning up
+        leaked = sum(1 for wrapper in wrappers if wrapper.connection is not None)
+        for wrapper in wrappers:
+            wrapper.inc_thread_sharing()
+            wrapper.close()
+        if mode == 'pool':
+            get_pool(wrappers[0].alias, wrappers[0].settings_dict).close()
+        if leaked > 1:
+            self.stdout.write(self.style.WARNING(f'{mode}: {leaked} connections left open by finished threads'))
+        return samples
@@ -0,0 +1,94 @@
+# employees/management/commands/benchmark_rendering.py
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from employees import benchmarks, compression
+from employees.models import Employee, PerformanceReview
+from employees.renderers import FastJSONRenderer, orjson
+from employees.serializers import EmployeeListSerializer, EmployeeSerializer, PerformanceReviewSerializer
+
+KINDS = {
+    # kind -> (serializer, rows)
+    'employees': (EmployeeListSerializer, lambda: Employee.objects.all()),
+    'employees-expanded': (EmployeeSerializer, lambda: Employee.objects.with_reviews()),
+    'reviews': (PerformanceReviewSerializer, lambda: PerformanceReview.objects.select_related('employee')),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Serialize, render and compress a page of employees or reviews with the stock DRF stack '
+        'and with the fast serializer path, orjson and brotli/gzip; reports throughput and payload size'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500, help='Rows per page')
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--kind', action='append', choices=list(KINDS), help='Only these kinds (repeatable)')
+        parser.add_argument(
+            '--bandwidth', type=float, default=100,
+            help='Link speed in Mbit/s used to estimate transfer time'
+        )
+
+    def handle(self, *args, **options):
+        results, rows = {}, {}
+        for kind in options['kind'] or list(KINDS):
+            serializer_class, queryset = KINDS[kind]
+            instances = list(queryset()[:options['rows']])
+            if not instances:
+                raise CommandError('No data to benchmark; run generate_data first')
+            for stack, page in self.stacks(serializer_class, instances).items():
+                name = f'{kind} / {stack}'
+                summary, body = benchmarks.measure(page, options['runs'], options['warmup'])
+                summary['bytes'] = len(body)
+                results[name] = summary
+                rows[name] = len(instances)
+
+        self.stdout.write(benchmarks.format_table(results, label='kind / stack'))
+        self.stdout.write('')
+        self.stdout.write(self.throughput_table(results, rows, options['bandwidth']))
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed: the fast renderer used the json module'))
+        if compression.brotli is None:
+            self.stdout.write(self.style.WARNING('brotli is not installed: skipped br'))
+
+    def stacks(self, serializer_class, instances):
+        """stack name -> function producing the response body for instances"""
+        stock_serializer = type(f'Stock{serializer_class.__name__}', (serializer_class,), {'fast_representation': False})
+
+        def page(serializer, renderer, compressor=None):
+            def run():
+                body = renderer.render(serializer(instances, many=True).data)
+                if compressor is None:
+                    return body
+                active = compressor()
+                return active.process(body) + active.finish()
+            return run
+
+        stacks = {
+            'drf': page(stock_serializer, JSONRenderer()),
+            'drf + gzip': page(stock_serializer, JSONRenderer(), compression.GzipCompressor),
+            'fast': page(serializer_class, FastJSONRenderer()),
+        }
+        for compressor in compression.available_compressors():
+            stacks[f'fast + {compressor.name}'] = page(serializer_class, FastJSONRenderer(), compressor)
+        return stacks
+
+    def throughput_table(self, results, rows, bandwidth):
+        header = f"{'kind / stack':<36} {'rows/s':>10} {'KiB':>10} {'+ transfer ms':>14} {'speedup':>8}"
+        lines = [header, '-' * len(header)]
+        baseline = {}
+        for name, summary in results.items():
+            kind, stack = name.split(' / ', 1)
+            transfer_ms = summary['bytes'] * 8 / (bandwidth * 1000)
+            total_ms = summary['mean_ms'] + transfer_ms
+            if stack == 'drf':
+                baseline[kind] = total_ms
+            speedup = baseline.get(kind, total_ms) / total_ms if total_ms else 0
+            lines.append(
+                f"{name:<36} {rows[name] / summary['mean_ms'] * 1000:>10.0f} {summary['bytes'] / 1024:>10.1f} "
+                f"{total_ms:>14.2f} {speedup:>7.1f}x"
+            )
+        return '\n'.join(lines)
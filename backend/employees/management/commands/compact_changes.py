@@ -0,0 +1,25 @@
+# employees/management/commands/compact_changes.py
+
+from django.core.management.base import BaseCommand
+
+from employees import changes
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete change log entries superseded by a newer entry for the same object '
+        'and entries older than the retention window'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-days', type=int,
+            help=f"Keep entries this many days (default: EMPLOYEES_CHANGES['RETENTION_DAYS'], "
+                 f"{changes.DEFAULT_SETTINGS['RETENTION_DAYS']})"
+        )
+
+    def handle(self, *args, **options):
+        deleted = changes.compact(options['retention_days'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {deleted} change log entries; cursors before {changes.current_horizon()} must reload'
+        ))
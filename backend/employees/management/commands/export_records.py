@@ -0,0 +1,50 @@
+# employees/management/commands/export_records.py
+
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.exports import DEFAULT_CHUNK_SIZE, STREAMS, ExportError, export_stream
+from employees.models import Employee, PerformanceReview
+
+
+class Command(BaseCommand):
+    help = 'Stream employees or performance reviews to a CSV, NDJSON or Parquet file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', choices=['employees', 'reviews'], required=True)
+        parser.add_argument('--format', dest='file_format', choices=list(STREAMS), default='csv')
+        parser.add_argument('--output', help='Destination file; defaults to stdout')
+        parser.add_argument('--employee', type=int, help='Only reviews of this employee id')
+        parser.add_argument('--department', help='Only employees (or reviews of employees) in this department')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows fetched per query')
+
+    def handle(self, *args, **options):
+        if options['kind'] == 'employees':
+            queryset = Employee.objects.all()
+            if options['department']:
+                queryset = queryset.filter(department=options['department'])
+        else:
+            queryset = PerformanceReview.objects.all()
+            if options['employee'] is not None:
+                queryset = queryset.filter(employee_id=options['employee'])
+            if options['department']:
+                queryset = queryset.filter(employee__department=options['department'])
+
+        try:
+            chunks = export_stream(queryset, options['kind'], options['file_format'], options['chunk_size'])
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        written = 0
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+                written += len(chunk)
+        finally:
+            if options['output']:
+                output.close()
+
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f"Exported {options['kind']} to {options['output']} ({written} bytes)"))
@@ -0,0 +1,187 @@
+# employees/management/commands/import_records.py
+
+import csv
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employees.bulk import PARTIAL, EmployeeBulkWriter, ReviewBulkWriter
+from employees.models import Employee
+
+
+class LineReader:
+    """Iterates decoded lines of a binary file while tracking the byte offset.
+
+    csv.reader pulls exactly the lines a record needs, so after each record
+    ``position`` is the offset where the next record starts. That offset is
+    what the checkpoint stores.
+    """
+
+    def __init__(self, handle, encoding='utf-8'):
+        self.handle = handle
+        self.encoding = encoding
+        self.position = handle.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.handle.readline()
+        if not line:
+            raise StopIteration
+        self.position += len(line)
+        return line.decode(self.encoding)
+
+
+def read_csv(handle, start):
+    """Yield (row, end_offset) from a CSV file with a header line"""
+    header_reader = LineReader(handle)
+    header = next(csv.reader(header_reader))
+    if start:
+        handle.seek(start)
+    lines = LineReader(handle)
+    for values in csv.reader(lines):
+        if values:
+            yield dict(zip(header, values)), lines.position
+
+
+def read_ndjson(handle, start):
+    """Yield (row, end_offset) from a newline-delimited JSON file"""
+    handle.seek(start)
+    lines = LineReader(handle)
+    for line in lines:
+        if line.strip():
+            yield json.loads(line), lines.position
+
+
+READERS = {'csv': read_csv, 'ndjson': read_ndjson}
+
+
+class Command(BaseCommand):
+    help = 'Stream employees or performance reviews from a CSV or NDJSON file into the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with header) or NDJSON file')
+        parser.add_argument('--kind', choices=['employees', 'reviews'], required=True)
+        parser.add_argument('--format', choices=sorted(READERS), help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per transaction')
+        parser.add_argument(
+            '--checkpoint',
+            help='File recording the last committed offset; an existing checkpoint resumes the import'
+        )
+        parser.add_argument('--error-log', help='Write rejected rows and their errors here as NDJSON')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(f'Unknown format {file_format!r}; use --format csv or --format ndjson')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive')
+
+        self.kind = options['kind']
+        self.checkpoint_path = options['checkpoint']
+        state = self.load_checkpoint(path)
+        if state['offset']:
+            self.stdout.write(f"Resuming at byte {state['offset']} after {state['rows']} rows")
+
+        if self.kind == 'reviews':
+            # Built once; holds one entry per employee regardless of file size
+            self.employee_ids = dict(Employee.objects.values_list('email', 'id').iterator())
+
+        error_log = open(options['error_log'], 'a') if options['error_log'] else None
+        started = time.monotonic()
+        rows_at_start = state['rows']
+        try:
+            with open(path, 'rb') as handle:
+                chunk = []
+                for row, offset in READERS[file_format](handle, state['offset']):
+                    chunk.append(row)
+                    if len(chunk) >= options['chunk_size']:
+                        self.import_chunk(chunk, offset, state, error_log)
+                        self.report(state, state['rows'] - rows_at_start, started)
+                        chunk = []
+                if chunk:
+                    self.import_chunk(chunk, handle.tell(), state, error_log)
+        finally:
+            if error_log:
+                error_log.close()
+
+        self.report(state, state['rows'] - rows_at_start, started)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Imported {self.kind}:\n'
+                f"- {state['created']} rows created\n"
+                f"- {state['errors']} rows rejected"
+            )
+        )
+
+    def import_chunk(self, rows, offset, state, error_log):
+        first_row = state['rows']
+        errors = {}
+        if self.kind == 'reviews':
+            resolved, positions = [], []
+            for index, row in enumerate(rows):
+                row = self.resolve_employee(row)
+                if row is None:
+                    errors[index] = {'employee_email': ['No employee with this email.']}
+                else:
+                    resolved.append(row)
+                    positions.append(index)
+            writer = ReviewBulkWriter(resolved, mode=PARTIAL, chunk_size=len(rows))
+        else:
+            positions = list(range(len(rows)))
+            writer = EmployeeBulkWriter(rows, mode=PARTIAL, chunk_size=len(rows))
+
+        written = writer.execute('create') if writer.rows else []
+        errors.update((positions[index], row_errors) for index, row_errors in writer.errors.items())
+
+        state['rows'] += len(rows)
+        state['created'] += len(written)
+        state['errors'] += len(errors)
+        state['offset'] = offset
+        if error_log:
+            for index, row_errors in sorted(errors.items()):
+                error_log.write(json.dumps({'row': first_row + index + 1, 'errors': row_errors}) + '\n')
+            error_log.flush()
+        self.save_checkpoint(state)
+
+    def resolve_employee(self, row):
+        """Replace employee_email with the id from the in-memory map; None if unknown"""
+        row = dict(row)
+        email = row.pop('employee_email', None)
+        if email is not None and 'employee' not in row:
+            if email not in self.employee_ids:
+                return None
+            row['employee'] = self.employee_ids[email]
+        if row.get('feedback') == '':
+            row['feedback'] = None
+        return row
+
+    def report(self, state, rows, started):
+        elapsed = max(time.monotonic() - started, 1e-9)
+        self.stdout.write(
+            f"{state['rows']} rows read, {state['created']} created, "
+            f"{state['errors']} rejected ({rows / elapsed:.0f} rows/s)"
+        )
+
+    def load_checkpoint(self, path):
+        state = {'path': os.path.abspath(path), 'kind': self.kind, 'offset': 0, 'rows': 0, 'created': 0, 'errors': 0}
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return state
+        with open(self.checkpoint_path) as handle:
+            saved = json.load(handle)
+        if saved.get('path') != state['path'] or saved.get('kind') != self.kind:
+            raise CommandError(f'{self.checkpoint_path} belongs to a different import')
+        state.update(saved)
+        return state
+
+    def save_checkpoint(self, state):
+        if not self.checkpoint_path:
+            return
+        temporary = f'{self.checkpoint_path}.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump(state, handle)
+        os.replace(temporary, self.checkpoint_path)
@@ -0,0 +1,35 @@
+# employees/management/commands/rebuild_rollups.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employees import rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the rating rollups and the review stats stored on employees from scratch, or verify them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only compare the stored rollups with freshly computed values'
+        )
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            problems = rollups.verify()
+            for problem in problems:
+                self.stdout.write(problem)
+            if problems:
+                raise CommandError(f'{len(problems)} rollup values are out of date; run rebuild_rollups')
+            self.stdout.write(self.style.SUCCESS('Rollups are up to date'))
+            return
+
+        expected = rollups.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rebuilt rollups:\n'
+                f'- {len(expected.departments)} department rows\n'
+                f'- {len(expected.employees)} employee rows'
+            )
+        )
@@ -0,0 +1,18 @@
+# employees/management/commands/rebuild_search_index.py
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from employees import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over employees and review feedback from scratch'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        written = search.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt search index: {written} postings in {time.monotonic() - started:.1f}s')
+        )
@@ -0,0 +1,71 @@
+# employees/management/commands/run_workers.py
+
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+# Worker processes are spawned, not forked, so they open their own database
+# connections; this module must import without the app registry ready.
+
+
+def run_worker(stop, once, poll_interval):
+    """Entry point of a spawned worker process"""
+    # Ctrl-C and SIGTERM finish the current job instead of abandoning it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    import django
+    django.setup()
+    from employees import jobs
+    jobs.work(stop=stop, once=once, poll_interval=poll_interval)
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs (reports, exports, rollup rebuilds) in a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=2,
+            help='Worker processes; 0 runs a single worker in this process'
+        )
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll-interval', type=float, help='Seconds between polls of an empty queue')
+
+    def handle(self, *args, **options):
+        if options['processes'] <= 0:
+            from employees import jobs
+            processed = jobs.work(once=options['once'], poll_interval=options['poll_interval'])
+            self.stdout.write(self.style.SUCCESS(f'Processed {processed} jobs'))
+            return
+
+        context = multiprocessing.get_context('spawn')
+        stop = context.Event()
+        connections.close_all()
+
+        def start():
+            process = context.Process(
+                target=run_worker, args=(stop, options['once'], options['poll_interval']), daemon=True
+            )
+            process.start()
+            return process
+
+        def request_stop(signum, frame):
+            self.stdout.write('Stopping after the running jobs finish...')
+            stop.set()
+
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+        workers = [start() for _ in range(options['processes'])]
+        self.stdout.write(f"Started {len(workers)} workers (pids {', '.join(str(w.pid) for w in workers)})")
+
+        while workers:
+            for process in list(workers):
+                process.join(timeout=0.5)
+                if process.is_alive():
+                    continue
+                workers.remove(process)
+                if process.exitcode and not stop.is_set() and not options['once']:
+                    self.stderr.write(f'Worker {process.pid} exited with code {process.exitcode}; restarting it')
+                    workers.append(start())
+        self.stdout.write(self.style.SUCCESS('Workers stopped'))
@@ -0,0 +1,129 @@
+# employees/metrics.py
+
+"""In-process request metrics and their Prometheus text rendering.
+
+RequestMetricsMiddleware records one observation per request into the
+histograms below, labelled with the resolved view (``EmployeeViewSet.list``,
+``employee_list``, ...). Histograms have fixed buckets, so recording is a
+bisect and a few integer additions under one lock.
+
+Every worker process keeps its own histograms; the scrape endpoint returns
+the numbers of the process that served the scrape, which is what Prometheus
+expects when each worker is scraped (or the numbers are summed) separately.
+"""
+
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+DEFAULT_SETTINGS = {
+    'SLOW_REQUEST_MS': 500,
+    'TOKEN': '',
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'EMPLOYEES_METRICS', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label value"""
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.series = {}
+
+    def observe(self, label, value):
+        # Caller holds the registry lock
+        series = self.series.get(label)
+        if series is None:
+            series = self.series[label] = {'buckets': [0] * (len(self.buckets) + 1), 'sum': 0, 'count': 0}
+        series['buckets'][bisect_left(self.buckets, value)] += 1
+        series['sum'] += value
+        series['count'] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for label, series in sorted(self.series.items()):
+            view = _escape(label)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series['buckets']):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{view="{view}",le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{view="{view}"}} {series["sum"]}')
+            lines.append(f'{self.name}_count{{view="{view}"}} {series["count"]}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}
+            self.histograms = {
+                'duration': Histogram(
+                    'employees_request_duration_seconds', 'Wall time per request', DURATION_BUCKETS
+                ),
+                'db_time': Histogram(
+                    'employees_request_db_seconds', 'Time spent in database queries per request', DURATION_BUCKETS
+                ),
+                'queries': Histogram(
+                    'employees_request_queries', 'Database queries per request', QUERY_BUCKETS
+                ),
+                'duplicates': Histogram(
+                    'employees_request_duplicate_queries',
+                    'Queries per request repeating an earlier statement (N+1 candidates)',
+                    QUERY_BUCKETS,
+                ),
+                'size': Histogram(
+                    'employees_response_size_bytes', 'Response body size', SIZE_BUCKETS
+                ),
+            }
+
+    def record(self, view, status_code, duration, stats, size=None):
+        with self._lock:
+            key = (view, status_code)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.histograms['duration'].observe(view, duration)
+            self.histograms['db_time'].observe(view, stats.time)
+            self.histograms['queries'].observe(view, stats.count)
+            self.histograms['duplicates'].observe(view, stats.duplicates)
+            if size is not None:
+                self.histograms['size'].observe(view, size)
+
+    def snapshot(self, view):
+        """{metric: (count, sum)} for one view; used by tests and debugging"""
+        with self._lock:
+            return {
+                key: (series['count'], series['sum'])
+                for key, histogram in self.histograms.items()
+                for label, series in histogram.series.items()
+                if label == view
+            }
+
+    def render(self):
+        """Prometheus text exposition format"""
+        with self._lock:
+            lines = ['# HELP employees_requests_total Requests by view and status', '# TYPE employees_requests_total counter']
+            for (view, status_code), count in sorted(self.requests.items()):
+                lines.append(f'employees_requests_total{{view="{_escape(view)}",status="{status_code}"}} {count}')
+            for histogram in self.histograms.values():
+                lines.extend(histogram.render())
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
@@ -0,0 +1,164 @@
+# employees/middleware.py
+
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .metrics import get_setting, registry
+
+logger = logging.getLogger('employees.requests')
+
+# The QueryStats of the request being served. A context variable rather than
+# per-connection state because async views and their sync_to_async helpers
+# run queries on other threads, each with its own connection.
+_current_stats = ContextVar('employees_query_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder)
+
+
+class QueryStats:
+    """Database execute_wrapper counting and timing the queries of one request"""
+
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.statements = Counter()
+        self.slowest = (0.0, None)
+        # Sections of the async dashboard record from several threads at once
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.count += 1
+                self.time += elapsed
+                # Same statement with different parameters: the N+1 signature
+                self.statements[sql] += 1
+                if elapsed > self.slowest[0]:
+                    self.slowest = (elapsed, sql)
+
+    @property
+    def duplicates(self):
+        return self.count - len(self.statements)
+
+    @contextmanager
+    def track(self):
+        # Connections opened before this module was imported missed connection_created
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+        token = _current_stats.set(self)
+        try:
+            yield self
+        finally:
+            _current_stats.reset(token)
+
+
+def view_label(request, view_func):
+    """ViewSet.action for DRF viewsets, the URL name (or function name) otherwise"""
+    view_class = getattr(view_func, 'cls', None)
+    actions = getattr(view_func, 'actions', None)
+    if view_class is not None and actions:
+        return f'{view_class.__name__}.{actions.get(request.method.lower(), request.method.lower())}'
+    if view_class is not None:
+        return view_class.__name__
+    match = request.resolver_match
+    if match is not None and match.url_name:
+        return match.url_name
+    return getattr(view_func, '__name__', 'unknown')
+
+
+class RequestMetricsMiddleware:
+    """Records wall time, DB time, query and duplicate-query counts and response size per view"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        request._metrics_view = 'unresolved'
+        stats = QueryStats()
+        started = time.perf_counter()
+        with stats.track():
+            response = self.get_response(request)
+        return self.complete(request, response, stats, started)
+
+    async def __acall__(self, request):
+        request._metrics_view = 'unresolved'
+        stats = QueryStats()
+        started = time.perf_counter()
+        with stats.track():
+            response = await self.get_response(request)
+        return self.complete(request, response, stats, started)
+
+    def complete(self, request, response, stats, started):
+        if response.streaming:
+            # Exports run their queries while the body is iterated
+            response.streaming_content = self.stream(response.streaming_content, request, response, stats, started)
+        else:
+            self.finish(request, response, stats, started, len(response.content))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view = view_label(request, view_func)
+
+    def stream(self, content, request, response, stats, started):
+        size = 0
+        chunks = iter(content)
+        while True:
+            # Set around each step only: the server may resume the generator
+            # from another thread or context
+            token = _current_stats.set(stats)
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                break
+            finally:
+                _current_stats.reset(token)
+            size += len(chunk)
+            yield chunk
+        self.finish(request, response, stats, started, size)
+
+    def finish(self, request, response, stats, started, size):
+        duration = time.perf_counter() - started
+        view = request._metrics_view
+        registry.record(view, response.status_code, duration, stats, size)
+
+        if duration * 1000 >= get_setting('SLOW_REQUEST_MS'):
+            repeated_sql, repeats = (stats.statements.most_common(1) or [(None, 0)])[0]
+            logger.warning(
+                'Slow request %s %s (%s): %.0f ms, %d queries in %.0f ms, %d duplicates\n'
+                'Slowest query (%.0f ms): %s\nMost repeated query (%d times): %s',
+                request.method, request.path, view, duration * 1000,
+                stats.count, stats.time * 1000, stats.duplicates,
+                stats.slowest[0] * 1000, stats.slowest[1], repeats, repeated_sql,
+            )
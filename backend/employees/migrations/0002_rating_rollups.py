@@ -0,0 +1,58 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_rollups(apps, schema_editor):
+    from employees import rollups
+    rollups.rebuild(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('review_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('rating_1', models.IntegerField(default=0)),
+                ('rating_2', models.IntegerField(default=0)),
+                ('rating_3', models.IntegerField(default=0)),
+                ('rating_4', models.IntegerField(default=0)),
+                ('rating_5', models.IntegerField(default=0)),
+                ('department', models.CharField(max_length=100)),
+                ('review_period', models.CharField(blank=True, default='', max_length=20)),
+                ('employee_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'department_rollups',
+                'unique_together': {('department', 'review_period')},
+            },
+        ),
+        migrations.CreateModel(
+            name='EmployeeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('review_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('rating_1', models.IntegerField(default=0)),
+                ('rating_2', models.IntegerField(default=0)),
+                ('rating_3', models.IntegerField(default=0)),
+                ('rating_4', models.IntegerField(default=0)),
+                ('rating_5', models.IntegerField(default=0)),
+                ('department', models.CharField(db_index=True, max_length=100)),
+                ('employee', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rating_rollup', to='employees.employee')),
+            ],
+            options={
+                'db_table': 'employee_rollups',
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
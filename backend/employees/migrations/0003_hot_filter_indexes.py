@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-18 16:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0002_rating_rollups'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='departmentrollup',
+            index=models.Index(fields=['review_period', 'department'], name='rollup_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['last_name', 'first_name', 'id'], name='employee_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['department', 'last_name', 'first_name'], name='employee_department_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['date_of_joining'], name='employee_joined_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='performancereview',
+            index=models.Index(fields=['review_date'], name='review_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='performancereview',
+            index=models.Index(fields=['employee', 'review_date'], name='review_employee_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='performancereview',
+            index=models.Index(fields=['review_period', 'rating'], name='review_period_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='performancereview',
+            index=models.Index(fields=['rating', 'review_date'], name='review_rating_idx'),
+        ),
+    ]
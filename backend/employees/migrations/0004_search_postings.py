@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_search_index(apps, schema_editor):
+    from employees import search
+    search.rebuild(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0003_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=40)),
+                ('kind', models.CharField(choices=[('employee', 'Employee'), ('review', 'Performance review')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('weight', models.IntegerField()),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='employees.employee')),
+            ],
+            options={
+                'db_table': 'search_postings',
+                'indexes': [models.Index(fields=['kind', 'term', 'object_id', 'weight'], name='search_term_idx'), models.Index(fields=['kind', 'object_id'], name='search_document_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
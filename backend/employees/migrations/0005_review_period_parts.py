@@ -0,0 +1,55 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:37
+
+from django.db import migrations, models
+
+
+def backfill_periods(apps, schema_editor):
+    from employees.periods import period_fields
+
+    # One UPDATE per distinct period string rather than per row
+    for model_name in ['PerformanceReview', 'DepartmentRollup']:
+        model = apps.get_model('employees', model_name)
+        periods = model.objects.order_by().values_list('review_period', flat=True).distinct()
+        for period in list(periods):
+            fields = period_fields(period)
+            if fields['period_year'] is not None:
+                model.objects.filter(review_period=period).update(**fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0004_search_postings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='departmentrollup',
+            name='period_quarter',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='departmentrollup',
+            name='period_year',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='performancereview',
+            name='period_quarter',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='performancereview',
+            name='period_year',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='departmentrollup',
+            index=models.Index(fields=['department', 'period_year', 'period_quarter'], name='rollup_series_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='performancereview',
+            index=models.Index(fields=['employee', 'period_year', 'period_quarter', 'rating'], name='review_employee_period_idx'),
+        ),
+        migrations.RunPython(backfill_periods, migrations.RunPython.noop),
+    ]
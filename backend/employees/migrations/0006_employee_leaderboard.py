@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+def backfill_means(apps, schema_editor):
+    from employees import rollups
+    rollups.refresh_means(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0005_review_period_parts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeerollup',
+            name='rating_mean',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='employeerollup',
+            index=models.Index(fields=['department', '-rating_mean', '-review_count', 'employee'], name='rollup_leaderboard_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeerollup',
+            index=models.Index(fields=['-rating_mean', '-review_count', 'employee'], name='rollup_ranking_idx'),
+        ),
+        migrations.RunPython(backfill_means, migrations.RunPython.noop),
+    ]
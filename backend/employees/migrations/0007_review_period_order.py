@@ -0,0 +1,17 @@
+# Generated by Django 5.2.6 on 2026-10-18 17:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0006_employee_leaderboard'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='performancereview',
+            index=models.Index(fields=['period_year', 'period_quarter'], name='review_period_order_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+def backfill_review_stats(apps, schema_editor):
+    from employees import rollups
+    rollups.refresh_review_stats(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0007_review_period_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='reviews_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='average_rating',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='latest_review_period',
+            field=models.CharField(blank=True, editable=False, max_length=20, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['average_rating', 'id'], name='employee_rating_idx'),
+        ),
+        migrations.RunPython(backfill_review_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:41
+
+from django.db import migrations, models
+
+
+def create_state(apps, schema_editor):
+    # The row every writing transaction locks (employees.changes.lock)
+    ChangeLogState = apps.get_model('employees', 'ChangeLogState')
+    ChangeLogState.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0009_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('compacted_through', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'change_log_state',
+            },
+        ),
+        migrations.CreateModel(
+            name='Change',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('employee', 'Employee'), ('review', 'Performance review')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('op', models.CharField(choices=[('upsert', 'Created or updated'), ('delete', 'Deleted')], max_length=6)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'changes',
+                'indexes': [models.Index(fields=['kind', 'object_id', 'id'], name='change_object_idx'), models.Index(fields=['created_at'], name='change_created_idx')],
+            },
+        ),
+        migrations.RunPython(create_state, migrations.RunPython.noop),
+    ]
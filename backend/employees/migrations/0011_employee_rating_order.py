@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 22:35
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_rating_order(apps, schema_editor):
+    Employee = apps.get_model('employees', 'Employee')
+    Employee.objects.filter(average_rating__isnull=False).update(rating_order=F('average_rating'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0010_change_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='rating_order',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['rating_order', 'id'], name='employee_rating_order_idx'),
+        ),
+        migrations.RunPython(backfill_rating_order, migrations.RunPython.noop),
+    ]
@@ -3,8 +3,38 @@ from django.db import models
 # Create your models here.
 # employees/models.py
 
-from django.db import models
+from django.conf import settings
+from django.db import models, router, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
+from .periods import PERIOD_FIELDS, period_fields
+
+
+def atomic_save(instance, using=None):
+    """Commit a save together with what its employees.signals handlers write
+
+    Rollups, the change log and the search index are updated by pre_save and
+    post_save handlers, which Django runs outside the save's own transaction.
+    Deletes need no wrapper: the deletion collector sends its signals inside
+    one.
+    """
+    using = using or router.db_for_write(type(instance), instance=instance)
+    # Inside a caller's transaction this adds no savepoint
+    return transaction.atomic(using=using, savepoint=False)
+
+
+class EmployeeQuerySet(models.QuerySet):
+    def with_reviews(self):
+        """Prefetch every employee's reviews in a single batched query"""
+        return self.prefetch_related(
+            Prefetch(
+                'performance_reviews',
+                # Grouped by employee so review_employee_date_idx supplies the order
+                queryset=PerformanceReview.objects.order_by('-employee_id', '-review_date')
+            )
+        )
+
 
 class Employee(models.Model):
     first_name = models.CharField(max_length=100)
@@ -12,13 +42,45 @@ class Employee(models.Model):
     email = models.EmailField(unique=True)
     department = models.CharField(max_length=100)
     date_of_joining = models.DateField()
+    # Denormalized from the employee's reviews by employees.rollups
+    reviews_count = models.IntegerField(default=0, editable=False)
+    average_rating = models.FloatField(null=True, blank=True, editable=False)
+    latest_review_period = models.CharField(max_length=20, null=True, blank=True, editable=False)
+    # average_rating, or 0 without reviews: a non-null key the API's rating cursor can seek on
+    rating_order = models.FloatField(default=0, editable=False)
+
+    REVIEW_STATS_FIELDS = ['reviews_count', 'average_rating', 'latest_review_period', 'rating_order']
+
+    objects = EmployeeQuerySet.as_manager()
     
     class Meta:
         db_table = 'employees'
         ordering = ['last_name', 'first_name']
+        indexes = [
+            # Default ordering and the (last_name, first_name, id) keyset cursor
+            models.Index(fields=['last_name', 'first_name', 'id'], name='employee_name_idx'),
+            # Department filters, GROUP BY department and per-department listings
+            models.Index(fields=['department', 'last_name', 'first_name'], name='employee_department_idx'),
+            models.Index(fields=['date_of_joining'], name='employee_joined_idx'),
+            # Sorting and filtering by the stored average rating
+            models.Index(fields=['average_rating', 'id'], name='employee_rating_idx'),
+            # ?ordering=average_rating keyset cursor, unreviewed employees included
+            models.Index(fields=['rating_order', 'id'], name='employee_rating_order_idx'),
+        ]
     
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
+
+    def save(self, *args, **kwargs):
+        # The review stats are written by employees.rollups only; saving a
+        # loaded employee must not put back the values it was loaded with
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.REVIEW_STATS_FIELDS
+            ]
+        with atomic_save(self, kwargs.get('using')):
+            super().save(*args, **kwargs)
     
     @property
     def full_name(self):
@@ -37,15 +99,47 @@ class PerformanceReview(models.Model):
     )
     feedback = models.TextField(blank=True, null=True)
     review_date = models.DateField()
+    # Parsed from review_period on save; None when it is not a quarter
+    period_year = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
+    period_quarter = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
     
     class Meta:
         db_table = 'performance_reviews'
         # Ensure unique review period per employee
         unique_together = ('employee', 'review_period')
         ordering = ['-review_date']
+        indexes = [
+            # Default ordering
+            models.Index(fields=['review_date'], name='review_date_idx'),
+            # One employee's reviews newest first, and the latest-review subquery
+            models.Index(fields=['employee', 'review_date'], name='review_employee_date_idx'),
+            # Covers DISTINCT review_period and period filters
+            models.Index(fields=['review_period', 'rating'], name='review_period_idx'),
+            models.Index(fields=['rating', 'review_date'], name='review_rating_idx'),
+            # Per-employee series in chronological order
+            models.Index(
+                fields=['employee', 'period_year', 'period_quarter', 'rating'],
+                name='review_employee_period_idx'
+            ),
+            # HTML review list sorted by period
+            models.Index(fields=['period_year', 'period_quarter'], name='review_period_order_idx'),
+        ]
     
     def __str__(self):
         return f"{self.employee.full_name} - {self.review_period}"
+
+    def set_period_fields(self):
+        """Refresh period_year/period_quarter from review_period"""
+        for field, value in period_fields(self.review_period).items():
+            setattr(self, field, value)
+
+    def save(self, *args, **kwargs):
+        self.set_period_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'review_period' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | set(PERIOD_FIELDS)
+        with atomic_save(self, kwargs.get('using')):
+            super().save(*args, **kwargs)
     
     def get_rating_display(self):
         ratings = {
@@ -55,4 +149,220 @@ class PerformanceReview(models.Model):
             4: "Good",
             5: "Excellent"
         }
-        return ratings.get(self.rating, "Unknown")
\ No newline at end of file
+        return ratings.get(self.rating, "Unknown")
+
+# ==============================
+# Rating rollups
+# ==============================
+
+class RatingRollup(models.Model):
+    """Review count, rating sum and rating histogram, kept up to date by employees.rollups"""
+    review_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    rating_1 = models.IntegerField(default=0)
+    rating_2 = models.IntegerField(default=0)
+    rating_3 = models.IntegerField(default=0)
+    rating_4 = models.IntegerField(default=0)
+    rating_5 = models.IntegerField(default=0)
+
+    RATING_FIELDS = ['rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5']
+
+    class Meta:
+        abstract = True
+
+    @property
+    def average_rating(self):
+        if not self.review_count:
+            return None
+        return round(self.rating_sum / self.review_count, 2)
+
+    def rating_distribution(self):
+        return [
+            {'rating': rating, 'count': getattr(self, f'rating_{rating}')}
+            for rating in range(1, 6)
+            if getattr(self, f'rating_{rating}')
+        ]
+
+
+class DepartmentRollup(RatingRollup):
+    """Per department and review period; review_period '' holds the department totals"""
+    department = models.CharField(max_length=100)
+    review_period = models.CharField(max_length=20, blank=True, default='')
+    # Parsed from review_period when the row is created; None on total rows
+    period_year = models.PositiveSmallIntegerField(null=True, blank=True)
+    period_quarter = models.PositiveSmallIntegerField(null=True, blank=True)
+    # Only maintained on the department total rows (review_period '')
+    employee_count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = 'department_rollups'
+        unique_together = ('department', 'review_period')
+        indexes = [
+            # The statistics endpoints read every review_period '' row
+            models.Index(fields=['review_period', 'department'], name='rollup_period_idx'),
+            # Department trend series in chronological order
+            models.Index(fields=['department', 'period_year', 'period_quarter'], name='rollup_series_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.department} - {self.review_period or 'all periods'}"
+
+
+class EmployeeRollup(RatingRollup):
+    """Per employee totals across all review periods"""
+    employee = models.OneToOneField(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name='rating_rollup'
+    )
+    department = models.CharField(max_length=100, db_index=True)
+    # rating_sum / review_count stored so the leaderboard can be read off an index
+    rating_mean = models.FloatField(default=0)
+
+    class Meta:
+        db_table = 'employee_rollups'
+        indexes = [
+            # Leaderboard order (see employees.leaderboard.ORDERING), per
+            # department and company-wide
+            models.Index(
+                fields=['department', '-rating_mean', '-review_count', 'employee'],
+                name='rollup_leaderboard_idx'
+            ),
+            models.Index(fields=['-rating_mean', '-review_count', 'employee'], name='rollup_ranking_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} rollup"
+
+
+# ==============================
+# Search index
+# ==============================
+
+class SearchPosting(models.Model):
+    """One term of one searchable document; maintained by employees.search"""
+    KIND_CHOICES = [('employee', 'Employee'), ('review', 'Performance review')]
+
+    term = models.CharField(max_length=40)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    # The employee the document belongs to, so deleting an employee drops
+    # the postings of their reviews too
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='+')
+    weight = models.IntegerField()
+
+    class Meta:
+        db_table = 'search_postings'
+        indexes = [
+            # Exact and prefix term lookups; covers the ranking aggregate
+            models.Index(fields=['kind', 'term', 'object_id', 'weight'], name='search_term_idx'),
+            # Re-indexing and removing one document
+            models.Index(fields=['kind', 'object_id'], name='search_document_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.kind} {self.object_id}"
+
+
+# ==============================
+# Background jobs
+# ==============================
+
+class Job(models.Model):
+    """A queued unit of work for employees.jobs; the table is the queue"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+        (CANCELLED, 'Cancelled'),
+    ]
+    FINISHED = [SUCCEEDED, FAILED, CANCELLED]
+
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Earliest time a worker may claim the job; pushed back between retries
+    run_after = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    # Set while running: the claiming worker and its last sign of life
+    worker = models.CharField(max_length=100, blank=True, default='')
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    cancel_requested = models.BooleanField(default=False)
+    progress = models.FloatField(default=0)
+    progress_message = models.CharField(max_length=200, blank=True, default='')
+    result = models.JSONField(null=True, blank=True)
+    # Name in the result storage of a file result (exports)
+    result_file = models.CharField(max_length=255, blank=True, default='')
+    error = models.TextField(blank=True, default='')
+
+    class Meta:
+        db_table = 'jobs'
+        indexes = [
+            # Workers claim the oldest due job of the queue
+            models.Index(fields=['status', 'run_after', 'id'], name='job_queue_idx'),
+            # A user's jobs, newest first
+            models.Index(fields=['created_by', '-id'], name='job_owner_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    @property
+    def finished(self):
+        return self.status in self.FINISHED
+
+
+# ==============================
+# Change log
+# ==============================
+
+class Change(models.Model):
+    """One write of an employee or review; ids follow commit order and are the feed cursor (employees.changes)"""
+    KIND_CHOICES = [('employee', 'Employee'), ('review', 'Performance review')]
+    OP_CHOICES = [('upsert', 'Created or updated'), ('delete', 'Deleted')]
+
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    op = models.CharField(max_length=6, choices=OP_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'changes'
+        indexes = [
+            # Compaction: the entries of one object
+            models.Index(fields=['kind', 'object_id', 'id'], name='change_object_idx'),
+            # Compaction: entries past the retention window
+            models.Index(fields=['created_at'], name='change_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.op} {self.kind} {self.object_id}"
+
+
+class ChangeLogState(models.Model):
+    """Single row: locked by every writing transaction, and the compaction horizon"""
+    # Entries up to this id may have been compacted away; older cursors must resync
+    compacted_through = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'change_log_state'
+
+    def __str__(self):
+        return f"change log compacted through #{self.compacted_through}"
@@ -0,0 +1,165 @@
+# employees/pagination.py
+
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on a composite, unique ordering.
+
+    The cursor holds the ordering values of the last (or first) row on the
+    page, and the next page is fetched with a row-value comparison against
+    them. Unlike OFFSET, a deep page costs the same as the first one.
+    Fields prefixed with '-' sort descending. Rows with NULL in an ordering
+    field have no position to seek from and are left out, so order on
+    non-null columns (Employee.rating_order stands in for average_rating).
+    """
+    ordering = ('last_name', 'first_name', 'id')
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        position, reverse = self.decode_cursor(request)
+
+        for field in self.ordering:
+            name = field.lstrip('-')
+            if queryset.model._meta.get_field(name).null:
+                queryset = queryset.filter(**{f'{name}__isnull': False})
+
+        if reverse:
+            queryset = queryset.order_by(*[_flip(field) for field in self.ordering])
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self.seek_filter(position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def seek_filter(self, position, reverse):
+        """Build (a, b, c) > (x, y, z) as an OR of prefix-equal comparisons"""
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            # Past a descending field means below its value
+            lookup = 'lt' if reverse != field.startswith('-') else 'gt'
+            term = Q(**{f'{name}__{lookup}': position[index]})
+            for prefix_field, value in zip(self.ordering[:index], position[:index]):
+                term &= Q(**{prefix_field.lstrip('-'): value})
+            condition |= term
+        return condition
+
+    def get_ordering(self, request):
+        return self.ordering
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            position = data['p']
+            reverse = bool(data.get('r'))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, instance, reverse):
+        position = [getattr(instance, field.lstrip('-')) for field in self.ordering]
+        data = json.dumps({'p': position, 'r': int(reverse)}, cls=DjangoJSONEncoder)
+        encoded = base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+def _flip(field):
+    return field[1:] if field.startswith('-') else '-' + field
+
+
+class EmployeeCursorPagination(KeysetPagination):
+    """Matches Employee.Meta.ordering, with id as the unique tie-breaker; ?ordering= picks another index"""
+    ordering = ('last_name', 'first_name', 'id')
+    ordering_query_param = 'ordering'
+    orderings = {
+        'name': ('last_name', 'first_name', 'id'),  # employee_name_idx
+        # employee_rating_order_idx, forwards or backwards; unreviewed employees sort as 0
+        'average_rating': ('rating_order', 'id'),
+        '-average_rating': ('-rating_order', '-id'),
+    }
+
+    def get_ordering(self, request):
+        return self.orderings.get(request.query_params.get(self.ordering_query_param), self.ordering)
+
+
+class LeaderboardPagination(KeysetPagination):
+    """Best average rating first, then more reviews, then lowest id (rollup_leaderboard_idx)"""
+    ordering = ('-rating_mean', '-review_count', 'employee_id')
+    page_size = 25
+    max_page_size = 200
+
+
+class JobPagination(KeysetPagination):
+    """Newest jobs first (job_owner_idx for one user's jobs)"""
+    ordering = ('-id',)
+    page_size = 20
+    max_page_size = 100
@@ -0,0 +1,48 @@
+# employees/periods.py
+
+"""Parsing of the free-form review_period strings into (year, quarter).
+
+Accepted spellings include "Q1 2024", "2024 Q1", "2024-Q1", "q1/2024" and
+"2024Q1". Anything else parses to (None, None) and is left out of trend
+series, but keeps its original string everywhere else.
+"""
+
+import re
+
+PERIOD_FIELDS = ['period_year', 'period_quarter']
+
+PERIOD_RE = re.compile(
+    r'^\s*(?:q([1-4])\W*(\d{4})|(\d{4})\W*q([1-4]))\s*$',
+    re.IGNORECASE,
+)
+
+
+def parse_period(value):
+    """(year, quarter) for a review period string, or (None, None)"""
+    match = PERIOD_RE.match(value or '')
+    if match is None:
+        return None, None
+    quarter, year = (match.group(1), match.group(2)) if match.group(1) else (match.group(4), match.group(3))
+    return int(year), int(quarter)
+
+
+def period_fields(value):
+    """{'period_year': ..., 'period_quarter': ...} for a review period string"""
+    return dict(zip(PERIOD_FIELDS, parse_period(value)))
+
+
+def format_period(year, quarter):
+    return f'Q{quarter} {year}'
+
+
+def period_ordinal(year, quarter):
+    """Consecutive quarters map to consecutive integers"""
+    return year * 4 + quarter - 1
+
+
+def sort_key(value):
+    """Chronological order with unparseable periods last, alphabetically"""
+    year, quarter = parse_period(value)
+    if year is None:
+        return (1, 0, value)
+    return (0, period_ordinal(year, quarter), value)
@@ -0,0 +1,239 @@
+# employees/pool.py
+
+"""Process-wide database connection pool shared by every thread.
+
+Django's own persistent connections (CONN_MAX_AGE) belong to one thread's
+DatabaseWrapper. Under ASGI, and for sync_to_async worker threads, the
+thread running a query changes from request to request. Those connections
+are then never reused and can pile up. The pool decouples the raw
+connection from the wrapper. Closing a wrapper (which Django does at the
+end of every request when CONN_MAX_AGE is 0) hands the connection back, and
+the next wrapper to connect, on whatever thread, takes it over without a
+new TCP handshake, authentication or init_command.
+
+PooledDatabaseWrapperMixin adds the pool to a backend's DatabaseWrapper;
+employees.backends.mysql applies it to MySQL. The DATABASES entry's POOL
+dict configures it (see DEFAULTS).
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+DEFAULTS = {
+    # Open connections per process, idle or in use
+    'MAX_SIZE': 10,
+    # Seconds an idle connection is kept before it is closed
+    'IDLE_TIMEOUT': 300,
+    # Seconds after which a connection is closed when it comes back, so
+    # server-side session state and memory do not accumulate forever
+    'MAX_LIFETIME': 3600,
+    # Seconds to wait for a free connection when MAX_SIZE are in use
+    'TIMEOUT': 10,
+    # Check a connection that has been idle for longer than this many
+    # seconds before handing it out; None never checks, 0 always does
+    'HEALTH_CHECK_AFTER': 1,
+}
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class PooledConnection:
+    __slots__ = ('connection', 'created', 'last_used')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created = self.last_used = time.monotonic()
+
+
+class ConnectionPool:
+    """Thread-safe LIFO pool of raw DB-API connections"""
+
+    def __init__(self, max_size=10, idle_timeout=300, max_lifetime=3600, timeout=10, health_check_after=1):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self.size = 0
+        self._idle = deque()
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_settings(cls, options):
+        options = {**DEFAULTS, **(options or {})}
+        return cls(**{name.lower(): value for name, value in options.items()})
+
+    def acquire(self, connect, check):
+        """A PooledConnection, reused when possible, else from connect()"""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            entry, expired = self._reserve(deadline)
+            for stale in expired:
+                _close_quietly(stale.connection)
+            if entry is None:
+                try:
+                    return PooledConnection(connect())
+                except BaseException:
+                    self._forget()
+                    raise
+            if self._healthy(entry, check):
+                return entry
+            # Dead while idle (server restart, wait_timeout): replace it
+            _close_quietly(entry.connection)
+            self._forget()
+
+    def release(self, entry, reusable=True):
+        now = time.monotonic()
+        if not reusable or now - entry.created >= self.max_lifetime:
+            _close_quietly(entry.connection)
+            self._forget()
+            return
+        entry.last_used = now
+        with self._condition:
+            self._idle.append(entry)
+            self._condition.notify()
+
+    def close(self):
+        """Close every idle connection; connections in use close when released"""
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+            self.size -= len(idle)
+            self._condition.notify_all()
+        for entry in idle:
+            _close_quietly(entry.connection)
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+    def _reserve(self, deadline):
+        """(idle entry or None, expired entries); None means the caller may open a new connection"""
+        expired = []
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                # The oldest idle connections sit at the left end
+                while self._idle and now - self._idle[0].last_used >= self.idle_timeout:
+                    expired.append(self._idle.popleft())
+                    self.size -= 1
+                if self._idle:
+                    # Most recently used first: it is the least likely to have timed out
+                    return self._idle.pop(), expired
+                if self.size < self.max_size:
+                    self.size += 1
+                    return None, expired
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise PoolTimeout(f'No database connection available after {self.timeout}s ({self.max_size} in use)')
+                self._condition.wait(remaining)
+
+    def _healthy(self, entry, check):
+        if self.health_check_after is None or time.monotonic() - entry.last_used < self.health_check_after:
+            return True
+        try:
+            check(entry.connection)
+        except Exception:
+            return False
+        return True
+
+    def _forget(self):
+        with self._condition:
+            self.size -= 1
+            self._condition.notify()
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict):
+    # Keyed by process too, as a forked worker must not share its parent's
+    # sockets, and by database, as the test runner renames NAME
+    key = (alias, os.getpid(), *(settings_dict.get(name) for name in ['NAME', 'HOST', 'PORT', 'USER']))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool.from_settings(settings_dict.get('POOL'))
+        return pool
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+class PooledDatabaseWrapperMixin:
+    """Take raw connections from the process pool and give them back on close()"""
+    _pool_entry = None
+    _pool_reused = False
+
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool()
+        opened = []
+
+        def connect():
+            opened.append(True)
+            return super(PooledDatabaseWrapperMixin, self).get_new_connection(conn_params)
+
+        self._pool_entry = pool.acquire(connect, self.check_pooled_connection)
+        self._pool_reused = not opened
+        return self._pool_entry.connection
+
+    def init_connection_state(self):
+        # Session settings survive on a reused connection
+        if not self._pool_reused:
+            super().init_connection_state()
+
+    def check_pooled_connection(self, connection):
+        """Raise if connection can no longer be used"""
+        cursor = connection.cursor()
+        try:
+            cursor.execute('SELECT 1')
+        finally:
+            cursor.close()
+
+    def _close(self):
+        entry, self._pool_entry = self._pool_entry, None
+        if entry is None or entry.connection is not self.connection:
+            return super()._close()
+        self.pool().release(entry, reusable=self.reusable())
+
+    def reusable(self):
+        """Whether the connection can be handed to another request as it is"""
+        if self.in_atomic_block or not self.autocommit:
+            # An open transaction would leak into the next request
+            return False
+        return not self.errors_occurred or self.is_usable()
+
+
+def pooled_wrapper_class(wrapper_class):
+    """wrapper_class with pooling, e.g. for a backend without its own pooled module"""
+    if issubclass(wrapper_class, PooledDatabaseWrapperMixin):
+        return wrapper_class
+    return type(f'Pooled{wrapper_class.__name__}', (PooledDatabaseWrapperMixin, wrapper_class), {})
+
+
+def unpooled_wrapper_class(wrapper_class):
+    for base in wrapper_class.__mro__:
+        if not issubclass(base, PooledDatabaseWrapperMixin) and hasattr(base, 'get_new_connection'):
+            return base
+    return wrapper_class
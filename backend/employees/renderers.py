@@ -0,0 +1,62 @@
+# employees/renderers.py
+
+"""orjson-backed JSON renderer and parser for the REST API.
+
+On large pages the stdlib json module, through DRF's JSONEncoder, takes as
+long as the serializer. The optional ``orjson`` package encodes the same
+data about ten times faster and decodes faster as well. Both classes keep
+DRF's behaviour and fall back to it when orjson is not installed or when a
+request needs something orjson does not do:
+
+* indented output (``Accept: application/json; indent=4``, the browsable API);
+* ASCII-only output (UNICODE_JSON = False);
+* request bodies in an encoding other than UTF-8.
+
+Values orjson cannot encode natively (Decimal, lazy translations, querysets,
+...) go through DRF's JSONEncoder.default. Unlike STRICT_JSON, NaN and
+infinities render as null instead of failing the response.
+"""
+
+from django.conf import settings
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_default = JSONEncoder().default
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits, which the json module handles
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same strict javascript subset as JSONRenderer
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,174 @@
+# employees/replicas.py
+
+"""Read replica routing with read-your-writes consistency.
+
+ReplicaRoutingMiddleware serves GET, HEAD and OPTIONS requests from a
+replica, taken round-robin from EMPLOYEES_REPLICAS['ALIASES']. That covers
+the list, detail, statistics, periods, departments, trends and export
+actions and the dashboard. Writes, and the reads inside a write request,
+stay on the primary ('default').
+
+Replicas lag behind the primary, so a successful write pins its session to
+the primary for PIN_SECONDS. The user's next reads then see their own edit.
+PIN_SECONDS should exceed the replication lag.
+
+Only the employees app is routed. Sessions and auth stay on the primary,
+which also keeps the pin itself consistent. Responses computed on a replica
+within PIN_SECONDS of a data change may predate it, so employees.cache does
+not store them (see may_be_stale).
+"""
+
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+ROUTED_APPS = {'employees'}
+SAFE_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+SESSION_KEY = '_employees_primary_until'
+
+DEFAULT_SETTINGS = {
+    'ALIASES': [],
+    'PIN_SECONDS': 5,
+}
+
+# The replica alias the current request reads from, None for the primary
+_replica = ContextVar('employees_replica', default=None)
+
+_counter = itertools.count()
+_counter_lock = threading.Lock()
+
+
+def get_setting(name):
+    return getattr(settings, 'EMPLOYEES_REPLICAS', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def current():
+    return _replica.get()
+
+
+def choose():
+    """The next replica alias, round-robin; None when there are none"""
+    aliases = get_setting('ALIASES')
+    if not aliases:
+        return None
+    with _counter_lock:
+        index = next(_counter)
+    return aliases[index % len(aliases)]
+
+
+@contextmanager
+def reading_from(alias):
+    token = _replica.set(alias)
+    try:
+        yield alias
+    finally:
+        _replica.reset(token)
+
+
+def may_be_stale(last_modified):
+    """Whether a response read now may miss a change made at last_modified"""
+    return current() is not None and time.time() - last_modified < get_setting('PIN_SECONDS')
+
+
+class ReplicaRouter:
+    """Reads go to the request's replica, if any; writes and migrations to the primary"""
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label not in ROUTED_APPS:
+            return None
+        return current()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in get_setting('ALIASES'):
+            return False
+        return None
+
+
+# ==============================
+# Middleware
+# ==============================
+
+def pinned(request):
+    session = getattr(request, 'session', None)
+    return session is not None and session.get(SESSION_KEY, 0) > time.time()
+
+
+def pin(request):
+    session = getattr(request, 'session', None)
+    if session is None:
+        return
+    until = time.time() + get_setting('PIN_SECONDS')
+    # Skip the session write while most of the current pin is left
+    if session.get(SESSION_KEY, 0) < until - get_setting('PIN_SECONDS') / 2:
+        session[SESSION_KEY] = until
+
+
+class ReplicaRoutingMiddleware:
+    """Route safe requests to a replica unless the session wrote recently; place after SessionMiddleware"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with reading_from(self.replica_for(request)) as alias:
+            response = self.get_response(request)
+        return self.complete(request, response, alias)
+
+    async def __acall__(self, request):
+        alias = await self.areplica_for(request)
+        with reading_from(alias):
+            response = await self.get_response(request)
+        return self.complete(request, response, alias)
+
+    def replica_for(self, request):
+        if request.method not in SAFE_METHODS or pinned(request):
+            return None
+        return choose()
+
+    async def areplica_for(self, request):
+        if request.method not in SAFE_METHODS:
+            return None
+        session = getattr(request, 'session', None)
+        if session is not None and await session.aget(SESSION_KEY, 0) > time.time():
+            return None
+        return choose()
+
+    def complete(self, request, response, alias):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin(request)
+        if response.streaming and alias is not None:
+            # Exports query while the body is iterated, after __call__ returned
+            response.streaming_content = self.stream(response.streaming_content, alias)
+        return response
+
+    def stream(self, content, alias):
+        chunks = iter(content)
+        while True:
+            # Set around each step only: the server may resume the generator
+            # from another thread or context
+            with reading_from(alias):
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    return
+            yield chunk
@@ -0,0 +1,158 @@
+# employees/representation.py
+
+"""Compiled to_representation for read-heavy serializers.
+
+DRF serializes each field of each row in two steps. field.get_attribute()
+walks the source, checking at every step whether the value is a simple
+callable. field.to_representation() then converts the value. For the plain
+columns, properties and methods our list serializers read, most of that
+work returns the value unchanged. On large pages it costs more than the
+query.
+
+FastRepresentationMixin works out once per serializer instance how each
+field reads its value. For a many=True list this is once per response. It
+then reads each row with direct attribute access. These fields get a fast
+reader:
+
+* SerializerMethodField, which calls the bound method;
+* Char/Integer/FloatField over a model field, property or argument-less
+  method, including through forward relations;
+* ISO-formatted DateField;
+* PrimaryKeyRelatedField, which reads the foreign key's attname.
+
+All other fields take DRF's path. So does any row where a fast reader hits
+a missing relation. The output is identical either way.
+"""
+
+import inspect
+from operator import attrgetter
+
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
+from rest_framework import ISO_8601, serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+from rest_framework.settings import api_settings
+
+# These to_representation methods only coerce a value that the model
+# already returns with that type
+COERCIONS = {
+    serializers.CharField.to_representation: str,
+    serializers.IntegerField.to_representation: int,
+    serializers.FloatField.to_representation: float,
+}
+
+
+def source_reader(model, attrs):
+    """instance -> value along attrs, or None when a step is not a field, property or simple method of model"""
+    steps = []
+    for attr in attrs:
+        if model is None:
+            return None
+        descriptor = inspect.getattr_static(model, attr, None)
+        if inspect.isfunction(descriptor):
+            parameters = list(inspect.signature(descriptor).parameters.values())[1:]
+            if any(parameter.default is inspect.Parameter.empty for parameter in parameters):
+                return None
+            steps.append((attr, True))
+            model = None
+            continue
+        try:
+            model_field = model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            if not isinstance(descriptor, property):
+                return None
+            steps.append((attr, False))
+            model = None
+            continue
+        if model_field.many_to_many or model_field.one_to_many:
+            return None
+        steps.append((attr, False))
+        model = model_field.related_model
+
+    if len(steps) == 1 and not steps[0][1]:
+        return attrgetter(steps[0][0])
+
+    def read(instance):
+        for attr, call in steps:
+            instance = getattr(instance, attr)
+            if call:
+                instance = instance()
+        return instance
+    return read
+
+
+def fast_reader(serializer, field):
+    """instance -> field representation, as DRF would produce it, or None to use DRF's path"""
+    if isinstance(field, serializers.SerializerMethodField):
+        return getattr(serializer, field.method_name)
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if model is None or field.source == '*':
+        return None
+    represent = type(field).to_representation
+
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        if (
+            represent is not serializers.PrimaryKeyRelatedField.to_representation
+            or field.pk_field is not None or len(field.source_attrs) != 1
+            or not field.use_pk_only_optimization()
+        ):
+            return None
+        try:
+            return attrgetter(model._meta.get_field(field.source).attname)
+        except FieldDoesNotExist:
+            return None
+
+    read = source_reader(model, field.source_attrs)
+    if read is None:
+        return None
+    if represent in COERCIONS:
+        coerce = COERCIONS[represent]
+
+        def coerced(instance):
+            value = read(instance)
+            return None if value is None else coerce(value)
+        return coerced
+    if represent is serializers.DateField.to_representation:
+        output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+        if output_format is None or output_format.lower() != ISO_8601:
+            return None
+
+        def iso_date(instance):
+            value = read(instance)
+            if not value:
+                return None
+            return value if isinstance(value, str) else value.isoformat()
+        return iso_date
+    return None
+
+
+class FastRepresentationMixin:
+    """Serialize rows with readers compiled once per serializer instance (see module docstring)"""
+    fast_representation = True
+
+    def representation_plan(self):
+        plan = self.__dict__.get('_representation_plan')
+        if plan is None:
+            plan = self._representation_plan = [
+                (field.field_name, field, fast_reader(self, field) if self.fast_representation else None)
+                for field in self._readable_fields
+            ]
+        return plan
+
+    def to_representation(self, instance):
+        ret = {}
+        for name, field, read in self.representation_plan():
+            if read is not None:
+                try:
+                    ret[name] = read(instance)
+                    continue
+                except (AttributeError, ObjectDoesNotExist):
+                    # Let DRF decide: None, the default or a skipped field
+                    pass
+            try:
+                attribute = field.get_attribute(instance)
+            except SkipField:
+                continue
+            check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+            ret[name] = None if check_for_none is None else field.to_representation(attribute)
+        return ret
@@ -0,0 +1,332 @@
+# employees/rollups.py
+
+"""Incremental maintenance of DepartmentRollup and EmployeeRollup.
+
+Every review contributes to three rows: its employee's EmployeeRollup, its
+department's row for the review period and its department's total row
+(review_period ''). Deltas are applied with F() expressions so concurrent
+writers never lose updates. EmployeeRollup.rating_mean, which the
+leaderboard indexes, is recomputed from the stored counters afterwards.
+The signal handlers in employees.signals keep the rollups in step with
+single-row writes; bulk writers suspend those handlers and apply one
+aggregated RollupDelta themselves.
+
+Applying a delta also refreshes the review stats stored on each affected
+Employee (reviews_count, average_rating, latest_review_period and the
+rating_order sort key), so serializing an employee reads them off its own
+row. rebuild() and verify() cover those columns too.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, FloatField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast, Coalesce
+
+from .periods import period_fields
+
+TOTAL_PERIOD = ''
+COUNTER_FIELDS = [
+    'review_count', 'rating_sum',
+    'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5',
+]
+
+
+class RollupDelta:
+    """Accumulates counter changes per rollup row and applies them in one pass"""
+
+    def __init__(self):
+        self.departments = defaultdict(Counter)
+        self.employees = defaultdict(Counter)
+        self.employee_departments = {}
+
+    def add_review(self, employee_id, department, review_period, rating, count=1):
+        """Add (or with a negative count, remove) reviews with the given rating"""
+        changes = {'review_count': count, 'rating_sum': count * rating}
+        if 1 <= rating <= 5:
+            changes[f'rating_{rating}'] = count
+        for period in (review_period, TOTAL_PERIOD):
+            self.departments[(department, period)].update(changes)
+        self.employees[employee_id].update(changes)
+        self.employee_departments[employee_id] = department
+
+    def add_employee(self, department, count=1):
+        self.departments[(department, TOTAL_PERIOD)]['employee_count'] += count
+
+    def apply(self):
+        from .models import DepartmentRollup, EmployeeRollup
+
+        for (department, period), changes in self.departments.items():
+            _apply_changes(
+                DepartmentRollup,
+                {'department': department, 'review_period': period},
+                changes,
+                defaults=period_fields(period),
+            )
+        if len(self.employees) > 1:
+            self._apply_employees_in_bulk(EmployeeRollup)
+        else:
+            for employee_id, changes in self.employees.items():
+                _apply_changes(
+                    EmployeeRollup,
+                    {'employee_id': employee_id},
+                    changes,
+                    defaults={'department': self.employee_departments[employee_id]},
+                )
+            refresh_means(employee_ids=list(self.employees))
+        if self.employees:
+            refresh_review_stats(employee_ids=list(self.employees))
+
+    def _apply_employees_in_bulk(self, EmployeeRollup):
+        """Lock, update and create the employee rows in a constant number of queries"""
+        existing = EmployeeRollup.objects.select_for_update().filter(
+            employee_id__in=list(self.employees)
+        ).in_bulk(field_name='employee_id')
+        updated, created = [], []
+        for employee_id, changes in self.employees.items():
+            changes = {field: value for field, value in changes.items() if value}
+            if not changes:
+                continue
+            rollup = existing.get(employee_id)
+            if rollup is not None:
+                for field, value in changes.items():
+                    setattr(rollup, field, getattr(rollup, field) + value)
+                rollup.rating_mean = rating_mean(rollup.rating_sum, rollup.review_count)
+                updated.append(rollup)
+            elif all(value > 0 for value in changes.values()):
+                created.append(EmployeeRollup(
+                    employee_id=employee_id,
+                    department=self.employee_departments[employee_id],
+                    rating_mean=rating_mean(changes.get('rating_sum', 0), changes.get('review_count', 0)),
+                    **changes
+                ))
+        # The rows are locked, so the means computed here cannot go stale
+        EmployeeRollup.objects.bulk_update(updated, COUNTER_FIELDS + ['rating_mean'], batch_size=500)
+        EmployeeRollup.objects.bulk_create(created, batch_size=500)
+
+
+def _apply_changes(model, key, changes, defaults=None):
+    changes = {field: value for field, value in changes.items() if value}
+    if not changes:
+        return
+    updates = {field: F(field) + value for field, value in changes.items()}
+    if model.objects.filter(**key).update(**updates):
+        return
+    if any(value < 0 for value in changes.values()):
+        # Nothing to subtract from; rebuild_rollups --verify will report the drift
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **(defaults or {}), **changes)
+    except IntegrityError:
+        # Another writer created the row first
+        model.objects.filter(**key).update(**updates)
+
+
+def rating_mean(rating_sum, review_count):
+    return rating_sum / review_count if review_count > 0 else 0.0
+
+
+def refresh_means(apps=None, employee_ids=None):
+    """Recompute EmployeeRollup.rating_mean from the counters, in SQL"""
+    # A separate UPDATE: MySQL evaluates SET assignments left to right, so
+    # the counter increments and the mean cannot share one statement portably
+    _, EmployeeRollup = _rollup_models(apps)
+    rows = EmployeeRollup.objects.all()
+    if employee_ids is not None:
+        rows = rows.filter(employee_id__in=employee_ids)
+    return rows.update(rating_mean=Case(
+        When(review_count__gt=0, then=Cast('rating_sum', FloatField()) / F('review_count')),
+        default=0.0,
+        output_field=FloatField(),
+    ))
+
+
+def refresh_review_stats(apps=None, employee_ids=None):
+    """Copy review_count and rating_mean from EmployeeRollup onto Employee and refresh latest_review_period"""
+    Employee, PerformanceReview = _models(apps)
+    _, EmployeeRollup = _rollup_models(apps)
+    if not _has_review_stats(Employee):
+        return 0
+    # This transaction has just updated (and so locked) the rollup rows, so
+    # the counters read here include every committed review
+    rollup = EmployeeRollup.objects.filter(employee_id=OuterRef('pk'), review_count__gt=0)
+    rows = Employee.objects.all()
+    if employee_ids is not None:
+        rows = rows.filter(pk__in=employee_ids)
+    stats = {
+        'reviews_count': Coalesce(Subquery(rollup.values('review_count')), 0),
+        'average_rating': Subquery(rollup.values('rating_mean')),
+        'latest_review_period': Subquery(_latest_period(PerformanceReview)),
+    }
+    if _has_rating_order(Employee):
+        stats['rating_order'] = Coalesce(Subquery(rollup.values('rating_mean')), Value(0.0))
+    return rows.update(**stats)
+
+
+def _latest_period(PerformanceReview):
+    # review_employee_date_idx, newest first
+    return PerformanceReview.objects.filter(employee_id=OuterRef('pk')).order_by(
+        '-review_date', '-id'
+    ).values('review_period')[:1]
+
+
+def reviews_delta(reviews, count=1):
+    """RollupDelta for an iterable of (employee_id, department, review_period, rating)"""
+    delta = RollupDelta()
+    for employee_id, department, review_period, rating in reviews:
+        delta.add_review(employee_id, department, review_period, rating, count)
+    return delta
+
+
+# ==============================
+# Rebuild and verification
+# ==============================
+
+def compute_rollups(apps=None):
+    """Compute the rollups from scratch with GROUP BY queries"""
+    Employee, PerformanceReview = _models(apps)
+    delta = RollupDelta()
+    headcounts = Employee.objects.values_list('department').annotate(count=Count('id')).order_by()
+    for department, count in headcounts:
+        delta.add_employee(department, count)
+    reviews = PerformanceReview.objects.values_list(
+        'employee_id', 'employee__department', 'review_period', 'rating'
+    ).annotate(count=Count('id')).order_by()
+    for employee_id, department, review_period, rating, count in reviews:
+        delta.add_review(employee_id, department, review_period, rating, count)
+    return delta
+
+
+def rebuild(apps=None):
+    """Replace every rollup row with freshly computed values"""
+    DepartmentRollup, EmployeeRollup = _rollup_models(apps)
+    expected = compute_rollups(apps)
+    with transaction.atomic():
+        DepartmentRollup.objects.all().delete()
+        EmployeeRollup.objects.all().delete()
+        DepartmentRollup.objects.bulk_create([
+            DepartmentRollup(
+                department=department, review_period=period,
+                **_period_defaults(DepartmentRollup, period), **changes
+            )
+            for (department, period), changes in expected.departments.items()
+        ], batch_size=1000)
+        EmployeeRollup.objects.bulk_create([
+            EmployeeRollup(
+                employee_id=employee_id,
+                department=expected.employee_departments[employee_id],
+                **_mean_defaults(EmployeeRollup, changes),
+                **changes
+            )
+            for employee_id, changes in expected.employees.items()
+        ], batch_size=1000)
+        refresh_review_stats(apps)
+    return expected
+
+
+def verify(apps=None):
+    """Return a list of human readable differences between stored and computed rollups"""
+    DepartmentRollup, EmployeeRollup = _rollup_models(apps)
+    expected = compute_rollups(apps)
+    problems = []
+
+    stored = {
+        (row['department'], row['review_period']): row
+        for row in DepartmentRollup.objects.values('department', 'review_period', 'employee_count', *COUNTER_FIELDS)
+    }
+    fields = ['employee_count'] + COUNTER_FIELDS
+    for key in set(stored) | set(expected.departments):
+        problems.extend(_compare(f'department {key}', fields, stored.get(key, {}), expected.departments.get(key, {})))
+
+    stored = {
+        row['employee_id']: row
+        for row in EmployeeRollup.objects.values('employee_id', 'department', 'rating_mean', *COUNTER_FIELDS)
+    }
+    for employee_id in set(stored) | set(expected.employees):
+        row = stored.get(employee_id, {})
+        label = f'employee {employee_id}'
+        problems.extend(_compare(label, COUNTER_FIELDS, row, expected.employees.get(employee_id, {})))
+        department = expected.employee_departments.get(employee_id)
+        if row and department is not None and row['department'] != department:
+            problems.append(f"{label}: department is {row['department']!r}, expected {department!r}")
+        if row and abs(row['rating_mean'] - rating_mean(row['rating_sum'], row['review_count'])) > 1e-9:
+            problems.append(f"{label}: rating_mean is {row['rating_mean']}, expected rating_sum / review_count")
+    problems.extend(_verify_review_stats(apps, expected))
+    return problems
+
+
+def _verify_review_stats(apps, expected):
+    Employee, PerformanceReview = _models(apps)
+    if not _has_review_stats(Employee):
+        return []
+    problems = []
+    rows = Employee.objects.annotate(
+        expected_latest=Subquery(_latest_period(PerformanceReview)),
+        # Historical models before 0011 have no rating_order to check
+        stored_order=F('rating_order') if _has_rating_order(Employee) else Value(None, output_field=FloatField()),
+    ).values_list(
+        'pk', 'reviews_count', 'average_rating', 'latest_review_period', 'expected_latest', 'stored_order'
+    ).order_by()
+    for employee_id, count, average, latest, expected_latest, order in rows:
+        label = f'employee {employee_id}'
+        changes = expected.employees.get(employee_id, {})
+        expected_count = changes.get('review_count', 0)
+        if count != expected_count:
+            problems.append(f'{label}: reviews_count is {count}, expected {expected_count}')
+        expected_average = rating_mean(changes.get('rating_sum', 0), expected_count) if expected_count else None
+        if (average is None) != (expected_average is None) or (
+            average is not None and abs(average - expected_average) > 1e-9
+        ):
+            problems.append(f'{label}: average_rating is {average}, expected {expected_average}')
+        if latest != expected_latest:
+            problems.append(f'{label}: latest_review_period is {latest!r}, expected {expected_latest!r}')
+        if order is not None and abs(order - (expected_average or 0)) > 1e-9:
+            problems.append(f'{label}: rating_order is {order}, expected {expected_average or 0}')
+    return problems
+
+
+def _period_defaults(DepartmentRollup, period):
+    # Historical models in migrations before 0005 have no period columns
+    if not any(field.name == 'period_year' for field in DepartmentRollup._meta.fields):
+        return {}
+    return period_fields(period)
+
+
+def _mean_defaults(EmployeeRollup, changes):
+    # Historical models in migrations before 0006 have no rating_mean
+    if not any(field.name == 'rating_mean' for field in EmployeeRollup._meta.fields):
+        return {}
+    return {'rating_mean': rating_mean(changes.get('rating_sum', 0), changes.get('review_count', 0))}
+
+
+def _has_review_stats(Employee):
+    # Historical models in migrations before 0008 have no review stats
+    return any(field.name == 'reviews_count' for field in Employee._meta.fields)
+
+
+def _has_rating_order(Employee):
+    # Historical models in migrations before 0011 have no rating_order
+    return any(field.name == 'rating_order' for field in Employee._meta.fields)
+
+
+def _compare(label, fields, stored, expected):
+    return [
+        f'{label}: {field} is {stored.get(field) or 0}, expected {expected.get(field, 0)}'
+        for field in fields
+        if (stored.get(field) or 0) != expected.get(field, 0)
+    ]
+
+
+def _models(apps):
+    if apps is None:
+        from .models import Employee, PerformanceReview
+        return Employee, PerformanceReview
+    return apps.get_model('employees', 'Employee'), apps.get_model('employees', 'PerformanceReview')
+
+
+def _rollup_models(apps):
+    if apps is None:
+        from .models import DepartmentRollup, EmployeeRollup
+        return DepartmentRollup, EmployeeRollup
+    return apps.get_model('employees', 'DepartmentRollup'), apps.get_model('employees', 'EmployeeRollup')
@@ -0,0 +1,253 @@
+# employees/search.py
+
+"""Inverted index over employees and review feedback, stored in SearchPosting.
+
+Every searchable document (an employee or a review) is split into
+normalized terms; each (term, document) pair is one posting whose weight
+is the sum of the weights of the fields the term occurs in. A query matches
+the documents that contain every query term, where the last term also
+matches as a prefix so the endpoint can drive a typeahead. Documents are
+ranked by the summed weight of their matching postings, with exact matches
+counting double.
+
+Lookups are range scans of search_term_idx, so they stay cheap however
+large the feedback column grows, and nothing outside the database is
+needed. The signal handlers in employees.signals re-index single-row
+writes; bulk writers call index_employees/index_reviews/remove themselves.
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Max, Q, Sum, When
+
+EMPLOYEE = 'employee'
+REVIEW = 'review'
+KINDS = (EMPLOYEE, REVIEW)
+
+EMPLOYEE_FIELDS = {'first_name': 10, 'last_name': 10, 'email': 4, 'department': 3}
+REVIEW_FIELDS = {'feedback': 1, 'review_period': 2}
+
+MAX_TERM_LENGTH = 40
+MIN_PREFIX_LENGTH = 2
+MAX_QUERY_TERMS = 8
+
+# Only dropped from feedback, where they would be the largest posting lists
+STOPWORDS = frozenset(
+    'a an and are as at be but by for from has have in is it its of on or '
+    'that the this to was were will with'.split()
+)
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Lowercase and strip accents so 'José' and 'jose' index the same"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+@lru_cache(maxsize=8192)
+def _tokenize(text):
+    return tuple(term for term in TOKEN_RE.findall(normalize(text)) if len(term) <= MAX_TERM_LENGTH)
+
+
+def tokenize(text):
+    # Names, departments and periods repeat a lot; the cache skips re-normalizing them
+    return list(_tokenize(text)) if text else []
+
+
+def document_terms(values, field_weights):
+    """{term: weight} for one document given {field: text}"""
+    weights = Counter()
+    for field, weight in field_weights.items():
+        for term in tokenize(values.get(field)):
+            if field == 'feedback' and term in STOPWORDS:
+                continue
+            weights[term] += weight
+    return weights
+
+
+# ==============================
+# Indexing
+# ==============================
+
+def _posting_rows(kind, rows, field_weights):
+    """(term, kind, object_id, employee_id, weight) for rows of {'id', 'employee_id', <fields>}"""
+    return [
+        (term, kind, row['id'], row['employee_id'], weight)
+        for row in rows
+        for term, weight in document_terms(row, field_weights).items()
+    ]
+
+
+def _postings(SearchPosting, kind, rows, field_weights):
+    fields = ['term', 'kind', 'object_id', 'employee_id', 'weight']
+    return [SearchPosting(**dict(zip(fields, posting))) for posting in _posting_rows(kind, rows, field_weights)]
+
+
+def _insert(SearchPosting, postings):
+    """executemany straight into the table; ORM instances cost more than the insert at rebuild scale"""
+    if not postings:
+        return 0
+    table = connection.ops.quote_name(SearchPosting._meta.db_table)
+    names = ', '.join(
+        connection.ops.quote_name(column) for column in ['term', 'kind', 'object_id', 'employee_id', 'weight']
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(f'INSERT INTO {table} ({names}) VALUES (%s, %s, %s, %s, %s)', postings)
+    return len(postings)
+
+
+def _employee_rows(employees):
+    return [
+        {'id': employee.pk, 'employee_id': employee.pk, **{field: getattr(employee, field) for field in EMPLOYEE_FIELDS}}
+        for employee in employees
+    ]
+
+
+def _review_rows(reviews):
+    return [
+        {'id': review.pk, 'employee_id': review.employee_id, **{field: getattr(review, field) for field in REVIEW_FIELDS}}
+        for review in reviews
+    ]
+
+
+def index_employees(employees, new=False):
+    """(Re-)index employee instances; new=True skips removing postings that cannot exist yet"""
+    _index(EMPLOYEE, _employee_rows(employees), EMPLOYEE_FIELDS, new)
+
+
+def index_reviews(reviews, new=False):
+    _index(REVIEW, _review_rows(reviews), REVIEW_FIELDS, new)
+
+
+def _index(kind, rows, field_weights, new):
+    from .models import SearchPosting
+
+    with transaction.atomic():
+        if not new:
+            remove(kind, [row['id'] for row in rows])
+        SearchPosting.objects.bulk_create(_postings(SearchPosting, kind, rows, field_weights), batch_size=1000)
+
+
+def remove(kind, ids):
+    """Drop the postings of documents; employee deletes cascade to their postings on their own"""
+    from .models import SearchPosting
+
+    if ids:
+        SearchPosting.objects.filter(kind=kind, object_id__in=list(ids)).delete()
+
+
+def rebuild(apps=None, batch_size=2000):
+    """Re-index every employee and review; returns the number of postings written"""
+    Employee, PerformanceReview, SearchPosting = _models(apps)
+    sources = [
+        (EMPLOYEE, Employee.objects.annotate(employee_id=F('id')), EMPLOYEE_FIELDS),
+        (REVIEW, PerformanceReview.objects.all(), REVIEW_FIELDS),
+    ]
+    written = 0
+    with transaction.atomic():
+        SearchPosting.objects.all().delete()
+        for kind, queryset, field_weights in sources:
+            rows = queryset.order_by().values('id', 'employee_id', *field_weights)
+            batch = []
+            for row in rows.iterator(chunk_size=batch_size):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    written += _insert(SearchPosting, _posting_rows(kind, batch, field_weights))
+                    batch = []
+            written += _insert(SearchPosting, _posting_rows(kind, batch, field_weights))
+    _analyze(SearchPosting)
+    return written
+
+
+def _analyze(SearchPosting):
+    """Refresh the planner statistics after a rebuild"""
+    # Without them SQLite walks search_document_idx to avoid sorting for the
+    # GROUP BY, reading every posting of a kind instead of the matching terms
+    table = connection.ops.quote_name(SearchPosting._meta.db_table)
+    statement = 'ANALYZE TABLE {}' if connection.vendor == 'mysql' else 'ANALYZE {}'
+    with connection.cursor() as cursor:
+        cursor.execute(statement.format(table))
+
+
+# ==============================
+# Queries
+# ==============================
+
+def parse_query(query):
+    """(exact terms, prefix term or None) for a user query"""
+    terms = tokenize(query)[:MAX_QUERY_TERMS]
+    if not terms:
+        return [], None
+    *exact, last = terms
+    # Stopwords have no feedback postings; requiring them would hide reviews
+    exact = [term for term in dict.fromkeys(exact) if term not in STOPWORDS]
+    if len(last) < MIN_PREFIX_LENGTH:
+        return exact + [last], None
+    return exact, last
+
+
+def _term_filter(term, prefix):
+    if prefix:
+        # A range rather than LIKE so every backend can use search_term_idx
+        return Q(term__gte=term, term__lt=term + '\uffff')
+    return Q(term=term)
+
+
+def matches(query, kind):
+    """Postings grouped per document of kind that contain every query term, with a score"""
+    from .models import SearchPosting
+
+    exact, prefix = parse_query(query)
+    conditions = [_term_filter(term, False) for term in exact]
+    if prefix:
+        conditions.append(_term_filter(prefix, True))
+    if not conditions:
+        return SearchPosting.objects.none().values('object_id')
+
+    any_term = Q()
+    for condition in conditions:
+        any_term |= condition
+    required = {
+        f'matched_{position}': Max(Case(When(condition, then=1), default=0, output_field=IntegerField()))
+        for position, condition in enumerate(conditions)
+    }
+    return SearchPosting.objects.filter(any_term, kind=kind).values('object_id').annotate(
+        score=Sum(Case(
+            When(term__in=exact + ([prefix] if prefix else []), then=F('weight') * 2),
+            default=F('weight'),
+            output_field=IntegerField(),
+        )),
+        **required
+    ).filter(**{name: 1 for name in required}).order_by()
+
+
+def search(query, kinds=KINDS, limit=20):
+    """[(kind, object_id, score)] of the best matching documents, best first"""
+    results = []
+    for kind in kinds:
+        ranked = matches(query, kind).order_by('-score', 'object_id').values_list('object_id', 'score')[:limit]
+        results.extend((kind, object_id, score) for object_id, score in ranked)
+    results.sort(key=lambda result: (-result[2], result[0], result[1]))
+    return results[:limit]
+
+
+def matching_ids(query, kind):
+    """Subquery of the ids of kind matching query, for pk__in filters"""
+    return matches(query, kind).values('object_id')
+
+
+def _models(apps):
+    if apps is None:
+        from .models import Employee, PerformanceReview, SearchPosting
+        return Employee, PerformanceReview, SearchPosting
+    return (
+        apps.get_model('employees', 'Employee'),
+        apps.get_model('employees', 'PerformanceReview'),
+        apps.get_model('employees', 'SearchPosting'),
+    )
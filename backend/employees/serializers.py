@@ -1,9 +1,12 @@
 # employees/serializers.py
 
 from rest_framework import serializers
-from .models import Employee, PerformanceReview
+from rest_framework.reverse import reverse
+from .models import Employee, EmployeeRollup, Job, PerformanceReview
+from .representation import FastRepresentationMixin
+from .sparse import SparseFieldsSerializerMixin
 
-class PerformanceReviewSerializer(serializers.ModelSerializer):
+class PerformanceReviewSerializer(SparseFieldsSerializerMixin, FastRepresentationMixin, serializers.ModelSerializer):
     rating_display = serializers.CharField(source='get_rating_display', read_only=True)
     employee_name = serializers.CharField(source='employee.full_name', read_only=True)
     
@@ -13,11 +16,25 @@ class PerformanceReviewSerializer(serializers.ModelSerializer):
             'id', 'review_period', 'rating', 'rating_display', 
             'feedback', 'review_date', 'employee', 'employee_name'
         ]
+        # Columns behind computed fields, for ?fields= (employees.sparse)
+        field_columns = {
+            'rating_display': ['rating'],
+            'employee_name': ['employee', 'employee__first_name', 'employee__last_name'],
+        }
+
+class ReviewStatsMixin:
+    """reviews_count, average_rating and latest_review_period are stored on
+    Employee (see employees.rollups.refresh_review_stats); the average is
+    rounded for display.
+    """
+
+    def get_average_rating(self, obj):
+        return round(obj.average_rating, 2) if obj.average_rating is not None else None
+
 #nestes Serializer for detailed employee views
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(SparseFieldsSerializerMixin, FastRepresentationMixin, ReviewStatsMixin, serializers.ModelSerializer):
     full_name = serializers.CharField(read_only=True)
     performance_reviews = PerformanceReviewSerializer(many=True, read_only=True)
-    reviews_count = serializers.SerializerMethodField()
     average_rating = serializers.SerializerMethodField()
     
     class Meta:
@@ -27,22 +44,15 @@ class EmployeeSerializer(serializers.ModelSerializer):
             'email', 'department', 'date_of_joining',
             'performance_reviews', 'reviews_count', 'average_rating'
         ]
-    
-    def get_reviews_count(self, obj):
-        return obj.performance_reviews.count()
-    
-    def get_average_rating(self, obj):
-        reviews = obj.performance_reviews.all()
-        if reviews:
-            return round(sum(review.rating for review in reviews) / len(reviews), 2)
-        return None
+        field_columns = {
+            'full_name': ['first_name', 'last_name'],
+            'average_rating': ['average_rating'],
+        }
 
 # Simple serializer for list views (without nested reviews)
-class EmployeeListSerializer(serializers.ModelSerializer):
+class EmployeeListSerializer(SparseFieldsSerializerMixin, FastRepresentationMixin, ReviewStatsMixin, serializers.ModelSerializer):
     full_name = serializers.CharField(read_only=True)
-    reviews_count = serializers.SerializerMethodField()
     average_rating = serializers.SerializerMethodField()
-    latest_review_period = serializers.SerializerMethodField()
     
     class Meta:
         model = Employee
@@ -51,16 +61,78 @@ class EmployeeListSerializer(serializers.ModelSerializer):
             'email', 'department', 'date_of_joining',
             'reviews_count', 'average_rating', 'latest_review_period'
         ]
-    
-    def get_reviews_count(self, obj):
-        return obj.performance_reviews.count()
-    
-    def get_average_rating(self, obj):
-        reviews = obj.performance_reviews.all()
-        if reviews:
-            return round(sum(review.rating for review in reviews) / len(reviews), 2)
-        return None
-    
-    def get_latest_review_period(self, obj):
-        latest_review = obj.performance_reviews.first()
-        return latest_review.review_period if latest_review else None
\ No newline at end of file
+        field_columns = EmployeeSerializer.Meta.field_columns
+
+
+class LeaderboardEntrySerializer(FastRepresentationMixin, serializers.ModelSerializer):
+    """One EmployeeRollup on a leaderboard page; rank and percentile come from leaderboard.with_ranks"""
+    rank = serializers.IntegerField(read_only=True)
+    percentile = serializers.FloatField(read_only=True)
+    full_name = serializers.CharField(source='employee.full_name', read_only=True)
+    average_rating = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = EmployeeRollup
+        fields = ['rank', 'percentile', 'employee', 'full_name', 'department', 'average_rating', 'review_count']
+
+
+# ==============================
+# Bulk row serializers
+# ==============================
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Resolves primary keys from context['preloaded'][field_name] instead of one query per row"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.context['preloaded'][self.field_name][pk]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class BulkPerformanceReviewSerializer(serializers.ModelSerializer):
+    """Validates one row of a bulk write; (employee, review_period) uniqueness is checked set-based"""
+    employee = PreloadedPrimaryKeyRelatedField(queryset=Employee.objects.all())
+
+    class Meta:
+        model = PerformanceReview
+        fields = ['id', 'review_period', 'rating', 'feedback', 'review_date', 'employee']
+        validators = []
+
+
+class BulkEmployeeSerializer(serializers.ModelSerializer):
+    """Validates one row of a bulk write; email uniqueness is checked set-based"""
+
+    class Meta:
+        model = Employee
+        fields = ['id', 'first_name', 'last_name', 'email', 'department', 'date_of_joining']
+        extra_kwargs = {'email': {'validators': []}}
+
+
+# ==============================
+# Background jobs
+# ==============================
+
+class JobSerializer(serializers.ModelSerializer):
+    """A job's state for polling clients; result_url is set once a result can be fetched"""
+    result_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'kind', 'params', 'status', 'progress', 'progress_message',
+            'attempts', 'max_attempts', 'cancel_requested', 'error',
+            'created_at', 'started_at', 'finished_at', 'result', 'result_url',
+        ]
+        read_only_fields = [field for field in fields if field not in ('kind', 'params')]
+
+    def get_result_url(self, obj):
+        if obj.status != Job.SUCCEEDED:
+            return None
+        return reverse('report-result', args=[obj.pk], request=self.context.get('request'))
@@ -0,0 +1,225 @@
+# employees/signals.py
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.auth.models import User
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import cache, changes, rollups, search
+from .models import Employee, EmployeeRollup, PerformanceReview
+
+
+_suspended = ContextVar('employees_signals_suspended', default=False)
+
+
+@contextmanager
+def suspended():
+    """Skip the handlers below; bulk writers apply the side effects themselves"""
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def active():
+    return not _suspended.get()
+
+
+def _is_employee_cascade(origin):
+    if isinstance(origin, QuerySet):
+        return origin.model is Employee
+    return isinstance(origin, Employee)
+
+
+# ==============================
+# Change log
+# ==============================
+# Registered first so the change log lock is taken before the handlers
+# below, or the write itself, lock anything else (see employees.changes)
+
+@receiver(pre_save, sender=Employee)
+@receiver(pre_save, sender=PerformanceReview)
+@receiver(pre_delete, sender=PerformanceReview)
+def lock_change_log(sender, raw=False, origin=None, **kwargs):
+    # Cascaded reviews were logged with their employee
+    if raw or _is_employee_cascade(origin) or not active():
+        return
+    changes.lock()
+
+
+@receiver(pre_delete, sender=Employee)
+def log_employee_delete(sender, instance, **kwargs):
+    if not active():
+        return
+    review_ids = instance.performance_reviews.values_list('pk', flat=True)
+    changes.record(changes.deletes(changes.REVIEW, review_ids) + changes.deletes(changes.EMPLOYEE, [instance.pk]))
+
+
+@receiver(post_save, sender=Employee)
+def log_employee_save(sender, instance, raw=False, **kwargs):
+    if raw or not active():
+        return
+    changes.record(changes.upserts(changes.EMPLOYEE, [instance.pk]))
+
+
+@receiver(post_save, sender=PerformanceReview)
+def log_review_save(sender, instance, raw=False, **kwargs):
+    if raw or not active():
+        return
+    # The employee's stored review stats changed too, and on a move the
+    # previous employee's
+    previous = getattr(instance, '_rollup_previous', None)
+    employee_ids = [instance.employee_id] + ([previous[0]] if previous else [])
+    changes.record(
+        changes.upserts(changes.REVIEW, [instance.pk]) + changes.upserts(changes.EMPLOYEE, employee_ids)
+    )
+
+
+@receiver(post_delete, sender=PerformanceReview)
+def log_review_delete(sender, instance, origin=None, **kwargs):
+    if _is_employee_cascade(origin) or not active():
+        return
+    changes.record(
+        changes.deletes(changes.REVIEW, [instance.pk]) + changes.upserts(changes.EMPLOYEE, [instance.employee_id])
+    )
+
+
+# ==============================
+# Rollup maintenance
+# ==============================
+
+@receiver(pre_save, sender=PerformanceReview)
+def remember_review(sender, instance, raw=False, **kwargs):
+    instance._rollup_previous = None
+    if raw or instance.pk is None or not active():
+        return
+    instance._rollup_previous = PerformanceReview.objects.filter(pk=instance.pk).values_list(
+        'employee_id', 'employee__department', 'review_period', 'rating'
+    ).first()
+
+
+@receiver(post_save, sender=PerformanceReview)
+def review_saved(sender, instance, raw=False, **kwargs):
+    if raw or not active():
+        return
+    delta = rollups.RollupDelta()
+    previous = getattr(instance, '_rollup_previous', None)
+    if previous:
+        delta.add_review(*previous, count=-1)
+    delta.add_review(
+        instance.employee_id, instance.employee.department,
+        instance.review_period, instance.rating
+    )
+    delta.apply()
+
+
+@receiver(post_delete, sender=PerformanceReview)
+def review_deleted(sender, instance, origin=None, **kwargs):
+    # Reviews removed by an employee cascade are handled in employee_deleting
+    if _is_employee_cascade(origin) or not active():
+        return
+    delta = rollups.RollupDelta()
+    delta.add_review(
+        instance.employee_id, instance.employee.department,
+        instance.review_period, instance.rating, count=-1
+    )
+    delta.apply()
+
+
+@receiver(pre_save, sender=Employee)
+def remember_department(sender, instance, raw=False, **kwargs):
+    instance._rollup_department = None
+    if raw or instance.pk is None or not active():
+        return
+    instance._rollup_department = Employee.objects.filter(pk=instance.pk).values_list(
+        'department', flat=True
+    ).first()
+
+
+@receiver(post_save, sender=Employee)
+def employee_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or not active():
+        return
+    delta = rollups.RollupDelta()
+    previous = getattr(instance, '_rollup_department', None)
+    if created or previous is None:
+        delta.add_employee(instance.department)
+    elif previous != instance.department:
+        # Move the employee and their reviews to the new department
+        delta.add_employee(previous, count=-1)
+        delta.add_employee(instance.department)
+        reviews = instance.performance_reviews.values_list('review_period', 'rating')
+        for review_period, rating in reviews:
+            delta.add_review(instance.pk, previous, review_period, rating, count=-1)
+            delta.add_review(instance.pk, instance.department, review_period, rating)
+        EmployeeRollup.objects.filter(employee_id=instance.pk).update(department=instance.department)
+    delta.apply()
+
+
+@receiver(pre_delete, sender=Employee)
+def employee_deleting(sender, instance, **kwargs):
+    if not active():
+        return
+    delta = rollups.RollupDelta()
+    delta.add_employee(instance.department, count=-1)
+    reviews = instance.performance_reviews.values_list('review_period', 'rating')
+    for review_period, rating in reviews:
+        delta.add_review(instance.pk, instance.department, review_period, rating, count=-1)
+    delta.apply()
+
+
+# ==============================
+# Search index
+# ==============================
+
+@receiver(post_save, sender=Employee)
+def index_employee(sender, instance, created, raw=False, **kwargs):
+    if raw or not active():
+        return
+    search.index_employees([instance], new=created)
+
+
+@receiver(post_save, sender=PerformanceReview)
+def index_review(sender, instance, created, raw=False, **kwargs):
+    if raw or not active():
+        return
+    search.index_reviews([instance], new=created)
+
+
+@receiver(post_delete, sender=PerformanceReview)
+def unindex_review(sender, instance, origin=None, **kwargs):
+    # Employee cascades remove the postings through SearchPosting.employee
+    if _is_employee_cascade(origin) or not active():
+        return
+    search.remove(search.REVIEW, [instance.pk])
+
+
+# ==============================
+# Response cache invalidation
+# ==============================
+
+@receiver(post_save, sender=Employee)
+@receiver(post_delete, sender=Employee)
+@receiver(post_save, sender=PerformanceReview)
+@receiver(post_delete, sender=PerformanceReview)
+def bump_cache_version(sender, **kwargs):
+    if active():
+        cache.bump_version(sender)
+
+
+# ==============================
+# Session user snapshots
+# ==============================
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def bump_user_version(sender, created=False, update_fields=None, **kwargs):
+    """Make check_auth reload users instead of trusting the snapshots in sessions"""
+    # Nobody holds a snapshot of a new user, and logins only touch last_login
+    if created or (update_fields and set(update_fields) == {'last_login'}):
+        return
+    cache.bump_version(User)
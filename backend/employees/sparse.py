@@ -0,0 +1,91 @@
+# employees/sparse.py
+
+"""Sparse fieldsets for the REST API: ?fields= and ?exclude=.
+
+The requested fields narrow the query as well as the JSON. Each serializer
+field reads the model column named by its source. Fields computed from
+other columns list them in the serializer's Meta.field_columns. The viewset
+then loads only those columns with only(). It also skips the prefetch of
+the nested performance_reviews, or the join to the employee behind
+employee_name, unless a requested field needs it.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+
+
+def parse_names(value):
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class SparseFieldsSerializerMixin:
+    """Accepts fields= and exclude= (iterables of field names) and drops every other field"""
+
+    def __init__(self, *args, fields=None, exclude=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        keep = set(self.fields) if fields is None else set(fields)
+        keep -= set(exclude or ())
+        for name in list(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+    def columns(self):
+        """Model field paths (for only()) read by the remaining fields"""
+        declared = getattr(self.Meta, 'field_columns', {})
+        opts = self.Meta.model._meta
+        columns = {opts.pk.name}
+        for name, field in self.fields.items():
+            if name in declared:
+                columns.update(declared[name])
+                continue
+            source = field.source.split('.')[0]
+            try:
+                model_field = opts.get_field(source)
+            except FieldDoesNotExist:
+                # '*' and properties read no column of their own
+                continue
+            if model_field.concrete:
+                columns.add(source)
+        return columns
+
+
+class SparseFieldsViewSetMixin:
+    """?fields= / ?exclude= on sparse_actions, applied to the serializer and, through only_selected(), the queryset"""
+    sparse_actions = ('list', 'retrieve')
+    fields_query_param = 'fields'
+    exclude_query_param = 'exclude'
+
+    def requested_fields(self):
+        """(field names or None for all, excluded names) for this request; 400 on unknown names"""
+        if not hasattr(self, '_requested_fields'):
+            params = self.request.query_params
+            fields = parse_names(params.get(self.fields_query_param)) or None
+            exclude = parse_names(params.get(self.exclude_query_param))
+            available = set(self.get_serializer_class()().fields)
+            unknown = (set(fields or ()) | set(exclude)) - available
+            if unknown:
+                raise ValidationError({
+                    'fields': f"Unknown field(s) {', '.join(sorted(unknown))}; available: {', '.join(sorted(available))}"
+                })
+            self._requested_fields = fields, exclude
+        return self._requested_fields
+
+    def is_sparse(self):
+        return self.action in self.sparse_actions and self.requested_fields() != (None, [])
+
+    def get_serializer(self, *args, **kwargs):
+        if self.action in self.sparse_actions:
+            fields, exclude = self.requested_fields()
+            kwargs.setdefault('fields', fields)
+            kwargs.setdefault('exclude', exclude)
+        return super().get_serializer(*args, **kwargs)
+
+    def selected_fields(self):
+        """Names of the fields the response will contain"""
+        return set(self.get_serializer().fields)
+
+    def only_selected(self, queryset, *extra):
+        """queryset loading only the columns the selected fields read, plus extra (e.g. cursor fields)"""
+        if not self.is_sparse():
+            return queryset
+        return queryset.only(*self.get_serializer().columns(), *extra)
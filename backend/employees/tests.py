@@ -1,3 +1,1758 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import sqlite3
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections, router, transaction
+from django.db.models.signals import post_save
+from django.test import Client, TestCase, TransactionTestCase, modify_settings, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import cache, changes, compression, events, exports, jobs, listing, replicas, rollups, search, throttling
+from .auth_views import SNAPSHOT_KEY
+from .periods import parse_period, sort_key
+from .metrics import registry
+from .middleware import QueryStats
+from .pool import PoolTimeout, close_pools, pooled_wrapper_class
+from .renderers import FastJSONParser, FastJSONRenderer
+from .serializers import EmployeeSerializer, PerformanceReviewSerializer
+from .models import Change, DepartmentRollup, Employee, EmployeeRollup, Job, PerformanceReview, SearchPosting
+
+
+def make_employee(index, department='Engineering', **kwargs):
+    defaults = {
+        'first_name': f'First{index}',
+        'last_name': f'Last{index:05d}',
+        'email': f'employee{index}@company.com',
+        'department': department,
+        'date_of_joining': date(2023, 1, 1),
+    }
+    defaults.update(kwargs)
+    return Employee.objects.create(**defaults)
+
+
+def make_review(employee, period='Q1 2024', rating=4, review_date=date(2024, 3, 31), **kwargs):
+    return PerformanceReview.objects.create(
+        employee=employee,
+        review_period=period,
+        rating=rating,
+        review_date=review_date,
+        **kwargs
+    )
+
+
+class APITestCase(TestCase):
+    def setUp(self):
+        cache.reset_backend()
+        self.user = User.objects.create_user(username='hr', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class EmployeeQueryCountTests(APITestCase):
+    def seed(self, count):
+        for index in range(count):
+            employee = make_employee(index)
+            make_review(employee, 'Q4 2023', 3, date(2023, 12, 31))
+            make_review(employee, 'Q1 2024', 5, date(2024, 3, 31))
+
+    def test_list_query_count_is_constant(self):
+        self.seed(3)
+        with self.assertNumQueries(2):
+            small = self.client.get('/api/employees/?expand=reviews&page_size=500')
+        for index in range(3, 40):
+            employee = make_employee(index)
+            make_review(employee, 'Q1 2024', 2)
+        with self.assertNumQueries(2):
+            large = self.client.get('/api/employees/?expand=reviews&page_size=500')
+        self.assertEqual(len(small.data['results']), 3)
+        self.assertEqual(len(large.data['results']), 40)
+
+    def test_annotated_values_match_reviews(self):
+        employee = make_employee(1)
+        make_review(employee, 'Q4 2023', 3, date(2023, 12, 31))
+        make_review(employee, 'Q1 2024', 4, date(2024, 3, 31))
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/employees/{employee.pk}/')
+        self.assertEqual(response.data['reviews_count'], 2)
+        self.assertEqual(response.data['average_rating'], 3.5)
+        self.assertEqual(len(response.data['performance_reviews']), 2)
+
+    def test_latest_review_period_is_stored(self):
+        employee = make_employee(1)
+        make_review(employee, 'Q4 2023', 3, date(2023, 12, 31))
+        latest = make_review(employee, 'Q1 2024', 4, date(2024, 3, 31))
+        employee.refresh_from_db()
+        self.assertEqual(employee.latest_review_period, 'Q1 2024')
+        latest.delete()
+        employee.refresh_from_db()
+        self.assertEqual(employee.latest_review_period, 'Q4 2023')
+
+    def test_employee_without_reviews(self):
+        employee = make_employee(1)
+        response = self.client.get(f'/api/employees/{employee.pk}/')
+        self.assertEqual(response.data['reviews_count'], 0)
+        self.assertIsNone(response.data['average_rating'])
+
+
+class EmployeePaginationTests(APITestCase):
+    def test_list_uses_slim_serializer(self):
+        employee = make_employee(1)
+        make_review(employee)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/employees/')
+        row = response.data['results'][0]
+        self.assertNotIn('performance_reviews', row)
+        self.assertEqual(row['latest_review_period'], 'Q1 2024')
+
+    def test_expand_reviews_restores_nested_form(self):
+        make_review(make_employee(1))
+        response = self.client.get('/api/employees/?expand=reviews')
+        self.assertEqual(len(response.data['results'][0]['performance_reviews']), 1)
+
+    def test_cursor_walks_every_row_once(self):
+        # Duplicate names force the id tie-breaker to be used
+        for index in range(7):
+            make_employee(index, first_name='Same', last_name='Name' if index % 2 else 'Other')
+        expected = list(Employee.objects.order_by('last_name', 'first_name', 'id').values_list('id', flat=True))
+
+        seen, url = [], '/api/employees/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            seen.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, expected)
+
+        # ... and walking back from the last page returns the previous rows
+        previous = self.client.get(response.data['previous'])
+        self.assertEqual([row['id'] for row in previous.data['results']], expected[3:6])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/employees/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_order_and_filter_by_stored_rating(self):
+        employees = [make_employee(index) for index in range(5)]
+        for employee, rating in zip(employees, [3, 5, 3, 1]):
+            make_review(employee, 'Q1 2024', rating)
+
+        seen, url = [], '/api/employees/?ordering=-average_rating&page_size=2'
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            seen.extend((row['id'], row['average_rating']) for row in response.data['results'])
+            url = response.data['next']
+        # Unrated employees sort below every rating
+        expected = [
+            (employees[index].pk, rating) for index, rating in [(1, 5.0), (2, 3.0), (0, 3.0), (3, 1.0), (4, None)]
+        ]
+        self.assertEqual(seen, expected)
+
+        response = self.client.get('/api/employees/?ordering=average_rating&page_size=2')
+        self.assertEqual([row['id'] for row in response.data['results']], [employees[4].pk, employees[3].pk])
+        previous = self.client.get(self.client.get(response.data['next']).data['previous'])
+        self.assertEqual(previous.data['results'], response.data['results'])
+
+        response = self.client.get('/api/employees/', {'min_rating': 2, 'max_rating': 4})
+        self.assertEqual([row['id'] for row in response.data['results']], [employees[0].pk, employees[2].pk])
+        self.assertEqual(self.client.get('/api/employees/', {'min_rating': 'high'}).status_code, 400)
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.employee = make_employee(1)
+        make_review(self.employee, 'Q1 2024', 4, feedback='Long feedback text')
+
+    def test_fields_narrow_the_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/employees/', {'fields': 'id,full_name'})
+        self.assertEqual(response.data['results'], [{'id': self.employee.pk, 'full_name': 'First1 Last00001'}])
+        [sql] = [query['sql'] for query in queries.captured_queries]
+        self.assertNotIn('"email"', sql)
+        # The cursor's ordering columns are loaded too, not fetched per row
+        make_employee(2)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/employees/', {'fields': 'id', 'page_size': 1})
+        self.assertEqual(len(self.client.get(response.data['next']).data['results']), 1)
+
+        with self.assertNumQueries(1):  # no prefetch without performance_reviews
+            response = self.client.get(f'/api/employees/{self.employee.pk}/', {'exclude': 'performance_reviews'})
+        self.assertNotIn('performance_reviews', response.data)
+        self.assertEqual(response.data['average_rating'], 4.0)
+
+    def test_reviews_skip_the_employee_join(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/reviews/', {'exclude': 'feedback,employee_name'})
+        self.assertNotIn('feedback', response.data[0])
+        self.assertEqual(response.data[0]['rating_display'], 'Good')
+        [sql] = [query['sql'] for query in queries.captured_queries]
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('"feedback"', sql)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/reviews/', {'fields': 'id,employee_name'})
+        self.assertEqual(response.data[0], {'id': response.data[0]['id'], 'employee_name': 'First1 Last00001'})
+
+    def test_unknown_fields_and_writes(self):
+        response = self.client.get('/api/employees/', {'fields': 'id,salary'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('salary', response.data['fields'])
+        # Writes always answer with every field
+        response = self.client.patch(f'/api/employees/{self.employee.pk}/?fields=id', {'first_name': 'New'})
+        self.assertEqual(response.data['first_name'], 'New')
+
+
+class RollupTests(APITestCase):
+    def assertRollupsConsistent(self):
+        self.assertEqual(rollups.verify(), [])
+
+    def test_review_writes_through_api_update_rollups(self):
+        employee = make_employee(1)
+        response = self.client.post('/api/reviews/', {
+            'employee': employee.pk, 'review_period': 'Q1 2024',
+            'rating': 4, 'review_date': '2024-03-31',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertRollupsConsistent()
+
+        review_id = response.data['id']
+        self.client.patch(f'/api/reviews/{review_id}/', {'rating': 2, 'review_period': 'Q2 2024'})
+        self.assertRollupsConsistent()
+        period = DepartmentRollup.objects.get(department='Engineering', review_period='Q2 2024')
+        self.assertEqual((period.review_count, period.rating_2), (1, 1))
+
+        self.client.delete(f'/api/reviews/{review_id}/')
+        self.assertRollupsConsistent()
+
+    def test_department_change_and_cascade_delete(self):
+        employee = make_employee(1)
+        make_review(employee, 'Q1 2024', 5)
+        make_review(employee, 'Q2 2024', 3, date(2024, 6, 30))
+        make_review(make_employee(2, department='Sales'), 'Q1 2024', 1)
+
+        employee.department = 'Sales'
+        employee.save()
+        self.assertRollupsConsistent()
+        self.assertEqual(EmployeeRollup.objects.get(employee=employee).department, 'Sales')
+
+        employee.delete()
+        self.assertRollupsConsistent()
+        Employee.objects.all().delete()
+        self.assertRollupsConsistent()
+
+    def test_statistics_read_rollups(self):
+        make_review(make_employee(1), 'Q1 2024', 5)
+        make_review(make_employee(2), 'Q1 2024', 3)
+        make_review(make_employee(3, department='Sales'), 'Q1 2024', 3)
+        make_employee(4, department='')
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/reviews/statistics/')
+        self.assertEqual(response.data, {
+            'total_reviews': 3,
+            'average_rating': 3.67,
+            'rating_distribution': [{'rating': 3, 'count': 2}, {'rating': 5, 'count': 1}],
+        })
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/employees/statistics/')
+        self.assertEqual(response.data['total_employees'], 4)
+        self.assertEqual(response.data['departments'], [
+            {'department': 'Engineering', 'count': 2},
+            {'department': 'Sales', 'count': 1},
+        ])
+
+    def test_rebuild_command_repairs_drift(self):
+        make_review(make_employee(1), 'Q1 2024', 5)
+        DepartmentRollup.objects.update(review_count=42)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', verify=True, stdout=StringIO())
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertRollupsConsistent()
+
+    def test_employee_review_stats_follow_writes(self):
+        employee, other = make_employee(1), make_employee(2)
+        review = make_review(employee, 'Q1 2024', 5)
+        make_review(employee, 'Q2 2024', 2, date(2024, 6, 30))
+        employee.refresh_from_db()
+        self.assertEqual((employee.reviews_count, employee.average_rating, employee.latest_review_period), (2, 3.5, 'Q2 2024'))
+
+        # Saving a stale instance keeps the stored stats
+        stale = Employee.objects.get(pk=employee.pk)
+        make_review(employee, 'Q3 2024', 2, date(2024, 9, 30))
+        stale.first_name = 'Renamed'
+        stale.save()
+        employee.refresh_from_db()
+        self.assertEqual((employee.first_name, employee.reviews_count), ('Renamed', 3))
+
+        review.employee = other
+        review.save()
+        self.assertRollupsConsistent()
+        other.refresh_from_db()
+        self.assertEqual((other.reviews_count, other.average_rating, other.latest_review_period), (1, 5.0, 'Q1 2024'))
+
+        rows = [{'id': review.pk, 'rating': 1}]
+        self.assertEqual(self.client.patch('/api/reviews/bulk/', rows, format='json').status_code, 200)
+        PerformanceReview.objects.filter(employee=employee).delete()
+        self.assertRollupsConsistent()
+        employee.refresh_from_db()
+        self.assertEqual((employee.reviews_count, employee.average_rating, employee.latest_review_period), (0, None, None))
+        self.assertEqual(Employee.objects.get(pk=other.pk).average_rating, 1.0)
+
+    def test_verify_reports_employee_stat_drift(self):
+        make_review(make_employee(1), 'Q1 2024', 5)
+        Employee.objects.update(reviews_count=7, average_rating=None, latest_review_period='Q9 1999', rating_order=2)
+        self.assertEqual(len(rollups.verify()), 4)
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertRollupsConsistent()
+
+
+class AtomicSaveTests(TransactionTestCase):
+    # Outside any transaction, as in management commands and job workers
+    def test_failed_side_effect_rolls_back_the_save(self):
+        employee = make_employee(1)
+
+        def fail(sender, **kwargs):
+            raise RuntimeError('search index unavailable')
+
+        # Runs after the rollup and change log handlers
+        post_save.connect(fail, sender=PerformanceReview)
+        self.addCleanup(post_save.disconnect, fail, sender=PerformanceReview)
+        with self.assertRaises(RuntimeError):
+            make_review(employee)
+        self.assertFalse(PerformanceReview.objects.exists())
+        self.assertFalse(Change.objects.filter(kind=changes.REVIEW).exists())
+        self.assertEqual(rollups.verify(), [])
+
+
+class ResponseCacheTests(APITestCase):
+    def test_cached_until_write_commits(self):
+        make_employee(1)
+        first = self.client.get('/api/employees/departments/')
+        self.assertEqual(first.data, ['Engineering'])
+        with self.assertNumQueries(0):
+            cached = self.client.get('/api/employees/departments/')
+        self.assertEqual(cached.data, ['Engineering'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_employee(2, department='Sales')
+        response = self.client.get('/api/employees/departments/')
+        self.assertEqual(sorted(response.data), ['Engineering', 'Sales'])
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_conditional_requests(self):
+        make_review(make_employee(1))
+        response = self.client.get('/api/reviews/periods/')
+        self.assertIn('Last-Modified', response)
+
+        not_modified = self.client.get('/api/reviews/periods/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        not_modified = self.client.get(
+            '/api/reviews/periods/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_review(make_employee(2), 'Q2 2024')
+        changed = self.client.get('/api/reviews/periods/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+
+    def test_lru_evicts_least_recently_used(self):
+        backend = cache.LocalLRUBackend(max_entries=2)
+        backend.set('a', 1)
+        backend.set('b', 2)
+        backend.get('a')
+        backend.set('c', 3)
+        self.assertIsNone(backend.get('b'))
+        self.assertEqual(backend.get('a'), 1)
+
+
+class BulkTests(APITestCase):
+    def review_row(self, employee, period, rating=4):
+        return {
+            'employee': employee.pk, 'review_period': period,
+            'rating': rating, 'review_date': '2024-03-31',
+        }
+
+    def test_bulk_create_reviews_atomic(self):
+        employees = [make_employee(index) for index in range(5)]
+        rows = [self.review_row(employee, period) for employee in employees for period in ('Q1 2024', 'Q2 2024')]
+        response = self.client.post('/api/reviews/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 10)
+        self.assertEqual(PerformanceReview.objects.count(), 10)
+        self.assertEqual(rollups.verify(), [])
+
+    def test_atomic_mode_rejects_everything_on_one_bad_row(self):
+        employee = make_employee(1)
+        make_review(employee, 'Q1 2024')
+        rows = [
+            self.review_row(employee, 'Q2 2024'),
+            self.review_row(employee, 'Q1 2024'),  # already exists
+            self.review_row(employee, 'Q3 2024', rating=9),
+            {'employee': 999, 'review_period': 'Q4 2024', 'rating': 3, 'review_date': '2024-12-31'},
+        ]
+        response = self.client.post('/api/reviews/bulk/', rows, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2, 3])
+        self.assertEqual(PerformanceReview.objects.count(), 1)
+
+    def test_partial_mode_writes_valid_rows(self):
+        employee = make_employee(1)
+        rows = [
+            self.review_row(employee, 'Q1 2024'),
+            self.review_row(employee, 'Q1 2024'),  # duplicate within the batch
+            self.review_row(employee, 'Q2 2024'),
+        ]
+        response = self.client.post('/api/reviews/bulk/', {'mode': 'partial', 'rows': rows}, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1])
+        self.assertEqual(rollups.verify(), [])
+
+    def test_malformed_employee_is_a_row_error(self):
+        employee = make_employee(1)
+        rows = [
+            self.review_row(employee, 'Q1 2024'),
+            {**self.review_row(employee, 'Q2 2024'), 'employee': [employee.pk]},
+            {**self.review_row(employee, 'Q3 2024'), 'employee': {'id': employee.pk}},
+        ]
+        response = self.client.post('/api/reviews/bulk/', {'mode': 'partial', 'rows': rows}, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertEqual(PerformanceReview.objects.get().review_period, 'Q1 2024')
+
+    def test_bulk_update_and_delete_reviews(self):
+        employee = make_employee(1)
+        other = make_employee(2, department='Sales')
+        first = make_review(employee, 'Q1 2024', 2)
+        second = make_review(employee, 'Q2 2024', 3)
+
+        response = self.client.patch('/api/reviews/bulk/', [
+            {'id': first.pk, 'rating': 5},
+            {'id': second.pk, 'employee': other.pk},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(PerformanceReview.objects.get(pk=second.pk).employee_id, other.pk)
+        self.assertEqual(rollups.verify(), [])
+
+        response = self.client.delete('/api/reviews/bulk/', [first.pk, second.pk], format='json')
+        self.assertEqual(response.data['deleted'], 2)
+        self.assertFalse(PerformanceReview.objects.exists())
+        self.assertEqual(rollups.verify(), [])
+
+    def test_bulk_employees(self):
+        make_employee(1)
+        rows = [
+            {'first_name': 'A', 'last_name': 'B', 'email': 'a@company.com',
+             'department': 'HR', 'date_of_joining': '2024-01-01'},
+            {'first_name': 'C', 'last_name': 'D', 'email': 'employee1@company.com',
+             'department': 'HR', 'date_of_joining': '2024-01-01'},
+        ]
+        response = self.client.post('/api/employees/bulk/?mode=partial', rows, format='json')
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+
+        created = Employee.objects.get(email='a@company.com')
+        make_review(created)
+        response = self.client.patch('/api/employees/bulk/', [{'id': created.pk, 'department': 'Sales'}], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(rollups.verify(), [])
+
+        response = self.client.delete('/api/employees/bulk/', [created.pk], format='json')
+        self.assertEqual(response.data['deleted'], 1)
+        self.assertEqual(rollups.verify(), [])
+
+    def test_bulk_validation_does_not_query_per_row(self):
+        employees = [make_employee(index) for index in range(20)]
+        rows = [self.review_row(employee, 'Q1 2024') for employee in employees]
+        with CaptureQueriesContext(connection) as small:
+            self.client.post('/api/reviews/bulk/', rows[:5], format='json')
+        with CaptureQueriesContext(connection) as large:
+            self.client.post('/api/reviews/bulk/', rows[5:], format='json')
+        self.assertEqual(PerformanceReview.objects.count(), 20)
+        self.assertLessEqual(len(large), len(small))
+
+
+class ImportRecordsTests(TestCase):
+    def write(self, directory, name, content):
+        path = os.path.join(directory, name)
+        with open(path, 'w') as handle:
+            handle.write(content)
+        return path
+
+    def test_import_employees_then_reviews_with_checkpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            employees = self.write(directory, 'employees.csv', (
+                'first_name,last_name,email,department,date_of_joining\n'
+                'Ann,Lee,ann@company.com,HR,2024-01-01\n'
+                'Bob,Ray,bob@company.com,Sales,2024-01-01\n'
+                'Cy,Fox,ann@company.com,HR,2024-01-01\n'
+            ))
+            checkpoint = os.path.join(directory, 'checkpoint.json')
+            call_command('import_records', employees, kind='employees', chunk_size=2,
+                         checkpoint=checkpoint, stdout=StringIO())
+            self.assertEqual(Employee.objects.count(), 2)
+
+            # Re-running with the checkpoint resumes after the last committed row
+            call_command('import_records', employees, kind='employees',
+                         checkpoint=checkpoint, stdout=StringIO())
+            self.assertEqual(Employee.objects.count(), 2)
+
+            reviews = self.write(directory, 'reviews.ndjson', (
+                '{"employee_email": "ann@company.com", "review_period": "Q1 2024", "rating": 5, "review_date": "2024-03-31"}\n'
+                '{"employee_email": "missing@company.com", "review_period": "Q1 2024", "rating": 5, "review_date": "2024-03-31"}\n'
+            ))
+            out = StringIO()
+            call_command('import_records', reviews, kind='reviews', stdout=out)
+            self.assertIn('1 rows rejected', out.getvalue())
+            self.assertEqual(PerformanceReview.objects.get().employee.email, 'ann@company.com')
+            self.assertEqual(rollups.verify(), [])
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.employee = make_employee(1)
+        make_review(self.employee, 'Q1 2024', 5, feedback='Great, "really"')
+        make_review(make_employee(2), 'Q1 2024', 3)
+
+    def read(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_csv_export_honours_list_filters(self):
+        response = self.client.get(f'/api/reviews/export/?employee={self.employee.pk}')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(self.read(response).decode('utf-8'))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['feedback'], 'Great, "really"')
+        self.assertEqual(rows[0]['employee_email'], 'employee1@company.com')
+
+    def test_ndjson_export_streams_in_batches(self):
+        batches = list(exports.iter_batches(Employee.objects.all(), 'employees', chunk_size=1))
+        self.assertEqual(len(batches), 2)
+
+        response = self.client.get('/api/employees/export/?file_format=ndjson')
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual([row['reviews_count'] for row in rows], [1, 1])
+
+    def test_unknown_format(self):
+        response = self.client.get('/api/employees/export/?file_format=xml')
+        self.assertEqual(response.status_code, 400)
+
+
+class FastRenderingTests(APITestCase):
+    def test_fast_representation_matches_drf(self):
+        employee = make_employee(1)
+        make_review(employee, 'Q1 2024', 4, feedback='Fine')
+        make_review(employee, 'Q2 2024', 2)
+        employee = Employee.objects.with_reviews().get()
+        for serializer_class, instance in [
+            (EmployeeSerializer, employee),
+            (PerformanceReviewSerializer, PerformanceReview.objects.select_related('employee').first()),
+        ]:
+            stock = type('Stock', (serializer_class,), {'fast_representation': False})
+            self.assertEqual(serializer_class(instance).data, stock(instance).data)
+        reviews = EmployeeSerializer(employee).data['performance_reviews']
+        self.assertEqual(sorted(review['rating_display'] for review in reviews), ['Below Average', 'Good'])
+
+    def test_renderer_and_parser_match_drf(self):
+        data = {'name': 'Line\u2028break', 'rating': 4.5, 'day': date(2024, 1, 1), 1: None}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        indented = FastJSONRenderer().render(data, 'application/json; indent=2')
+        self.assertEqual(indented, JSONRenderer().render(data, 'application/json; indent=2'))
+
+        body = '{"first_name": "Zoë", "tags": [1, 2]}'.encode('utf-8')
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(body)), JSONParser().parse(io.BytesIO(body)))
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"broken"'))
+
+
+@modify_settings(MIDDLEWARE={'append': 'employees.compression.CompressionMiddleware'})
+class CompressionTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        for index in range(30):
+            make_employee(index)
+
+    def test_large_json_is_gzipped(self):
+        plain = self.client.get('/api/employees/')
+        response = self.client.get('/api/employees/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertLess(len(response.content), len(plain.content))
+        self.assertEqual(json.loads(gzip.decompress(response.content)), plain.json())
+
+    @override_settings(EMPLOYEES_COMPRESSION={'MIN_SIZE': 10 ** 6})
+    def test_small_bodies_and_html_stay_plain(self):
+        response = self.client.get('/api/employees/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.client.force_login(self.user)
+        with override_settings(EMPLOYEES_COMPRESSION={'MIN_SIZE': 0}):
+            response = self.client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_export_is_compressed(self):
+        response = self.client.get('/api/employees/export/?file_format=ndjson', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        rows = gzip.decompress(b''.join(response.streaming_content)).splitlines()
+        self.assertEqual(len(rows), 30)
+
+    def test_weak_etag_revalidates(self):
+        for employee in Employee.objects.all():
+            make_review(employee)
+        url = '/api/employees/leaderboard/'
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['ETag'], f'W/{etag}')
+        for validator in [response['ETag'], etag]:
+            not_modified = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=validator)
+            self.assertEqual(not_modified.status_code, 304)
+
+    def test_negotiate(self):
+        self.assertIs(compression.negotiate('gzip;q=0.5, identity'), compression.GzipCompressor)
+        self.assertIsNone(compression.negotiate('gzip;q=0, identity'))
+        self.assertIsNone(compression.negotiate(''))
+        self.assertIsNotNone(compression.negotiate('*'))
+
+
+class JobTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name, EMPLOYEES_JOBS={'PROGRESS_INTERVAL': 0}))
+        make_review(make_employee(1), 'Q1 2024', 5)
+        make_review(make_employee(2, department='Sales'), 'Q1 2024', 3)
+
+    def register(self, name, run):
+        jobs.job_type(name)(run)
+        self.addCleanup(jobs.REGISTRY.pop, name)
+
+    def test_statistics_report(self):
+        response = self.client.post('/api/reports/', {'kind': 'statistics'}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'queued')
+        self.assertTrue(response['Location'].endswith(f"/api/reports/{response.data['id']}/"))
+
+        self.assertIsNotNone(jobs.run_next('test'))
+        self.assertIsNone(jobs.run_next('test'))
+        job = self.client.get(response['Location']).data
+        self.assertEqual((job['status'], job['progress']), ('succeeded', 100))
+        result = self.client.get(job['result_url']).data
+        self.assertEqual(result['employees'], self.client.get('/api/employees/statistics/').data)
+        self.assertEqual(result['reviews']['total_reviews'], 2)
+
+    def test_export_report_writes_a_file(self):
+        response = self.client.post('/api/reports/', {
+            'kind': 'export', 'params': {'kind': 'employees', 'filters': {'department': 'Sales'}},
+        }, format='json')
+        call_command('run_workers', processes=0, once=True, stdout=StringIO())
+        job = Job.objects.get(pk=response.data['id'])
+        self.assertEqual(job.result['rows'], 1)
+        download = self.client.get(f'/api/reports/{job.pk}/result/')
+        self.assertIn('attachment', download['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(b''.join(download.streaming_content).decode('utf-8'))))
+        self.assertEqual([row['department'] for row in rows], ['Sales'])
+
+    def test_failed_jobs_are_retried_then_failed(self):
+        attempts = []
+
+        def flaky(context):
+            attempts.append(context.job.attempts)
+            raise RuntimeError('database went away')
+        self.register('flaky', flaky)
+        job = jobs.enqueue('flaky', max_attempts=2)
+
+        with self.assertLogs('employees.jobs', 'WARNING'):
+            jobs.run_next('test')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('queued', 1))
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIsNone(jobs.run_next('test'))  # not due yet
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('employees.jobs', 'ERROR'):
+            jobs.run_next('test')
+        job.refresh_from_db()
+        self.assertEqual((job.status, attempts), ('failed', [1, 2]))
+        self.assertIn('database went away', job.error)
+
+    def test_cancel(self):
+        job = jobs.enqueue('statistics')
+        response = self.client.post(f'/api/reports/{job.pk}/cancel/')
+        self.assertEqual(response.status_code, 404)  # not this user's job
+
+        job = Job.objects.get(pk=self.client.post('/api/reports/', {'kind': 'statistics'}, format='json').data['id'])
+        self.assertEqual(self.client.post(f'/api/reports/{job.pk}/cancel/').data['status'], 'cancelled')
+        self.assertEqual(self.client.post(f'/api/reports/{job.pk}/cancel/').status_code, 409)
+
+        def cancelled_while_running(context):
+            jobs.cancel(context.job)
+            context.progress(1, 2)
+            raise AssertionError('progress should have raised JobCancelled')
+        self.register('long', cancelled_while_running)
+        job = jobs.enqueue('long')
+        self.assertEqual(jobs.work('test', once=True), 2)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'cancelled')
+
+    def test_stale_jobs_are_requeued(self):
+        job = jobs.enqueue('statistics')
+        self.assertEqual(jobs.claim('crashed').pk, job.pk)
+        self.assertEqual(jobs.requeue_stale(), 0)
+        Job.objects.filter(pk=job.pk).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), ('queued', ''))
+        jobs.run_next('test')
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('succeeded', 2))
+
+    def test_invalid_jobs(self):
+        for payload in [
+            {'kind': 'nope'},
+            {'kind': 'export', 'params': {'kind': 'employees', 'filters': {'salary': 1}}},
+            {'kind': 'export', 'params': {'kind': 'reviews', 'file_format': 'xml'}},
+            {'kind': 'rebuild_rollups'},  # staff only
+        ]:
+            response = self.client.post('/api/reports/', payload, format='json')
+            self.assertEqual(response.status_code, 400, payload)
+        self.assertFalse(Job.objects.exists())
+
+
+class ChangeFeedTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.employee = make_employee(1)
+        self.review = make_review(self.employee, 'Q1 2024', 4)
+        self.cursor = self.client.get('/api/changes/').data['cursor']
+
+    def feed(self, since=None, **params):
+        response = self.client.get('/api/changes/', {'since': self.cursor if since is None else since, **params})
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_upserts_and_tombstones_since_cursor(self):
+        other = make_employee(2)
+        make_review(other, 'Q1 2024', 2)
+        other.first_name = 'Renamed'
+        other.save()
+        review_id = self.review.pk
+        self.review.delete()
+
+        data = self.feed()
+        changed = {(change['type'], change['id']): change for change in data['changes']}
+        self.assertEqual(changed[('employee', other.pk)]['data']['first_name'], 'Renamed')
+        self.assertEqual(changed[('employee', other.pk)]['data']['reviews_count'], 1)
+        self.assertEqual(changed[('review', review_id)], {'type': 'review', 'id': review_id, 'op': 'delete'})
+        # Losing its review changed the employee's stored stats
+        self.assertEqual(changed[('employee', self.employee.pk)]['data']['reviews_count'], 0)
+        self.assertEqual(len(data['changes']), 4)
+        self.assertEqual(self.feed(data['cursor'])['changes'], [])
+
+        reviews_only = self.feed(type='review')['changes']
+        self.assertEqual({change['type'] for change in reviews_only}, {'review'})
+
+    def test_cascades_bulk_writes_and_rollbacks(self):
+        response = self.client.post('/api/reviews/bulk/', [
+            {'employee': self.employee.pk, 'review_period': 'Q2 2024', 'rating': 5, 'review_date': '2024-06-30'},
+        ], format='json')
+        [created] = [row['id'] for row in response.data['results']]
+        self.assertIn(('review', created, 'upsert'), [(c['type'], c['id'], c['op']) for c in self.feed()['changes']])
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            make_employee(3)
+            raise RuntimeError()
+        cursor = self.feed()['cursor']
+
+        employee_id = self.employee.pk
+        self.employee.delete()
+        data = self.feed(cursor)
+        self.assertEqual(
+            sorted((change['type'], change['id'], change['op']) for change in data['changes']),
+            [('employee', employee_id, 'delete'), ('review', self.review.pk, 'delete'), ('review', created, 'delete')]
+        )
+
+    def test_paging(self):
+        for index in range(2, 5):
+            make_employee(index)
+        first = self.feed(limit=2)
+        self.assertTrue(first['has_more'])
+        self.assertEqual(len(first['changes']), 2)
+        second = self.feed(first['cursor'], limit=2)
+        self.assertFalse(second['has_more'])
+        self.assertEqual(len(second['changes']), 1)
+        self.assertEqual(self.client.get('/api/changes/', {'since': 'x'}).status_code, 400)
+
+    def test_compaction(self):
+        for rating in (1, 2, 3):
+            self.review.rating = rating
+            self.review.save()
+        before = Change.objects.count()
+        call_command('compact_changes', stdout=StringIO())
+        # One entry per object is left: the employee and the review
+        self.assertEqual(Change.objects.count(), 2)
+        self.assertLess(Change.objects.count(), before)
+        self.assertEqual(self.feed()['changes'][0]['data']['rating'], 3)
+
+        self.assertEqual(changes.compact(retention_days=0), 2)
+        response = self.client.get('/api/changes/', {'since': self.cursor})
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(self.feed(response.data['cursor'])['changes'], [])
+
+
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies',
+    PASSWORD_HASHERS=['employees.hashers.PBKDF2PasswordHasher'],
+    EMPLOYEES_AUTH={'PASSWORD_ITERATIONS': 1000},
+    EMPLOYEES_RESPONSE_CACHE={'BACKEND': 'shared', 'ALIAS': 'default'},
+)
+class AuthTests(TestCase):
+    def setUp(self):
+        cache.reset_backend()
+        self.addCleanup(cache.reset_backend)
+        self.user = User.objects.create_user(username='hr', email='hr@company.com', password='secret')
+
+    def login(self, client=None, password='secret'):
+        return (client or self.client).post(
+            '/api/auth/login/', {'username': 'hr', 'password': password}, content_type='application/json'
+        )
+
+    def test_check_auth_answers_from_session_snapshot(self):
+        self.assertEqual(self.client.get('/api/auth/user/').json(), {'authenticated': False})
+        self.assertEqual(self.login().status_code, 200)
+        with self.assertNumQueries(0):
+            data = self.client.get('/api/auth/user/').json()
+        self.assertEqual((data['authenticated'], data['user']['username']), (True, 'hr'))
+
+        # Another login only touches last_login; the snapshot stays valid
+        with self.captureOnCommitCallbacks(execute=True):
+            self.login(Client())
+        with self.assertNumQueries(0):
+            self.client.get('/api/auth/user/')
+
+        # Editing a user reloads it once
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_staff = True
+            self.user.save()
+        self.assertTrue(self.client.get('/api/auth/user/').json()['user']['is_staff'])
+        with self.assertNumQueries(0):
+            self.assertTrue(self.client.get('/api/auth/user/').json()['user']['is_staff'])
+
+        # A password change ends the other sessions
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('changed')
+            self.user.save()
+        self.assertEqual(self.client.get('/api/auth/user/').json(), {'authenticated': False})
+
+    @override_settings(EMPLOYEES_RESPONSE_CACHE={'BACKEND': 'lru'})
+    def test_per_process_versions_always_load_the_user(self):
+        cache.reset_backend()
+        self.login()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/api/auth/user/').json()['user']['username'], 'hr')
+        self.assertTrue(any('"auth_user"' in query['sql'] for query in queries.captured_queries))
+        self.assertNotIn(SNAPSHOT_KEY, self.client.session)
+
+        # A password change made by another worker is seen at once
+        User.objects.filter(pk=self.user.pk).update(password=make_password('changed'))
+        self.assertEqual(self.client.get('/api/auth/user/').json(), {'authenticated': False})
+
+    def test_signup_checks_uniqueness_in_one_query(self):
+        def signup(**data):
+            return self.client.post('/api/auth/signup/', {'password': 'secret', **data}, content_type='application/json')
+
+        with self.assertNumQueries(1):
+            response = signup(username='hr', email='other@company.com')
+        self.assertEqual((response.status_code, response.json()['error']), (400, 'Username already exists'))
+        with self.assertNumQueries(1):
+            response = signup(username='other', email='hr@company.com')
+        self.assertEqual(response.json()['error'], 'Email already exists')
+        response = self.client.post('/api/auth/signup/', '{"username": ', content_type='application/json')
+        self.assertEqual((response.status_code, response.json()['error']), (400, 'Invalid JSON data'))
+
+        response = signup(username='new', email='new@company.com')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.client.get('/api/auth/user/').json()['user']['username'], 'new')
+
+    def test_password_iterations_are_configurable(self):
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+        self.assertEqual(self.login(password='wrong').status_code, 401)
+        with override_settings(EMPLOYEES_AUTH={}):
+            # Django's default cost again: the next login re-hashes
+            self.assertEqual(self.login().status_code, 200)
+            self.user.refresh_from_db()
+            self.assertFalse(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+
+class ThrottlingTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        throttling.reset_store()
+        self.addCleanup(throttling.reset_store)
+        self.employee = make_employee(1)
+
+    def post_review(self, client, period):
+        return client.post('/api/reviews/', {
+            'employee': self.employee.pk, 'review_period': period, 'rating': 4, 'review_date': '2024-03-31',
+        })
+
+    def test_token_bucket_refills_at_the_rate(self):
+        capacity, period = throttling.parse_rate('2/min')
+        self.assertEqual((capacity, period), (2, 60.0))
+        bucket = None
+        for now in (0, 1):
+            allowed, bucket, wait = throttling.take_token(bucket, capacity, period, now)
+            self.assertTrue(allowed)
+        allowed, bucket, wait = throttling.take_token(bucket, capacity, period, 2)
+        self.assertEqual((allowed, round(wait)), (False, 28))
+        self.assertTrue(throttling.take_token(bucket, capacity, period, 32)[0])
+        self.assertEqual(throttling.parse_rate('100/5m'), (100, 300.0))
+
+    @override_settings(EMPLOYEES_THROTTLING={'RATES': {'performancereview.create': '2/min'}})
+    def test_rates_per_user_and_endpoint(self):
+        self.assertEqual(self.post_review(self.client, 'Q1 2024').status_code, 201)
+        self.assertEqual(self.post_review(self.client, 'Q2 2024').status_code, 201)
+        response = self.post_review(self.client, 'Q3 2024')
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(25 <= int(response['Retry-After']) <= 30)
+
+        # Other endpoints and other users have their own buckets
+        self.assertEqual(self.client.get('/api/reviews/').status_code, 200)
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(username='other'))
+        self.assertEqual(self.post_review(other, 'Q3 2024').status_code, 201)
+
+    @override_settings(EMPLOYEES_THROTTLING={'RATES': {'login': '2/min', 'write': '1/min'}})
+    def test_anonymous_requests_are_limited_per_ip(self):
+        client = APIClient()
+
+        def login(address):
+            return client.post(
+                '/api/auth/login/', {'username': 'hr', 'password': 'wrong'}, format='json', REMOTE_ADDR=address
+            ).status_code
+
+        self.assertEqual([login('10.0.0.1') for _ in range(3)], [401, 401, 429])
+        self.assertEqual(login('10.0.0.2'), 401)
+        # 'write' covers unsafe requests without a rate of their own
+        self.assertEqual(self.post_review(self.client, 'Q1 2024').status_code, 201)
+        self.assertEqual(self.post_review(self.client, 'Q2 2024').status_code, 429)
+
+    @override_settings(EMPLOYEES_THROTTLING={'CONCURRENCY': {'employee.statistics': 1, 'employee.export': 1}})
+    def test_concurrency_limits_fail_fast(self):
+        store = throttling.get_store()
+        self.assertTrue(store.acquire('employee.statistics', 1))
+        response = self.client.get('/api/employees/statistics/')
+        self.assertEqual((response.status_code, response['Retry-After']), (503, '5'))
+        store.release('employee.statistics')
+        self.assertEqual(self.client.get('/api/employees/statistics/').status_code, 200)
+
+        # A stream holds its slot until it is closed
+        export = self.client.get('/api/employees/export/')
+        self.assertEqual(self.client.get('/api/employees/export/').status_code, 503)
+        b''.join(export.streaming_content)
+        export.close()
+        response = self.client.get('/api/employees/export/')
+        self.assertEqual(response.status_code, 200)
+        response.close()
+        self.assertTrue(store.acquire('employee.export', 1))
+
+
+def read_event(body):
+    """(event, data) of the last event in an SSE chunk"""
+    fields = dict(line.split(': ', 1) for line in body.decode().strip().split('\n\n')[-1].split('\n'))
+    return fields['event'], json.loads(fields['data'])
+
+
+@override_settings(EMPLOYEES_EVENTS={'POLL_INTERVAL': 60})
+class EventStreamTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.employee = make_employee(1)
+        self.cursor = changes.current_cursor()
+        self.broadcaster = events.Broadcaster()
+        self.broadcaster.cursor = self.cursor
+
+    def poll(self, *subscriptions):
+        self.broadcaster.subscribers = set(subscriptions)
+        async_to_sync(self.broadcaster.poll)()
+        return [read_event(subscription.drain())[1] if subscription.ready.is_set() else None
+                for subscription in subscriptions]
+
+    def test_filters_and_coalescing(self):
+        sales = make_employee(2, department='Sales')
+        everyone = events.Subscription(self.cursor)
+        engineering = events.Subscription(self.cursor, departments=['Engineering'])
+        sales_only = events.Subscription(self.cursor, employee_ids=[sales.pk])
+        review = make_review(self.employee, 'Q2 2024')
+        sales.first_name = 'Renamed'
+        sales.save()
+
+        all_changes, engineering_changes, sales_changes = self.poll(everyone, engineering, sales_only)
+        self.assertEqual(sorted(all_changes['employee']['upsert']), sorted([self.employee.pk, sales.pk]))
+        self.assertEqual(all_changes['review'], {'upsert': [review.pk]})
+        self.assertEqual(all_changes['cursor'], changes.current_cursor())
+        self.assertEqual(engineering_changes['employee'], {'upsert': [self.employee.pk]})
+        self.assertEqual(engineering_changes['review'], {'upsert': [review.pk]})
+        self.assertEqual(sales_changes, {'cursor': changes.current_cursor(), 'employee': {'upsert': [sales.pk]}})
+
+        # Tombstones have lost their department: department filters get them
+        sales_id, review_id = sales.pk, review.pk
+        sales.delete()
+        review.delete()
+        all_changes, engineering_changes, sales_changes = self.poll(everyone, engineering, sales_only)
+        self.assertEqual(all_changes['employee'], {'delete': [sales_id], 'upsert': [self.employee.pk]})
+        self.assertEqual(engineering_changes['employee'], {'delete': [sales_id], 'upsert': [self.employee.pk]})
+        self.assertEqual(engineering_changes['review'], {'delete': [review_id]})
+        # ... and a deleted review has lost its employee
+        self.assertEqual(sales_changes['employee'], {'delete': [sales_id]})
+        self.assertEqual(sales_changes['review'], {'delete': [review_id]})
+
+        self.assertEqual(self.poll(everyone), [None])
+
+    async def test_stream(self):
+        broadcaster = events.broadcaster = self.broadcaster
+        self.addCleanup(setattr, events, 'broadcaster', events.Broadcaster())
+        await sync_to_async(self.client.force_login)(self.user)
+        cookie = f"sessionid={self.client.cookies['sessionid'].value}".encode()
+        app = events.EventStreamApp(None)
+
+        def connect(query=b'', headers=()):
+            return ApplicationCommunicator(app, {
+                'type': 'http', 'method': 'GET', 'path': '/api/events/', 'query_string': query,
+                'headers': list(headers),
+            })
+
+        communicator = connect()
+        await communicator.send_input({'type': 'http.request'})
+        self.assertEqual((await communicator.receive_output(1))['status'], 403)
+        communicator = connect(b'employee=x', [(b'cookie', cookie)])
+        await communicator.send_input({'type': 'http.request'})
+        self.assertEqual((await communicator.receive_output(1))['status'], 400)
+
+        communicator = connect(b'department=Sales', [(b'cookie', cookie)])
+        await communicator.send_input({'type': 'http.request'})
+        start = await communicator.receive_output(1)
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'), start['headers'])
+        body = (await communicator.receive_output(1))['body']
+        self.assertTrue(body.startswith(b'retry: '))
+        self.assertEqual(read_event(body), ('ready', {'cursor': self.cursor}))
+
+        await sync_to_async(make_employee)(2, department='Engineering')
+        sales = await sync_to_async(make_employee)(3, department='Sales')
+        await broadcaster.poll()
+        event, data = read_event((await communicator.receive_output(1))['body'])
+        self.assertEqual((event, data['employee']), ('changes', {'upsert': [sales.pk]}))
+
+        # A reconnecting client gets what it missed since Last-Event-ID
+        replay = connect(headers=[(b'cookie', cookie), (b'last-event-id', str(self.cursor).encode())])
+        await replay.send_input({'type': 'http.request'})
+        await replay.receive_output(1)
+        self.assertEqual(read_event((await replay.receive_output(1))['body'])[0], 'ready')
+        self.assertEqual(len(read_event((await replay.receive_output(1))['body'])[1]['employee']['upsert']), 2)
+
+        for client in (communicator, replay):
+            await client.send_input({'type': 'http.disconnect'})
+            await client.wait(1)
+        self.assertEqual(broadcaster.subscribers, set())
+        broadcaster._task.cancel()
+
+
+# ==============================
+# Query plan regression suite
+# ==============================
+
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+def plan_problems(sql):
+    """Full table scans and sorts (filesort / temp b-tree) in the plan for sql"""
+    problems = []
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            for row in cursor.fetchall():
+                detail = row[-1]
+                match = SQLITE_FULL_SCAN.match(detail)
+                if match:
+                    problems.append(('full scan', match.group(1)))
+                elif 'USE TEMP B-TREE' in detail:
+                    problems.append(('sort', detail))
+        elif connection.vendor == 'mysql':
+            cursor.execute('EXPLAIN ' + sql)
+            columns = [column[0].lower() for column in cursor.description]
+            for values in cursor.fetchall():
+                row = dict(zip(columns, values))
+                if row['type'] == 'ALL':
+                    problems.append(('full scan', row['table']))
+                if 'filesort' in (row['extra'] or '') or 'temporary' in (row['extra'] or ''):
+                    problems.append(('sort', row['extra']))
+    return problems
+
+
+class QueryPlanTests(APITestCase):
+    # url -> tables that endpoint is expected to read in full
+    ENDPOINTS = {
+        '/api/employees/': [],
+        '/api/employees/?expand=reviews': [],
+        '/api/employees/{employee}/': [],
+        '/api/employees/{employee}/reviews/': [],
+        '/api/employees/departments/': [],
+        '/api/employees/statistics/': [],
+        '/api/employees/export/': ['employees'],
+        '/api/reviews/': [],
+        '/api/reviews/?employee={employee}': [],
+        '/api/reviews/{review}/': [],
+        '/api/reviews/periods/': [],
+        '/api/reviews/statistics/': [],
+        '/api/reviews/export/': ['performance_reviews'],
+        # The bounded COUNT scans its LIMITed derived table
+        '/': ['subquery'],
+        '/reviews/': ['subquery'],
+    }
+    IGNORED_TABLES = ('auth_', 'django_')
+
+    def setUp(self):
+        super().setUp()
+        for index in range(30):
+            employee = make_employee(index, department=['Engineering', 'Sales', 'HR'][index % 3])
+            make_review(employee, 'Q1 2024', index % 5 + 1)
+            make_review(employee, 'Q2 2024', 3, date(2024, 6, 30))
+        self.ids = {'employee': employee.pk, 'review': employee.performance_reviews.first().pk}
+
+    def test_endpoints_use_indexes(self):
+        for template, allowed in self.ENDPOINTS.items():
+            url = template.format(**self.ids)
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                self.assertEqual(response.status_code, 200)
+                for query in queries.captured_queries:
+                    sql = query['sql']
+                    if not sql.startswith('SELECT') or any(f'"{prefix}' in sql for prefix in self.IGNORED_TABLES):
+                        continue
+                    problems = [
+                        problem for problem in plan_problems(sql)
+                        if not (problem[0] == 'full scan' and problem[1] in allowed)
+                    ]
+                    self.assertEqual(problems, [], sql)
+
+
+class BenchmarkTests(TestCase):
+    def test_generate_data_and_benchmark(self):
+        call_command('generate_data', employees=40, departments=4, periods=3, seed=1, stdout=StringIO())
+        self.assertEqual(Employee.objects.count(), 40)
+        self.assertTrue(PerformanceReview.objects.exists())
+        self.assertEqual(rollups.verify(), [])
+
+        # A second run with the same seed, and so the same names, reviews only its own employees
+        reviews = PerformanceReview.objects.count()
+        call_command('generate_data', employees=40, departments=4, periods=3, seed=1, stdout=StringIO())
+        self.assertEqual(Employee.objects.count(), 80)
+        self.assertEqual(PerformanceReview.objects.count(), 2 * reviews)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'baseline.json')
+            call_command('benchmark_api', runs=2, warmup=0, save=path, stdout=StringIO())
+            with open(path) as handle:
+                results = json.load(handle)
+            self.assertIn('GET /api/employees/', results)
+            self.assertIn('HTML review_list', results)
+            self.assertIn('queries', results['GET /api/reviews/statistics/'])
+
+            # A baseline claiming fewer queries is reported as a regression
+            results['GET /api/employees/']['queries'] = 0
+            with open(path, 'w') as handle:
+                json.dump(results, handle)
+            with self.assertRaises(CommandError):
+                call_command(
+                    'benchmark_api', runs=1, warmup=0, only='GET /api/employees/',
+                    baseline=path, tolerance=100, stdout=StringIO()
+                )
+
+    def test_benchmark_connections(self):
+        output = StringIO()
+        call_command('benchmark_connections', runs=3, warmup=0, thread_per_request=True, stdout=output)
+        self.assertIn('pool', output.getvalue())
+
+    def test_benchmark_rendering(self):
+        make_review(make_employee(1))
+        output = StringIO()
+        call_command('benchmark_rendering', runs=2, warmup=0, kind=['reviews'], stdout=output)
+        self.assertIn('reviews / fast + gzip', output.getvalue())
+
+
+class ConnectionPoolTests(TestCase):
+    # A pooled SQLite wrapper on its own file, so the pool logic is tested
+    # without a MySQL server
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(close_pools)
+        self.wrapper_class = pooled_wrapper_class(type(connections['default']))
+        self.settings_dict = {
+            **connection.settings_dict,
+            'NAME': os.path.join(directory.name, 'pool.sqlite3'),
+            'CONN_MAX_AGE': 0,
+            'POOL': {'MAX_SIZE': 1, 'TIMEOUT': 0.05, 'HEALTH_CHECK_AFTER': 0},
+        }
+
+    def wrapper(self):
+        wrapper = self.wrapper_class(self.settings_dict, alias='pooled')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def request(self, wrapper):
+        wrapper.close_if_unusable_or_obsolete()
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        raw = wrapper.connection
+        wrapper.close_if_unusable_or_obsolete()
+        return raw
+
+    def test_connections_are_reused_across_wrappers(self):
+        first, second = self.wrapper(), self.wrapper()
+        raw = self.request(first)
+        self.assertIsNone(first.connection)
+        self.assertIs(self.request(second), raw)
+        self.assertEqual((first.pool().size, first.pool().idle), (1, 1))
+
+    def test_waits_for_a_free_connection_then_times_out(self):
+        busy = self.wrapper()
+        busy.ensure_connection()
+        with self.assertRaises(PoolTimeout):
+            self.wrapper().ensure_connection()
+        busy.close()
+        self.wrapper().ensure_connection()
+
+    def test_dead_and_expired_connections_are_replaced(self):
+        wrapper = self.wrapper()
+        raw = self.request(wrapper)
+        raw.close()  # e.g. killed by the server while idle
+        replacement = self.request(wrapper)
+        self.assertIsNot(replacement, raw)
+        wrapper.pool().idle_timeout = 0
+        self.assertIsNot(self.request(wrapper), replacement)
+
+    def test_connection_closed_in_a_transaction_is_not_reused(self):
+        wrapper = self.wrapper()
+        wrapper.set_autocommit(False)
+        raw = wrapper.connection
+        wrapper.close()
+        self.assertEqual(wrapper.pool().size, 0)
+        self.assertIsNot(self.request(self.wrapper()), raw)
+
+
+@modify_settings(MIDDLEWARE={'append': 'employees.middleware.RequestMetricsMiddleware'})
+class RequestMetricsTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+        for index in range(3):
+            make_review(make_employee(index))
+
+    def test_records_per_action(self):
+        self.client.get('/api/employees/')
+        self.client.get('/api/employees/departments/')
+        self.client.get('/api/employees/export/')
+
+        listed = registry.snapshot('EmployeeViewSet.list')
+        self.assertEqual(listed['duration'][0], 1)
+        self.assertGreater(listed['queries'][1], 0)
+        self.assertGreater(listed['size'][1], 0)
+        self.assertEqual(registry.snapshot('EmployeeViewSet.departments')['queries'][0], 1)
+        # Streaming responses are recorded once the body has been read
+        self.assertEqual(registry.snapshot('EmployeeViewSet.export'), {})
+
+    def test_streamed_queries_are_counted(self):
+        response = self.client.get('/api/employees/export/')
+        b''.join(response.streaming_content)
+        exported = registry.snapshot('EmployeeViewSet.export')
+        self.assertGreater(exported['queries'][1], 0)
+        self.assertGreater(exported['size'][1], 0)
+
+    def test_duplicate_queries(self):
+        stats = QueryStats()
+        with stats.track():
+            for employee in Employee.objects.all():
+                list(employee.performance_reviews.all())
+        self.assertEqual(stats.count, 4)
+        self.assertEqual(stats.duplicates, 2)
+
+    @override_settings(EMPLOYEES_METRICS={'SLOW_REQUEST_MS': 0})
+    def test_slow_request_log(self):
+        with self.assertLogs('employees.requests', 'WARNING') as logs:
+            self.client.get('/api/reviews/')
+        self.assertIn('PerformanceReviewViewSet.list', logs.output[0])
+        self.assertIn('Slowest query', logs.output[0])
+
+    @override_settings(EMPLOYEES_METRICS={'TOKEN': 'scrape'})
+    def test_metrics_endpoint(self):
+        self.client.get('/api/employees/')
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+
+        response = self.client.get('/api/metrics/', HTTP_AUTHORIZATION='Bearer scrape')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('employees_requests_total{view="EmployeeViewSet.list",status="200"} 1', body)
+        self.assertIn('employees_request_queries_bucket{view="EmployeeViewSet.list",le="+Inf"} 1', body)
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.ada = make_employee(1, 'Engineering', first_name='Ada', last_name='Lovelace')
+        self.alan = make_employee(2, 'Research', first_name='Alan', last_name='Turing')
+        self.review = make_review(self.alan, feedback='Brilliant cryptanalysis work on the project')
+
+    def search(self, query, **params):
+        response = self.client.get('/api/search/', {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(result['type'], result['id']) for result in response.json()['results']]
+
+    def test_prefix_and_ranking(self):
+        self.assertEqual(self.search('lovel'), [('employee', self.ada.pk)])
+        self.assertEqual(self.search('crypt'), [('review', self.review.pk)])
+        # Every term must match; the last one as a prefix
+        self.assertEqual(self.search('alan tur'), [('employee', self.alan.pk)])
+        self.assertEqual(self.search('ada tur'), [])
+        # A name match outranks a feedback match
+        make_review(self.ada, period='Q2 2024', feedback='Worked with Alan on the engine')
+        self.assertEqual(self.search('alan')[0], ('employee', self.alan.pk))
+        self.assertEqual(self.search('alan', type='review'), [('review', PerformanceReview.objects.get(feedback__contains='Alan').pk)])
+
+    def test_accents_and_case(self):
+        make_employee(3, first_name='José', last_name='Núñez')
+        self.assertEqual(len(self.search('JOSE nunez')), 1)
+
+    def test_incremental_updates(self):
+        self.ada.last_name = 'King'
+        self.ada.save()
+        self.assertEqual(self.search('lovelace'), [])
+        self.assertEqual(self.search('king'), [('employee', self.ada.pk)])
+
+        self.review.delete()
+        self.assertEqual(self.search('cryptanalysis'), [])
+
+        make_review(self.alan, period='Q3 2024', feedback='Cryptanalysis again')
+        alan_id = self.alan.pk
+        self.alan.delete()
+        self.assertFalse(SearchPosting.objects.filter(employee_id=alan_id).exists())
+
+    def test_bulk_writes_are_indexed(self):
+        response = self.client.post('/api/reviews/bulk/', [
+            {'employee': self.ada.pk, 'review_period': 'Q4 2024', 'rating': 5,
+             'review_date': '2024-12-31', 'feedback': 'Analytical engine notes'},
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        review_id = response.json()['results'][0]['id']
+        self.assertEqual(self.search('analytical'), [('review', review_id)])
+
+        self.client.patch('/api/employees/bulk/', [{'id': self.ada.pk, 'first_name': 'Augusta'}], format='json')
+        self.assertEqual(self.search('augusta'), [('employee', self.ada.pk)])
+
+        self.client.delete('/api/reviews/bulk/', [review_id], format='json')
+        self.assertEqual(self.search('analytical'), [])
+
+    def test_rebuild_matches_incremental_index(self):
+        make_review(self.ada, period='Q2 2024', feedback='Notes on the engine')
+        indexed = set(SearchPosting.objects.values_list('term', 'kind', 'object_id', 'weight'))
+        search.rebuild()
+        self.assertEqual(set(SearchPosting.objects.values_list('term', 'kind', 'object_id', 'weight')), indexed)
+
+    def test_admin_search_uses_index(self):
+        admin_user = User.objects.create_superuser('admin', 'admin@company.com', 'secret')
+        self.client.force_login(admin_user)
+        response = self.client.get('/admin/employees/employee/', {'q': 'lovel'})
+        self.assertContains(response, 'employee1@company.com')
+        self.assertNotContains(response, 'employee2@company.com')
+        response = self.client.get('/admin/employees/performancereview/', {'q': 'cryptanalysis'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+
+class TrendTests(APITestCase):
+    def test_parse_period_spellings(self):
+        for value in ['Q1 2024', '2024 Q1', '2024-Q1', 'q1/2024', '2024Q1']:
+            self.assertEqual(parse_period(value), (2024, 1))
+        self.assertEqual(parse_period('Annual 2024'), (None, None))
+        self.assertEqual(
+            sorted(['Q1 2024', 'Annual', 'Q4 2023', '2024-Q2'], key=sort_key),
+            ['Q4 2023', 'Q1 2024', '2024-Q2', 'Annual'],
+        )
+
+    def test_period_fields_follow_writes(self):
+        review = make_review(make_employee(1), '2023-Q4')
+        self.assertEqual((review.period_year, review.period_quarter), (2023, 4))
+        review.review_period = 'Q2 2024'
+        review.save(update_fields=['review_period'])
+        review.refresh_from_db()
+        self.assertEqual((review.period_year, review.period_quarter), (2024, 2))
+
+        response = self.client.patch('/api/reviews/bulk/', [{'id': review.pk, 'review_period': 'Q3 2024'}], format='json')
+        self.assertEqual(response.status_code, 200)
+        review.refresh_from_db()
+        self.assertEqual((review.period_year, review.period_quarter), (2024, 3))
+        rollup = DepartmentRollup.objects.get(department='Engineering', review_period='Q3 2024')
+        self.assertEqual((rollup.period_year, rollup.period_quarter), (2024, 3))
+
+    def test_employee_series(self):
+        employee = make_employee(1)
+        # Q3 2024 is missing: the Q4 delta is not against Q2
+        for period, rating in [('Q1 2024', 2), ('Q2 2024', 4), ('Q4 2024', 3), ('Q1 2025', 5)]:
+            make_review(employee, period, rating)
+        make_review(make_employee(2, department='Sales'), 'Q1 2024', 5)
+
+        response = self.client.get('/api/reviews/trends/', {'employee': employee.pk, 'window': 2})
+        self.assertEqual(response.status_code, 200)
+        series = response.data['employees'][0]['series']
+        self.assertEqual([point['period'] for point in series], ['Q1 2024', 'Q2 2024', 'Q4 2024', 'Q1 2025'])
+        self.assertEqual([point['moving_average'] for point in series], [2.0, 3.0, 3.0, 4.0])
+        self.assertEqual([point['delta'] for point in series], [None, 2.0, None, 2.0])
+
+        response = self.client.get('/api/reviews/trends/', {'employee': employee.pk, 'window': 2, 'from': 'Q2 2024'})
+        series = response.data['employees'][0]['series']
+        self.assertEqual(series[0], {
+            'period': 'Q2 2024', 'year': 2024, 'quarter': 2,
+            'rating': 4.0, 'moving_average': 3.0, 'delta': 2.0,
+        })
+
+    def test_department_series(self):
+        engineering = [make_employee(index) for index in range(2)]
+        make_review(engineering[0], 'Q1 2024', 2)
+        make_review(engineering[1], 'Q1 2024', 4)
+        make_review(engineering[0], 'Q2 2024', 5)
+        make_review(make_employee(5, department='Sales'), 'Q2 2024', 1)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/reviews/trends/', {'department': 'Engineering'})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('employees', response.data)
+        [department] = response.data['departments']
+        self.assertEqual(department['department'], 'Engineering')
+        q1, q2 = department['series']
+        self.assertEqual((q1['review_count'], q1['average_rating'], q1['delta']), (2, 3.0, None))
+        # Weighted by review count: (2 + 4 + 5) / 3
+        self.assertEqual((q2['average_rating'], q2['moving_average'], q2['delta']), (5.0, 3.67, 2.0))
+
+    def test_invalid_parameters(self):
+        for params in [{'window': 0}, {'window': 'x'}, {'from': 'soon'}, {'employee': 'a,b'}]:
+            self.assertEqual(self.client.get('/api/reviews/trends/', params).status_code, 400)
+
+
+class LeaderboardTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        # Engineering: 0 (4.5 over 2), 1 (4.5 over 2), 2 (5 over 1), 3 (4 over 1); Sales: 4 (3 over 1)
+        self.employees = [make_employee(index) for index in range(4)] + [make_employee(4, department='Sales')]
+        for employee, ratings in zip(self.employees, [[4, 5], [5, 4], [5], [4], [3]]):
+            for period, rating in zip(['Q1 2024', 'Q2 2024'], ratings):
+                make_review(employee, period, rating)
+        make_employee(5)  # no reviews, not ranked
+
+    def ids(self, results):
+        return [entry['employee'] for entry in results]
+
+    def test_order_and_tie_breakers(self):
+        response = self.client.get('/api/employees/leaderboard/')
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        # Same mean: more reviews first, then lower id
+        expected = [self.employees[index].pk for index in [2, 0, 1, 3, 4]]
+        self.assertEqual(self.ids(results), expected)
+        self.assertEqual([entry['rank'] for entry in results], [1, 2, 3, 4, 5])
+        self.assertEqual(results[0]['percentile'], 100.0)
+        self.assertEqual(results[1]['average_rating'], 4.5)
+
+    def test_pages_keep_ranks(self):
+        response = self.client.get('/api/employees/leaderboard/', {'department': 'Engineering', 'page_size': 3})
+        self.assertEqual([entry['rank'] for entry in response.data['results']], [1, 2, 3])
+        with self.assertNumQueries(3):  # page, rank of its first row, ranked total
+            response = self.client.get(response.data['next'])
+        self.assertEqual(self.ids(response.data['results']), [self.employees[3].pk])
+        self.assertEqual(response.data['results'][0]['rank'], 4)
+        self.assertEqual(response.data['results'][0]['percentile'], 25.0)
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([entry['rank'] for entry in response.data['results']], [1, 2, 3])
+
+    def test_ranking_follows_review_changes(self):
+        employee = self.employees[3]
+        data = self.client.get(f'/api/employees/{employee.pk}/ranking/').data
+        self.assertEqual((data['department']['rank'], data['department']['total']), (4, 4))
+        self.assertEqual((data['company']['rank'], data['company']['total']), (4, 5))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_review(employee, 'Q2 2024', 5)  # 4.5 over 2, ties with 0 and 1 but has a higher id
+        data = self.client.get(f'/api/employees/{employee.pk}/ranking/').data
+        self.assertEqual((data['department']['rank'], data['average_rating']), (4, 4.5))
+        review = PerformanceReview.objects.get(employee=employee, review_period='Q1 2024')
+        review.rating = 5  # 5 over 2 beats 5 over 1
+        with self.captureOnCommitCallbacks(execute=True):
+            review.save()
+        data = self.client.get(f'/api/employees/{employee.pk}/ranking/').data
+        self.assertEqual(data['department'], {'name': 'Engineering', 'rank': 1, 'total': 4, 'percentile': 100.0})
+
+        unranked = self.client.get(f'/api/employees/{Employee.objects.get(email="employee5@company.com").pk}/ranking/')
+        self.assertIsNone(unranked.data['company'])
+
+    def test_bulk_writes_keep_means(self):
+        rows = [
+            {'employee': self.employees[4].pk, 'review_period': 'Q2 2024', 'rating': 5, 'review_date': '2024-06-30'},
+            {'employee': self.employees[3].pk, 'review_period': 'Q2 2024', 'rating': 1, 'review_date': '2024-06-30'},
+        ]
+        self.assertEqual(self.client.post('/api/reviews/bulk/', rows, format='json').status_code, 201)
+        self.assertEqual(rollups.verify(), [])
+        self.assertEqual(EmployeeRollup.objects.get(employee=self.employees[4]).rating_mean, 4.0)
+
+
+class HtmlListTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.engineering = [
+            make_employee(index, date_of_joining=date(2020 + index % 3, 1, 1)) for index in range(60)
+        ]
+        self.sales = make_employee(60, department='Sales')
+        for employee, (period, rating) in zip(self.engineering[:6], [
+            ('Q1 2024', 2), ('Q2 2024', 5), ('Q1 2024', 4), ('Q4 2023', 3), ('Q1 2024', 5), ('Q2 2024', 1),
+        ]):
+            make_review(employee, period, rating)
+        make_review(self.sales, 'Q1 2024', 4)
+
+    def names(self, response):
+        return [employee.last_name for employee in response.context['page']]
+
+    def test_pages_and_sorting(self):
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        page = response.context['page']
+        self.assertEqual((len(page), page.paginator.count, page.paginator.num_pages), (50, 61, 2))
+        self.assertTrue(page.paginator.exact)
+        self.assertEqual(self.names(response)[:2], ['Last00000', 'Last00001'])
+        self.assertContains(response, 'href="?sort=-name"')
+
+        response = self.client.get('/', {'sort': '-name', 'page': 2})
+        self.assertEqual(self.names(response), [f'Last{index:05d}' for index in range(10, -1, -1)])
+        self.assertContains(response, 'href="?sort=-name&amp;page=1"')
+
+        response = self.client.get('/', {'sort': 'joined', 'department': 'Engineering'})
+        joined = [employee.date_of_joining for employee in response.context['page']]
+        self.assertEqual(joined, sorted(joined))
+        self.assertEqual(response.context['paginator'].count, 60)
+
+        # Unknown sorts and pages fall back to the defaults
+        response = self.client.get('/', {'sort': 'email', 'page': 'last'})
+        self.assertEqual((response.context['sort'], response.context['page'].number), ('name', 1))
+
+    def test_review_filters(self):
+        response = self.client.get('/reviews/', {'period': 'Q1 2024', 'rating_min': 4, 'sort': '-rating'})
+        self.assertEqual([review.rating for review in response.context['page']], [5, 4, 4])
+
+        response = self.client.get('/reviews/', {'department': 'Sales'})
+        self.assertEqual([review.employee for review in response.context['page']], [self.sales])
+
+        response = self.client.get('/reviews/', {'sort': 'period'})
+        periods = [review.review_period for review in response.context['page']]
+        self.assertEqual(periods, sorted(periods, key=sort_key))
+
+        # Invalid values are reported and ignored
+        response = self.client.get('/reviews/', {'rating_min': 9, 'department': 'Nowhere'})
+        self.assertEqual(response.context['paginator'].count, 7)
+        self.assertTrue(response.context['form'].errors)
+        self.assertContains(response, 'class="errors"')
+
+    def test_large_results_are_estimated(self):
+        with self.assertNumQueries(4):  # bounded count, estimate, ids, rows
+            paginator = listing.EstimatedCountPaginator(
+                Employee.objects.order_by('id'), 10, listing.estimate_employees, threshold=20
+            )
+            self.assertEqual(paginator.count, 61)
+            self.assertFalse(paginator.exact)
+            self.assertEqual(len(paginator.page(7)), 1)
+        self.assertEqual(listing.estimate_reviews(rating_min=4, department='Engineering'), 3)
+        self.assertEqual(listing.estimate_reviews(period='Q1 2024', rating_max=3), 1)
+
+    def test_pages_are_cached_until_writes_commit(self):
+        first = self.client.get('/', {'department': 'Sales'})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/', {'department': 'Sales'}).content, first.content)
+        not_modified = self.client.get('/', {'department': 'Sales'}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            make_employee(61, department='Sales')
+        response = self.client.get('/', {'department': 'Sales'})
+        self.assertContains(response, 'Last00061')
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_cached_page_shows_new_reviews(self):
+        self.assertContains(self.client.get('/', {'department': 'Sales'}), '4.00 (1)')
+        with self.captureOnCommitCallbacks(execute=True):
+            make_review(self.sales, 'Q2 2024', 2)
+        self.assertContains(self.client.get('/', {'department': 'Sales'}), '3.00 (2)')
+
+
+class DashboardTests(TransactionTestCase):
+    # The sections run on worker threads with their own connections, which
+    # only see committed rows
+    def setUp(self):
+        cache.reset_backend()
+        self.user = User.objects.create_user(username='hr', password='secret')
+        self.client.force_login(self.user)
+        for index in range(3):
+            make_review(make_employee(index, date_of_joining=date(2024, 1, index + 1)), rating=index + 3)
+
+    def test_dashboard_combines_sections(self):
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['employee_statistics']['total_employees'], 3)
+        self.assertEqual(data['review_statistics']['total_reviews'], 3)
+        self.assertEqual(data['departments'], ['Engineering'])
+        self.assertEqual(data['periods'], ['Q1 2024'])
+        self.assertEqual([employee['email'] for employee in data['recent_employees']][0], 'employee2@company.com')
+        self.assertEqual(len(data['recent_reviews']), 3)
+
+        # Sections match the individual endpoints
+        self.assertEqual(self.client.get('/api/reviews/statistics/').json(), data['review_statistics'])
+        self.assertEqual(self.client.get('/api/employees/statistics/').json(), data['employee_statistics'])
+
+    def test_revalidation_and_invalidation(self):
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual(
+            self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304
+        )
+        make_employee(10, department='Sales')
+        response = self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['employee_statistics']['total_employees'], 4)
+
+    def test_requires_login(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/api/dashboard/').status_code, 403)
+
+    @modify_settings(MIDDLEWARE={'append': 'employees.middleware.RequestMetricsMiddleware'})
+    def test_queries_on_worker_threads_are_recorded(self):
+        registry.reset()
+        self.client.get('/api/dashboard/')
+        self.assertGreaterEqual(registry.snapshot('dashboard')['queries'][1], 6)
+
+
+@modify_settings(MIDDLEWARE={'append': 'employees.replicas.ReplicaRoutingMiddleware'})
+@override_settings(
+    DATABASE_ROUTERS=['employees.replicas.ReplicaRouter'],
+    EMPLOYEES_REPLICAS={'ALIASES': ['replica_1', 'replica_2'], 'PIN_SECONDS': 60},
+)
+class ReplicaRoutingTests(TransactionTestCase):
+    # Two SQLite files stand in for the replicas; replicate() copies the
+    # primary into them the way replication would, only on demand
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.paths = {}
+        for alias in ['replica_1', 'replica_2']:
+            cls.paths[alias] = os.path.join(cls.directory.name, f'{alias}.sqlite3')
+            connections.settings[alias] = {
+                **connections['default'].settings_dict, 'NAME': cls.paths[alias], 'ATOMIC_REQUESTS': False,
+            }
+        # Added here rather than in the class attribute: the aliases do not
+        # exist yet when the test runner sets up its databases
+        cls.databases = {*cls.databases, *cls.paths}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in cls.paths:
+            connections[alias].close()
+            del connections[alias]
+            del connections.settings[alias]
+        cls.directory.cleanup()
+
+    def setUp(self):
+        cache.reset_backend()
+        self.employee = make_employee(1, first_name='Original')
+        self.replicate()
+        self.user = User.objects.create_user(username='hr', password='secret')
+        self.client.force_login(self.user)
+
+    def replicate(self, *aliases):
+        connections['default'].ensure_connection()
+        for alias in aliases or self.paths:
+            connections[alias].close()
+            target = sqlite3.connect(self.paths[alias])
+            connections['default'].connection.backup(target)
+            target.close()
+
+    def first_name(self, client=None):
+        response = (client or self.client).get(f'/api/employees/{self.employee.pk}/')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['first_name']
+
+    def test_router(self):
+        self.assertEqual(router.db_for_write(Employee), 'default')
+        self.assertEqual(router.db_for_read(Employee), 'default')
+        with replicas.reading_from('replica_1'):
+            self.assertEqual(router.db_for_read(Employee), 'replica_1')
+            self.assertEqual(router.db_for_write(Employee), 'default')
+            # Sessions and users, and so the pin, always come from the primary
+            self.assertEqual(router.db_for_read(User), 'default')
+        self.assertFalse(router.allow_migrate('replica_1', 'employees'))
+
+    def test_reads_are_spread_over_replicas(self):
+        Employee.objects.filter(pk=self.employee.pk).update(first_name='Changed')
+        self.replicate('replica_2')
+        self.assertEqual({self.first_name(), self.first_name()}, {'Original', 'Changed'})
+
+    def test_writer_reads_its_own_writes(self):
+        response = self.client.patch(
+            f'/api/employees/{self.employee.pk}/', json.dumps({'first_name': 'Edited'}), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        for _ in range(2):
+            self.assertEqual(self.first_name(), 'Edited')
+
+        # Other sessions read the replicas, which have not caught up
+        other = self.client_class()
+        other.force_login(User.objects.create_user(username='other'))
+        self.assertEqual(self.first_name(other), 'Original')
+        export = other.get('/api/employees/export/', {'file_format': 'ndjson'})
+        self.assertIn('Original', b''.join(export.streaming_content).decode())
+
+        # Once the pin expires the writer reads the replicas too
+        session = self.client.session
+        session[replicas.SESSION_KEY] = 0
+        session.save()
+        self.assertEqual(self.first_name(), 'Original')
+
+    def test_lagging_replica_responses_are_not_cached(self):
+        with self.settings(EMPLOYEES_REPLICAS={'ALIASES': [], 'PIN_SECONDS': 60}):
+            self.assertIn('ETag', self.client.get('/api/employees/statistics/'))
+        make_employee(2)  # bumps the Employee version
+        response = self.client.get('/api/employees/statistics/')
+        self.assertEqual(response.json()['total_employees'], 1)
+        self.assertNotIn('ETag', response)
+        self.replicate()
+        self.assertEqual(self.client.get('/api/employees/statistics/').json()['total_employees'], 2)
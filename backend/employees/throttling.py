@@ -0,0 +1,287 @@
+# employees/throttling.py
+
+"""Rate limits and concurrency limits for the API.
+
+Rate limits are token buckets, one per endpoint and client. The endpoint is
+the viewset action ('employee.create', 'performancereview.bulk', ...) or the
+URL name of a function view ('login', 'signup'). The client is the user, or
+the IP address (DRF's get_ident, which honours NUM_PROXIES) for anonymous
+requests. EMPLOYEES_THROTTLING['RATES'] maps endpoints to 'N/period' rates.
+A bucket holds N tokens and refills at N per period, so a client may burst N
+requests and then continues at the steady rate. Endpoints without their own
+rate fall back to 'write' (POST, PUT, PATCH, DELETE) or 'read'. An endpoint
+with no rate is not limited. Rejected requests get 429 with Retry-After.
+
+Concurrency limits cap how many requests of an expensive action
+(CONCURRENCY: statistics, exports, ...) run at the same time per store. A
+request over the cap does not queue until it times out. It is answered at
+once with 503 and Retry-After. A streamed response holds its slot until
+the stream is closed.
+
+Two stores are available through EMPLOYEES_THROTTLING['BACKEND']:
+
+* ``local`` (default): in-process and exact. Each worker process enforces
+  the limits on its own.
+* ``shared``: a Django cache alias shared by every worker. Concurrency slots
+  are atomic counters (incr/decr). Buckets are read and written without a
+  lock, so racing requests of one client can occasionally exceed the rate by
+  a request or two.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+KEY_PREFIX = 'employees:throttle'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+DEFAULT_SETTINGS = {
+    'BACKEND': 'local',
+    'ALIAS': 'default',
+    'RATES': {},
+    'CONCURRENCY': {},
+    # Retry-After of a full concurrency limit
+    'RETRY_AFTER': 5,
+    # Slots of requests that died without releasing them expire (shared store)
+    'SLOT_TIMEOUT': 600,
+    'MAX_KEYS': 100000,
+}
+
+
+def get_setting(name):
+    return getattr(settings, 'EMPLOYEES_THROTTLING', {}).get(name, DEFAULT_SETTINGS[name])
+
+
+def parse_rate(rate):
+    """'10/min' -> (10, 60.0): bucket capacity and the seconds it takes to refill"""
+    count, period = rate.split('/')
+    number = ''.join(char for char in period if char.isdigit()) or '1'
+    return int(count), float(number) * PERIODS[period.lstrip('0123456789')[0]]
+
+
+class Busy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many of these requests are running; retry shortly.'
+    default_code = 'busy'
+
+    def __init__(self, wait):
+        super().__init__()
+        # DRF's exception handler turns this into Retry-After
+        self.wait = wait
+
+
+# ==============================
+# Stores
+# ==============================
+
+def take_token(bucket, capacity, period, now):
+    """(allowed, bucket, wait): take one token from bucket = (tokens, updated) or None (full)"""
+    per_second = capacity / period
+    tokens, updated = bucket if bucket is not None else (capacity, now)
+    tokens = min(capacity, tokens + (now - updated) * per_second)
+    if tokens >= 1:
+        return True, (tokens - 1, now), 0
+    return False, (tokens, now), (1 - tokens) / per_second
+
+
+class LocalStore:
+    """Thread-safe in-process buckets (the least recently used beyond max_keys are dropped) and slots"""
+
+    def __init__(self, max_keys=100000, **options):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, period):
+        with self._lock:
+            allowed, self._buckets[key], wait = take_token(self._buckets.get(key), capacity, period, time.monotonic())
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return allowed, wait
+
+    def acquire(self, key, limit):
+        with self._lock:
+            if self._slots.get(key, 0) >= limit:
+                return False
+            self._slots[key] = self._slots.get(key, 0) + 1
+            return True
+
+    def release(self, key):
+        with self._lock:
+            self._slots[key] -= 1
+            if not self._slots[key]:
+                del self._slots[key]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+            self._slots.clear()
+
+
+class SharedStore:
+    """Buckets and slots in a Django cache shared by all workers"""
+
+    def __init__(self, alias='default', slot_timeout=600, **options):
+        self.cache = caches[alias]
+        self.slot_timeout = slot_timeout
+
+    def take(self, key, capacity, period):
+        key = f'{KEY_PREFIX}:bucket:{key}'
+        allowed, bucket, wait = take_token(self.cache.get(key), capacity, period, time.time())
+        # A bucket left alone for a period is full again, which is what a missing key means
+        self.cache.set(key, bucket, timeout=int(period) + 1)
+        return allowed, wait
+
+    def acquire(self, key, limit):
+        key = f'{KEY_PREFIX}:slots:{key}'
+        self.cache.add(key, 0, timeout=self.slot_timeout)
+        if self.cache.incr(key) > limit:
+            self.cache.decr(key)
+            return False
+        # incr keeps the original expiry on some backends; restart it
+        self.cache.touch(key, timeout=self.slot_timeout)
+        return True
+
+    def release(self, key):
+        try:
+            self.cache.decr(f'{KEY_PREFIX}:slots:{key}')
+        except ValueError:
+            # Expired meanwhile
+            pass
+
+    def clear(self):
+        self.cache.clear()
+
+
+STORES = {
+    'local': LocalStore,
+    'shared': SharedStore,
+}
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = STORES[get_setting('BACKEND')](
+                    alias=get_setting('ALIAS'),
+                    slot_timeout=get_setting('SLOT_TIMEOUT'),
+                    max_keys=get_setting('MAX_KEYS'),
+                )
+    return _store
+
+
+def reset_store():
+    """Drop the configured store (and its contents); used by tests and settings changes"""
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.clear()
+        _store = None
+
+
+# ==============================
+# DRF integration
+# ==============================
+
+def get_scope(request, view):
+    """'basename.action' of a viewset request, else the URL name"""
+    basename, action = getattr(view, 'basename', None), getattr(view, 'action', None)
+    if basename and action:
+        return f'{basename}.{action}'
+    match = getattr(request, 'resolver_match', None)
+    return match.url_name if match else None
+
+
+def get_rate(scope, method):
+    rates = get_setting('RATES')
+    if scope in rates:
+        return rates[scope]
+    return rates.get('read' if method in SAFE_METHODS else 'write')
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Per endpoint and client token bucket with the rates of EMPLOYEES_THROTTLING['RATES']"""
+
+    def allow_request(self, request, view):
+        scope = get_scope(request, view)
+        rate = get_rate(scope, request.method)
+        if not rate:
+            return True
+        user = request.user
+        client = f'user:{user.pk}' if user and user.is_authenticated else f'ip:{self.get_ident(request)}'
+        allowed, self._wait = get_store().take(f'{scope}:{client}', *parse_rate(rate))
+        return allowed
+
+    def wait(self):
+        return self._wait
+
+
+class _Releasing:
+    """Iterates content and releases the slot once it is exhausted or closed"""
+
+    def __init__(self, content, release):
+        self._content = iter(content)
+        self._release = release
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._content)
+        except StopIteration:
+            self.close()
+            raise
+
+    def close(self):
+        # Django calls this when the server is done with the response, even
+        # when the client went away before the first chunk
+        if self._release is not None:
+            release, self._release = self._release, None
+            if hasattr(self._content, 'close'):
+                self._content.close()
+            release()
+
+
+class RequestLimitsMixin:
+    """Rate limits for every action, and the concurrency limits of EMPLOYEES_THROTTLING['CONCURRENCY']"""
+
+    throttle_classes = [TokenBucketThrottle]
+
+    def initial(self, request, *args, **kwargs):
+        # Authentication, permissions and rate limits first
+        super().initial(request, *args, **kwargs)
+        self._slot = None
+        scope = get_scope(request, self)
+        limit = get_setting('CONCURRENCY').get(scope)
+        if limit:
+            if not get_store().acquire(scope, limit):
+                raise Busy(get_setting('RETRY_AFTER'))
+            self._slot = scope
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        slot, self._slot = getattr(self, '_slot', None), None
+        if slot is None:
+            return response
+        release = lambda: get_store().release(slot)
+        if response.streaming:
+            # Held until the server has sent (or abandoned) the stream
+            response.streaming_content = _Releasing(response.streaming_content, release)
+        else:
+            release()
+        return response
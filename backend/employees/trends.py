@@ -0,0 +1,164 @@
+# employees/trends.py
+
+"""Rating time series per department and per employee.
+
+Moving averages and period-over-period deltas are computed by the database
+with window functions over the whole result set, ordered by the period
+ordinal (year * 4 + quarter - 1). The moving average frame is a RANGE of
+quarters, so a missing quarter shortens the window instead of pulling in an
+older review, and a delta is only reported against the immediately
+preceding quarter.
+
+Department series read DepartmentRollup (one row per department and
+period); employee series read the reviews through
+review_employee_period_idx.
+"""
+
+from django.db.models import Avg, F, FloatField, IntegerField, Sum, Window
+from django.db.models.expressions import ExpressionWrapper, ValueRange
+from django.db.models.functions import Cast, Lag
+
+from .models import DepartmentRollup, PerformanceReview
+from .periods import format_period, parse_period, period_ordinal
+
+DEFAULT_WINDOW = 4
+MAX_WINDOW = 12
+MAX_EMPLOYEES = 100
+
+
+class TrendError(ValueError):
+    pass
+
+
+def _ordinal():
+    return ExpressionWrapper(F('period_year') * 4 + F('period_quarter') - 1, output_field=IntegerField())
+
+
+def _window(expression, partition, window=None):
+    frame = ValueRange(start=-(window - 1), end=0) if window else None
+    return Window(expression, partition_by=[F(partition)], order_by=_ordinal().asc(), frame=frame)
+
+
+def _bounds(queryset, window, start, end):
+    """Limit rows to what the requested range and its leading window need"""
+    if start is not None:
+        # Rows up to window - 1 quarters before start feed the first moving
+        # average, and one more the first delta
+        queryset = queryset.annotate(ordinal=_ordinal()).filter(ordinal__gte=start - window)
+    if end is not None:
+        queryset = queryset.annotate(ordinal=_ordinal()).filter(ordinal__lte=end)
+    return queryset
+
+
+def department_series(window=DEFAULT_WINDOW, departments=None, start=None, end=None):
+    """[(department, [point, ...])] with review_count, average_rating, moving_average and delta"""
+    average = ExpressionWrapper(Cast('rating_sum', FloatField()) / F('review_count'), output_field=FloatField())
+    rows = DepartmentRollup.objects.filter(period_year__isnull=False, review_count__gt=0)
+    if departments:
+        rows = rows.filter(department__in=departments)
+    rows = _bounds(rows, window, start, end).annotate(
+        average=average,
+        moving_average=ExpressionWrapper(
+            Cast(_window(Sum('rating_sum'), 'department', window), FloatField())
+            / _window(Sum('review_count'), 'department', window),
+            output_field=FloatField(),
+        ),
+        previous=_window(Lag(average), 'department'),
+        previous_ordinal=_window(Lag(_ordinal()), 'department'),
+    ).order_by('department', 'period_year', 'period_quarter').values_list(
+        'department', 'period_year', 'period_quarter', 'review_count',
+        'average', 'moving_average', 'previous', 'previous_ordinal',
+    )
+    points = (
+        (department, year, quarter, {'review_count': count}, value, moving, previous, previous_ordinal)
+        for department, year, quarter, count, value, moving, previous, previous_ordinal in rows
+    )
+    return _group(points, 'average_rating', start)
+
+
+def employee_series(employee_ids, window=DEFAULT_WINDOW, start=None, end=None):
+    """[(employee_id, [point, ...])] with rating, moving_average and delta"""
+    rows = PerformanceReview.objects.filter(employee_id__in=employee_ids, period_year__isnull=False)
+    rows = _bounds(rows, window, start, end).annotate(
+        moving_average=_window(Avg('rating'), 'employee_id', window),
+        previous=_window(Lag('rating'), 'employee_id'),
+        previous_ordinal=_window(Lag(_ordinal()), 'employee_id'),
+    ).order_by('employee_id', 'period_year', 'period_quarter').values_list(
+        'employee_id', 'period_year', 'period_quarter', 'rating',
+        'moving_average', 'previous', 'previous_ordinal',
+    )
+    points = (
+        (employee_id, year, quarter, {}, rating, moving, previous, previous_ordinal)
+        for employee_id, year, quarter, rating, moving, previous, previous_ordinal in rows
+    )
+    return _group(points, 'rating', start)
+
+
+def _group(rows, value_name, start):
+    """Shape database rows into series; rows arrive ordered by key and period"""
+    series = []
+    for key, year, quarter, extra, value, moving, previous, previous_ordinal in rows:
+        ordinal = period_ordinal(year, quarter)
+        if start is not None and ordinal < start:
+            continue
+        if not series or series[-1][0] != key:
+            series.append((key, []))
+        consecutive = previous is not None and previous_ordinal == ordinal - 1
+        series[-1][1].append({
+            'period': format_period(year, quarter),
+            'year': year,
+            'quarter': quarter,
+            **extra,
+            value_name: _round(value),
+            'moving_average': _round(moving),
+            'delta': _round(value - previous) if consecutive else None,
+        })
+    return series
+
+
+def _round(value):
+    return None if value is None else round(float(value), 2)
+
+
+def parse_bound(value, name):
+    """Period ordinal for a from/to query parameter, or None when absent"""
+    if not value:
+        return None
+    year, quarter = parse_period(value)
+    if year is None:
+        raise TrendError(f'{name} must be a quarter such as "Q1 2024"')
+    return period_ordinal(year, quarter)
+
+
+def trends(params):
+    """Trend response for the query parameters of /api/reviews/trends/"""
+    try:
+        window = int(params.get('window', DEFAULT_WINDOW))
+    except ValueError:
+        raise TrendError('window must be an integer')
+    if not 1 <= window <= MAX_WINDOW:
+        raise TrendError(f'window must be between 1 and {MAX_WINDOW}')
+    start = parse_bound(params.get('from'), 'from')
+    end = parse_bound(params.get('to'), 'to')
+
+    departments = [name for name in params.get('department', '').split(',') if name]
+    try:
+        employee_ids = [int(pk) for pk in params.get('employee', '').split(',') if pk]
+    except ValueError:
+        raise TrendError('employee must be a comma separated list of ids')
+    if len(employee_ids) > MAX_EMPLOYEES:
+        raise TrendError(f'At most {MAX_EMPLOYEES} employees per request')
+
+    data = {
+        'window': window,
+        'departments': [
+            {'department': department, 'series': points}
+            for department, points in department_series(window, departments, start, end)
+        ],
+    }
+    if employee_ids:
+        data['employees'] = [
+            {'employee': employee_id, 'series': points}
+            for employee_id, points in employee_series(employee_ids, window, start, end)
+        ]
+    return data
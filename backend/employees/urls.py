@@ -24,13 +24,14 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import EmployeeViewSet, PerformanceReviewViewSet
+from .views import EmployeeViewSet, PerformanceReviewViewSet, ReportViewSet
 from .auth_views import login_view, logout_view, check_auth, get_csrf_token, signup_view
 from . import views
 
 router = DefaultRouter()
 router.register(r'employees', EmployeeViewSet)
 router.register(r'reviews', PerformanceReviewViewSet)
+router.register(r'reports', ReportViewSet, basename='report')
 
 urlpatterns = [
     path('api/', include(router.urls)),
@@ -39,6 +40,10 @@ urlpatterns = [
     path('api/auth/logout/', logout_view, name='logout'),
     path('api/auth/user/', check_auth, name='check_auth'),  # This line is critical
     path('api/auth/csrf-token/', get_csrf_token, name='csrf_token'),
+    path('api/metrics/', views.metrics, name='metrics'),
+    path('api/search/', views.search, name='search'),
+    path('api/changes/', views.change_feed, name='changes'),
+    path('api/dashboard/', views.dashboard_view, name='dashboard'),
     
     
     
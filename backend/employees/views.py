@@ -1,14 +1,31 @@
 
 
-from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework import mixins, viewsets, status
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.db.models import Count, Avg
-from .models import Employee, PerformanceReview
-from .serializers import EmployeeSerializer, PerformanceReviewSerializer
+from rest_framework.reverse import reverse
+from .models import Employee, Job, PerformanceReview
+from .cache import cached_page, cached_response
+from .bulk import OPERATIONS, EmployeeBulkWriter, ReviewBulkWriter
+from .exports import ExportError, streaming_response
+from .serializers import EmployeeSerializer, EmployeeListSerializer, JobSerializer, LeaderboardEntrySerializer, PerformanceReviewSerializer
+from .pagination import EmployeeCursorPagination, JobPagination, LeaderboardPagination
+from .sparse import SparseFieldsViewSetMixin
+from .throttling import RequestLimitsMixin
+from .metrics import get_setting, registry
+from . import cache, changes, dashboard, jobs, leaderboard, listing, replicas, trends, search as search_index
+import hmac
+import logging
+import os
+
+logger = logging.getLogger(__name__)
 
 
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from .models import Employee, PerformanceReview
 from .forms import EmployeeForm, PerformanceReviewForm
@@ -17,9 +34,9 @@ from .forms import EmployeeForm, PerformanceReviewForm
 # Employee CRUD Views
 # ==============================
 
+@cached_page(Employee, PerformanceReview)
 def employee_list(request):
-    employees = Employee.objects.all()
-    return render(request, 'employees/employee_list.html', {'employees': employees})
+    return render(request, 'employees/employee_list.html', listing.employee_context(request.GET))
 
 def employee_create(request):
     if request.method == 'POST':
@@ -54,9 +71,9 @@ def employee_delete(request, pk):
 # Performance Review CRUD Views
 # ==============================
 
+@cached_page(Employee, PerformanceReview)
 def review_list(request):
-    reviews = PerformanceReview.objects.select_related('employee').all()
-    return render(request, 'employees/review_list.html', {'reviews': reviews})
+    return render(request, 'employees/review_list.html', listing.review_context(request.GET))
 
 def review_create(request):
     if request.method == 'POST':
@@ -87,127 +104,354 @@ def review_delete(request, pk):
     return render(request, 'employees/review_confirm_delete.html', {'review': review})
 
 
+# ==============================
+# Metrics
+# ==============================
+
+def metrics(request):
+    """Request metrics of this process in the Prometheus text format"""
+    token = get_setting('TOKEN')
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    allowed = request.user.is_staff if hasattr(request, 'user') else False
+    if token and hmac.compare_digest(authorization.encode(), f'Bearer {token}'.encode()):
+        allowed = True
+    if not allowed:
+        return HttpResponse(status=403)
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# ==============================
+# Search
+# ==============================
+
+SEARCH_MAX_LIMIT = 100
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search(request):
+    """Ranked full-text search over employees and review feedback (?q=, ?type=, ?limit=)"""
+    query = request.query_params.get('q', '')
+    kinds = [kind for kind in request.query_params.get('type', '').split(',') if kind] or list(search_index.KINDS)
+    unknown = set(kinds) - set(search_index.KINDS)
+    if unknown:
+        return Response(
+            {'error': f"Unknown type {', '.join(sorted(unknown))}; use employee or review"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), SEARCH_MAX_LIMIT)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    hits = search_index.search(query, kinds, limit)
+    employee_ids = [object_id for kind, object_id, _ in hits if kind == search_index.EMPLOYEE]
+    review_ids = [object_id for kind, object_id, _ in hits if kind == search_index.REVIEW]
+    employees = Employee.objects.all().in_bulk(employee_ids)
+    reviews = PerformanceReview.objects.select_related('employee').in_bulk(review_ids)
+
+    results = []
+    for kind, object_id, score in hits:
+        if kind == search_index.EMPLOYEE and object_id in employees:
+            data = EmployeeListSerializer(employees[object_id]).data
+        elif kind == search_index.REVIEW and object_id in reviews:
+            data = PerformanceReviewSerializer(reviews[object_id]).data
+        else:
+            continue
+        results.append({'type': kind, 'id': object_id, 'score': score, kind: data})
+    return Response({'query': query, 'results': results})
+
+
+# ==============================
+# Change feed
+# ==============================
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def change_feed(request):
+    """Employees and reviews changed after ?since= as upserts and tombstones (?type=, ?limit=)
+
+    Without ?since= only the current cursor is returned: read it, load the
+    lists, then poll with it.
+    """
+    since = request.query_params.get('since')
+    if not since:
+        return Response({'cursor': changes.current_cursor(), 'has_more': False, 'changes': []})
+    kinds = [kind for kind in request.query_params.get('type', '').split(',') if kind] or list(changes.KINDS)
+    unknown = set(kinds) - set(changes.KINDS)
+    if unknown:
+        return Response(
+            {'error': f"Unknown type {', '.join(sorted(unknown))}; use employee or review"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        since = int(since)
+        limit = min(max(int(request.query_params.get('limit', 0)), 0), changes.get_setting('MAX_PAGE_SIZE'))
+    except ValueError:
+        return Response({'error': 'since and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        items, cursor, has_more = changes.read(since, limit or None, kinds)
+    except changes.CursorExpired:
+        return Response({
+            'error': 'The cursor is older than the change log retention; reload and continue from cursor',
+            'cursor': changes.current_cursor(),
+        }, status=status.HTTP_410_GONE)
+    return Response({'cursor': cursor, 'has_more': has_more, 'changes': items})
+
+
+# ==============================
+# Dashboard
+# ==============================
+
+@transaction.non_atomic_requests
+async def dashboard_view(request):
+    """Everything the Dashboard shows in one response, its sections queried concurrently"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=403)
+
+    digest, etag, last_modified = await sync_to_async(cache.validators)(request, [Employee, PerformanceReview])
+    headers = cache.validator_headers(etag, last_modified)
+    if cache.not_modified(request, etag, last_modified):
+        return HttpResponseNotModified(headers=headers)
+
+    data = await sync_to_async(cache.get_cached)(digest)
+    if data is None:
+        data = await dashboard.collect()
+        if replicas.may_be_stale(last_modified):
+            # Read from a replica that may not have the latest change yet
+            return JsonResponse(data)
+        await sync_to_async(cache.set_cached)(digest, data)
+    return JsonResponse(data, headers=headers)
+
+
+def export_response(viewset, request, kind):
+    queryset = viewset.filter_queryset(viewset.get_queryset())
+    try:
+        return streaming_response(queryset, kind, request.query_params.get('file_format', 'csv'))
+    except ExportError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class EmployeeViewSet(RequestLimitsMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
     permission_classes = [IsAuthenticated]  # Change to IsAuthenticated in production
+    pagination_class = EmployeeCursorPagination
+    
+    def expand_reviews(self):
+        """Whether the list should include nested reviews (?expand=reviews)"""
+        expand = self.request.query_params.get('expand', '')
+        return 'reviews' in expand.split(',')
+    
+    def get_serializer_class(self):
+        if self.action == 'list' and not self.expand_reviews():
+            return EmployeeListSerializer
+        return EmployeeSerializer
+    
+    def get_queryset(self):
+        queryset = Employee.objects.all()
+        if self.action in ('list', 'export'):
+            queryset = self.filter_by_rating(queryset)
+        if self.action in ('list', 'retrieve'):
+            # Stats are stored on the row and reviews come from one prefetch,
+            # so the query count does not grow with the number of employees.
+            # ?fields= narrows both to what the response includes.
+            if 'performance_reviews' in self.selected_fields():
+                queryset = queryset.with_reviews()
+            cursor_fields = [field.lstrip('-') for field in self.paginator.get_ordering(self.request)]
+            queryset = self.only_selected(queryset, *(cursor_fields if self.action == 'list' else []))
+        return queryset
+    
+    def filter_by_rating(self, queryset):
+        """?min_rating= / ?max_rating= on the stored average rating (employee_rating_idx)"""
+        for param, lookup in [('min_rating', 'gte'), ('max_rating', 'lte')]:
+            value = self.request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                value = float(value)
+            except ValueError:
+                raise ValidationError({param: 'Must be a number'})
+            queryset = queryset.filter(**{f'average_rating__{lookup}': value})
+        return queryset
     
     @action(detail=False, methods=['get'])
+    @cached_response(Employee)
     def departments(self, request):
         """Get list of departments"""
         try:
-            departments = Employee.objects.exclude(
-                department__isnull=True
-            ).exclude(
-                department=''
-            ).values_list('department', flat=True).distinct()
-            return Response(list(departments))
-        except Exception as e:
-            print(f"Departments error: {str(e)}")
+            return Response(dashboard.department_names())
+        except Exception:
+            logger.exception("Departments error")
             return Response([])
     
     @action(detail=False, methods=['get'])
+    @cached_response(Employee)
     def statistics(self, request):
         """Get employee statistics"""
         try:
-            total_employees = Employee.objects.count()
-            
-            # Get department counts, filter out None/empty
-            departments = Employee.objects.exclude(
-                department__isnull=True
-            ).exclude(
-                department=''
-            ).values('department').annotate(
-                count=Count('id')
-            ).order_by('-count')
-            
-          # Calculate average salary safely
-        
-            
-            return Response({
-                'total_employees': total_employees,
-                'departments': list(departments),
-                
-            })
-        except Exception as e:
-            print(f"Statistics error: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            return Response(dashboard.employee_statistics())
+        except Exception:
+            logger.exception("Statistics error")
             return Response({
                 'total_employees': 0,
                 'departments': [],
                 
             })
     
+    @action(detail=False, methods=['get'])
+    @cached_response(Employee, PerformanceReview)
+    def leaderboard(self, request):
+        """Employees by average rating, best first, with rank and percentile (?department=)"""
+        department = request.query_params.get('department') or None
+        paginator = LeaderboardPagination()
+        page = paginator.paginate_queryset(
+            leaderboard.ranked(department).select_related('employee'), request, view=self
+        )
+        entries = leaderboard.with_ranks(page, department)
+        return paginator.get_paginated_response(LeaderboardEntrySerializer(entries, many=True).data)
+    
+    @action(detail=True, methods=['get'])
+    @cached_response(Employee, PerformanceReview)
+    def ranking(self, request, pk=None):
+        """Rank and percentile of one employee in their department and company-wide"""
+        return Response(leaderboard.ranking(self.get_object()))
+    
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request):
+        """Create (POST), update (PATCH) or delete (DELETE) many employees at once"""
+        return EmployeeBulkWriter.from_request(request).run(OPERATIONS[request.method])
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream employees as CSV, NDJSON or Parquet (?file_format=)"""
+        return export_response(self, request, 'employees')
+    
     @action(detail=True, methods=['get'])
     def reviews(self, request, pk=None):
         """Get reviews for a specific employee"""
         try:
             employee = self.get_object()
-            reviews = PerformanceReview.objects.filter(employee=employee)
+            reviews = PerformanceReview.objects.filter(employee=employee).select_related('employee')
             serializer = PerformanceReviewSerializer(reviews, many=True)
             return Response(serializer.data)
-        except Exception as e:
-            print(f"Employee reviews error: {str(e)}")
+        except Exception:
+            logger.exception("Employee reviews error")
             return Response([])
 
-class PerformanceReviewViewSet(viewsets.ModelViewSet):
+class PerformanceReviewViewSet(RequestLimitsMixin, SparseFieldsViewSetMixin, viewsets.ModelViewSet):
     queryset = PerformanceReview.objects.all()
     serializer_class = PerformanceReviewSerializer
     permission_classes = [IsAuthenticated]  # Change to IsAuthenticated in production
     
     def get_queryset(self):
         queryset = PerformanceReview.objects.all()
+        if self.action not in self.sparse_actions or 'employee_name' in self.selected_fields():
+            queryset = queryset.select_related('employee')
         employee_id = self.request.query_params.get('employee', None)
         if employee_id is not None:
             queryset = queryset.filter(employee_id=employee_id)
-        return queryset
+        return self.only_selected(queryset)
+    
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request):
+        """Create (POST), update (PATCH) or delete (DELETE) many reviews at once"""
+        return ReviewBulkWriter.from_request(request).run(OPERATIONS[request.method])
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream reviews as CSV, NDJSON or Parquet (?file_format=), honouring the list filters"""
+        return export_response(self, request, 'reviews')
     
     @action(detail=False, methods=['get'])
+    @cached_response(PerformanceReview)
     def periods(self, request):
         """Get distinct review periods"""
         try:
-            periods = PerformanceReview.objects.exclude(
-                review_period__isnull=True
-            ).exclude(
-                review_period=''
-            ).values_list('review_period', flat=True).distinct()
-            return Response(sorted(list(periods)))
-        except Exception as e:
-            print(f"Review periods error: {str(e)}")
+            return Response(dashboard.review_periods())
+        except Exception:
+            logger.exception("Review periods error")
             return Response([])
     
     @action(detail=False, methods=['get'])
+    @cached_response(Employee, PerformanceReview)
+    def trends(self, request):
+        """Per-department (and ?employee= per-employee) rating series with moving averages and deltas"""
+        try:
+            return Response(trends.trends(request.query_params))
+        except trends.TrendError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    @action(detail=False, methods=['get'])
+    @cached_response(PerformanceReview)
     def statistics(self, request):
         """Get performance review statistics"""
         try:
-            total_reviews = PerformanceReview.objects.count()
-            
-            # Calculate average rating safely
-            avg_rating = PerformanceReview.objects.aggregate(
-                avg_rating=Avg('rating')
-            )['avg_rating']
-            
-            # Round if not None, otherwise set to 0
-            avg_rating = round(float(avg_rating), 2) if avg_rating else 0
-            
-            # Get rating distribution
-            rating_distribution = PerformanceReview.objects.values('rating').annotate(
-                count=Count('id')
-            ).order_by('rating')
-            
-            return Response({
-                'total_reviews': total_reviews,
-                'average_rating': avg_rating,
-                'rating_distribution': list(rating_distribution)
-            })
-        except Exception as e:
-            print(f"Review statistics error: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            return Response(dashboard.review_statistics())
+        except Exception:
+            logger.exception("Review statistics error")
             return Response({
                 'total_reviews': 0,
                 'average_rating': 0,
                 'rating_distribution': []
-            })
\ No newline at end of file
+            })
+
+
+class ReportViewSet(RequestLimitsMixin, mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """Background reports (employees.jobs): POST {"kind", "params"} to queue one, then poll it until it finishes"""
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = JobPagination
+    # Seconds a client should wait between polls
+    poll_interval = 1
+
+    def get_queryset(self):
+        queryset = Job.objects.all()
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(created_by=self.request.user)
+        return queryset
+
+    def create(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            job = jobs.enqueue(
+                serializer.validated_data['kind'], serializer.validated_data.get('params'), user=request.user
+            )
+        except jobs.JobError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED, headers={
+            'Location': reverse('report-detail', args=[job.pk], request=request),
+            'Retry-After': str(self.poll_interval),
+        })
+
+    def retrieve(self, request, pk=None):
+        job = self.get_object()
+        headers = {} if job.finished else {'Retry-After': str(self.poll_interval)}
+        return Response(self.get_serializer(job).data, headers=headers)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """Cancel a queued job, or stop a running one at its next progress report"""
+        job = self.get_object()
+        if not jobs.cancel(job):
+            return Response({'error': f'Job already {job.status}'}, status=status.HTTP_409_CONFLICT)
+        job.refresh_from_db()
+        return Response(self.get_serializer(job).data)
+
+    @action(detail=True, methods=['get'])
+    def result(self, request, pk=None):
+        """The job's result: its file (exports) or its JSON result"""
+        job = self.get_object()
+        if job.status != Job.SUCCEEDED:
+            return Response({'error': f'Job is {job.status}'}, status=status.HTTP_409_CONFLICT)
+        if not job.result_file:
+            return Response(job.result)
+        return FileResponse(
+            jobs.open_result_file(job),
+            as_attachment=True,
+            filename=os.path.basename(job.result_file),
+            content_type=(job.result or {}).get('content_type'),
+        )
@@ -354,7 +354,7 @@ import {
   Person,
   CalendarToday
 } from '@mui/icons-material';
-import { employeeAPI, reviewAPI } from '../services/api';
+import { dashboardAPI, subscribeEvents } from '../services/api';
 
 const Dashboard = () => {
   const [employeeStats, setEmployeeStats] = useState(null);
@@ -365,28 +365,20 @@ const Dashboard = () => {
 
   useEffect(() => {
     fetchDashboardData();
+    // Other users' edits refresh the figures in place
+    return subscribeEvents({}, () => fetchDashboardData(true));
   }, []);
 
-  const fetchDashboardData = async () => {
+  const fetchDashboardData = async (quiet = false) => {
     try {
-      setLoading(true);
+      if (!quiet) setLoading(true);
       
-      // Fetch all data concurrently
-      const [employeeStatsRes, reviewStatsRes, employeesRes] = await Promise.all([
-        employeeAPI.getEmployeeStats(),
-        reviewAPI.getReviewStats(),
-        employeeAPI.getEmployees()
-      ]);
-
-      setEmployeeStats(employeeStatsRes.data);
-      setReviewStats(reviewStatsRes.data);
-      
-      // Get recent employees (last 5)
-      const employees = employeesRes.data.results || employeesRes.data;
-      const sortedEmployees = employees.sort((a, b) => 
-        new Date(b.hire_date) - new Date(a.hire_date)
-      );
-      setRecentEmployees(sortedEmployees.slice(0, 5));
+      // One round trip; the server gathers the sections concurrently
+      const { data } = await dashboardAPI.getDashboard();
+
+      setEmployeeStats(data.employee_statistics);
+      setReviewStats(data.review_statistics);
+      setRecentEmployees(data.recent_employees);
       
       setError(null);
     } catch (err) {
@@ -620,7 +612,7 @@ const Dashboard = () => {
                               <Business sx={{ fontSize: 16, mr: 1 }} />
                               {employee.department}
                               <CalendarToday sx={{ fontSize: 16, ml: 2, mr: 1 }} />
-                              Joined {formatDate(employee.hire_date)}
+                              Joined {formatDate(employee.date_of_joining)}
                             </Box>
                           }
                         />
@@ -26,7 +26,7 @@ import {
   Star,
   TrendingUp
 } from '@mui/icons-material';
-import { employeeAPI } from '../services/api';
+import { employeeAPI, subscribeEvents } from '../services/api';
 
 const EmployeeDetail = () => {
   const { id } = useParams();
@@ -36,11 +36,14 @@ const EmployeeDetail = () => {
 
   useEffect(() => {
     fetchEmployee();
+    return subscribeEvents({ employee: id }, (change) => {
+      if (change.reset || change.employee) fetchEmployee(true);
+    });
   }, [id]);
 
-  const fetchEmployee = async () => {
+  const fetchEmployee = async (quiet = false) => {
     try {
-      setLoading(true);
+      if (!quiet) setLoading(true);
       const response = await employeeAPI.getEmployee(id);
       setEmployee(response.data);
       setError(null);
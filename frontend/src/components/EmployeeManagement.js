@@ -1,6 +1,6 @@
 // frontend/src/components/EmployeeManagement.js
 
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   Table,
   TableBody,
@@ -26,22 +26,44 @@ import {
   Delete as DeleteIcon,
   Visibility as ViewIcon
 } from '@mui/icons-material';
-import { employeeAPI } from '../services/api';
+import { employeeAPI, changesAPI, applyChanges, subscribeEvents } from '../services/api';
+
+// The API's list order
+const byName = (a, b) =>
+  a.last_name.localeCompare(b.last_name) || a.first_name.localeCompare(b.first_name) || a.id - b.id;
 
 const EmployeeManagement = ({ onEdit, refreshTrigger }) => {
   const [employees, setEmployees] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [deleteDialog, setDeleteDialog] = useState({ open: false, employee: null });
+  // Change feed cursor of the loaded list; null until the first load
+  const cursor = useRef(null);
 
   useEffect(() => {
-    fetchEmployees();
+    if (cursor.current === null) {
+      fetchEmployees();
+    } else {
+      syncEmployees();
+    }
   }, [refreshTrigger]);
 
+  // Edits by other users arrive as change notices
+  useEffect(() => subscribeEvents({}, (change) => {
+    if (change.reset) {
+      fetchEmployees();
+    } else if (change.employee && cursor.current !== null) {
+      syncEmployees();
+    }
+  }), []);
+
   const fetchEmployees = async () => {
     try {
       setLoading(true);
+      // Cursor first, so writes made during the load come with the next sync
+      const { data } = await changesAPI.getCursor();
       const response = await employeeAPI.getEmployees();
+      cursor.current = data.cursor;
       setEmployees(response.data.results || response.data);
       setError(null);
     } catch (err) {
@@ -52,6 +74,18 @@ const EmployeeManagement = ({ onEdit, refreshTrigger }) => {
     }
   };
 
+  // After an edit only the changed employees are fetched
+  const syncEmployees = async () => {
+    try {
+      const { cursor: next, changes } = await changesAPI.sync(cursor.current, 'employee');
+      cursor.current = next;
+      setEmployees((current) => applyChanges(current, changes, byName));
+    } catch (err) {
+      // The cursor was compacted away (410) or the sync failed: reload
+      fetchEmployees();
+    }
+  };
+
   const handleDeleteEmployee = async (employee) => {
     try {
       await employeeAPI.deleteEmployee(employee.id);
@@ -58,7 +58,7 @@ const ReviewForm = ({ open, review, onClose, onSave }) => {
 
   const fetchEmployees = async () => {
     try {
-      const response = await employeeAPI.getEmployees();
+      const response = await employeeAPI.getEmployeeOptions();
       setEmployees(response.data.results || response.data);
     } catch (err) {
       console.error('Error fetching employees:', err);
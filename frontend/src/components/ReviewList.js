@@ -67,7 +67,7 @@ const ReviewList = () => {
 
   const fetchEmployees = async () => {
     try {
-      const response = await employeeAPI.getEmployees();
+      const response = await employeeAPI.getEmployeeOptions();
       setEmployees(response.data.results || response.data);
     } catch (err) {
       console.error('Error fetching employees:', err);
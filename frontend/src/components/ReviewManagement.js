@@ -1,6 +1,6 @@
 // frontend/src/components/ReviewManagement.js
 
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   Table,
   TableBody,
@@ -28,7 +28,10 @@ import {
   Edit as EditIcon,
   Delete as DeleteIcon
 } from '@mui/icons-material';
-import { reviewAPI, employeeAPI } from '../services/api';
+import { reviewAPI, employeeAPI, changesAPI, applyChanges, subscribeEvents } from '../services/api';
+
+// The API's list order: newest review first
+const byReviewDate = (a, b) => b.review_date.localeCompare(a.review_date) || b.id - a.id;
 
 const ReviewManagement = ({ onEdit, refreshTrigger }) => {
   const [reviews, setReviews] = useState([]);
@@ -38,16 +41,34 @@ const ReviewManagement = ({ onEdit, refreshTrigger }) => {
   const [deleteDialog, setDeleteDialog] = useState({ open: false, review: null });
   const [employeeFilter, setEmployeeFilter] = useState('');
   const [reviewStats, setReviewStats] = useState({});
+  // Change feed cursor of the loaded list; null until the first load
+  const cursor = useRef(null);
 
   useEffect(() => {
-    fetchReviews();
-    fetchEmployees();
+    if (cursor.current === null) {
+      fetchReviews();
+      fetchEmployees();
+    } else {
+      syncReviews();
+    }
   }, [refreshTrigger]);
 
+  // Edits by other users arrive as change notices
+  useEffect(() => subscribeEvents({}, (change) => {
+    if (change.reset) {
+      fetchReviews();
+    } else if (change.review && cursor.current !== null) {
+      syncReviews();
+    }
+  }), []);
+
   const fetchReviews = async (employeeId = null) => {
     try {
       setLoading(true);
+      // Cursor first, so writes made during the load come with the next sync
+      const { data } = await changesAPI.getCursor();
       const response = await reviewAPI.getReviews(employeeId);
+      cursor.current = data.cursor;
       setReviews(response.data.results || response.data);
       setError(null);
       const [reviewStatsRes] = await Promise.all([
@@ -62,9 +83,23 @@ const ReviewManagement = ({ onEdit, refreshTrigger }) => {
     }
   };
 
+  // After an edit only the changed reviews are fetched
+  const syncReviews = async () => {
+    try {
+      const { cursor: next, changes } = await changesAPI.sync(cursor.current, 'review');
+      cursor.current = next;
+      setReviews((current) => applyChanges(current, changes, byReviewDate));
+      const reviewStatsRes = await reviewAPI.getReviewStats();
+      setReviewStats(reviewStatsRes.data);
+    } catch (err) {
+      // The cursor was compacted away (410) or the sync failed: reload
+      fetchReviews();
+    }
+  };
+
   const fetchEmployees = async () => {
     try {
-      const response = await employeeAPI.getEmployees();
+      const response = await employeeAPI.getEmployeeOptions();
       setEmployees(response.data.results || response.data);
     } catch (err) {
       console.error('Error fetching employees:', err);
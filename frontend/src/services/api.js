@@ -53,7 +53,18 @@ api.interceptors.response.use(
   (response) => {
     return response;
   },
-  (error) => {
+  async (error) => {
+    const { config, response } = error;
+    // Rate limited (429) or busy (503): retry a read once after Retry-After
+    if (
+      [429, 503].includes(response?.status) && config?.method === 'get' && !config._retried
+    ) {
+      const seconds = Number(response.headers['retry-after'] || 1);
+      if (seconds <= 10) {
+        await new Promise((resolve) => setTimeout(resolve, seconds * 1000));
+        return api({ ...config, _retried: true });
+      }
+    }
     console.error('API Error:', error.response?.data || error.message);
     if (error.response?.status === 404) {
       console.error('API endpoint not found');
@@ -62,9 +73,25 @@ api.interceptors.response.use(
   }
 );
 
+// Follow keyset pagination cursors and return every row as response.data
+const getAllPages = async (url, params = {}) => {
+  let response = await api.get(url, { params });
+  const results = [...(response.data.results || response.data)];
+  let next = response.data.next;
+  while (next) {
+    response = await api.get(next);
+    results.push(...response.data.results);
+    next = response.data.next;
+  }
+  return { ...response, data: results };
+};
+
 // Employee API calls
 export const employeeAPI = {
-  getEmployees: () => api.get('/employees/'),
+  getEmployees: () => getAllPages('/employees/', { page_size: 500 }),
+  // Only what the employee pickers show (?fields= also trims the query)
+  getEmployeeOptions: () => getAllPages('/employees/', { page_size: 500, fields: 'id,full_name,department' }),
+  getEmployeesPage: (params = {}) => api.get('/employees/', { params }),
   getEmployee: (id) => api.get(`/employees/${id}/`),
   createEmployee: (data) => api.post('/employees/', data),
   updateEmployee: (id, data) => api.put(`/employees/${id}/`, data),
@@ -72,6 +99,8 @@ export const employeeAPI = {
   getEmployeeReviews: (id) => api.get(`/employees/${id}/reviews/`),
   getDepartments: () => api.get('/employees/departments/'),
   getEmployeeStats: () => api.get('/employees/statistics/'),
+  getLeaderboard: (params = {}) => api.get('/employees/leaderboard/', { params }),
+  getEmployeeRanking: (id) => api.get(`/employees/${id}/ranking/`),
 };
 
 // Performance Review API calls
@@ -86,6 +115,85 @@ export const reviewAPI = {
   deleteReview: (id) => api.delete(`/reviews/${id}/`),
   getReviewPeriods: () => api.get('/reviews/periods/'),
   getReviewStats: () => api.get('/reviews/statistics/'),
+  getReviewTrends: (params = {}) => api.get('/reviews/trends/', { params }),
+};
+
+// Dashboard API calls
+export const dashboardAPI = {
+  getDashboard: () => api.get('/dashboard/'),
+};
+
+// Search API calls
+export const searchAPI = {
+  search: (q, params = {}) => api.get('/search/', { params: { q, ...params } }),
+};
+
+// Change feed: read the cursor, load a list, then apply only what changed
+export const changesAPI = {
+  getCursor: () => api.get('/changes/'),
+  // Follows has_more; rejects with a 410 response once the cursor was compacted away
+  sync: async (since, type) => {
+    let cursor = since;
+    const changes = [];
+    for (;;) {
+      const response = await api.get('/changes/', { params: { since: cursor, type } });
+      changes.push(...response.data.changes);
+      cursor = response.data.cursor;
+      if (!response.data.has_more) {
+        return { cursor, changes };
+      }
+    }
+  },
+};
+
+// Upserts replace or add rows, tombstones remove them; compare keeps the list order
+export const applyChanges = (rows, changes, compare) => {
+  const byId = new Map(rows.map((row) => [row.id, row]));
+  changes.forEach((change) => {
+    if (change.op === 'delete') {
+      byId.delete(change.id);
+    } else {
+      byId.set(change.id, change.data);
+    }
+  });
+  return [...byId.values()].sort(compare);
+};
+
+// Live change notices (server-sent events, ASGI only). onChange gets
+// {cursor, employee: {upsert, delete}, review: {...}} with ids, or
+// {reset: true} when the client missed too much and should reload.
+// EventSource reconnects by itself and resumes from the last event id.
+export const subscribeEvents = ({ department, employee } = {}, onChange) => {
+  const params = new URLSearchParams();
+  if (department) params.set('department', department);
+  if (employee) params.set('employee', employee);
+  const source = new EventSource(`${API_BASE_URL}/events/?${params}`, { withCredentials: true });
+  source.addEventListener('changes', (event) => onChange(JSON.parse(event.data)));
+  source.addEventListener('reset', (event) => onChange({ ...JSON.parse(event.data), reset: true }));
+  return () => source.close();
+};
+
+// Background reports: queue a job, then poll it until it finishes
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+export const reportAPI = {
+  createReport: (kind, params = {}) => api.post('/reports/', { kind, params }),
+  getReport: (id) => api.get(`/reports/${id}/`),
+  getReports: () => api.get('/reports/'),
+  cancelReport: (id) => api.post(`/reports/${id}/cancel/`),
+  resultUrl: (id) => `${API_BASE_URL}/reports/${id}/result/`,
+  // Resolves with the finished job; onProgress receives every polled state
+  waitForReport: async (id, onProgress = () => {}) => {
+    for (;;) {
+      const response = await api.get(`/reports/${id}/`);
+      onProgress(response.data);
+      if (['succeeded', 'failed', 'cancelled'].includes(response.data.status)) {
+        return response.data;
+      }
+      const retryAfter = parseFloat(response.headers['retry-after']) || 1;
+      await sleep(retryAfter * 1000);
+    }
+  },
 };
 
 // Authentication API calls